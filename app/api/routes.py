@@ -3,22 +3,56 @@ API routes for file conversion.
 Defines all HTTP endpoints for the application.
 """
 
+import json
 import uuid
-from typing import Optional
+import asyncio
+from typing import Optional, Dict, Any, Awaitable
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Header
+from fastapi.responses import (
+    FileResponse,
+    PlainTextResponse,
+    StreamingResponse,
+    JSONResponse,
+    Response
+)
+from starlette.requests import ClientDisconnect
+from starlette.background import BackgroundTask
 from app.config import settings
 from app.utils.validators import (
     validate_file_size,
+    get_file_extension,
     validate_file_format,
     validate_output_format,
+    validate_format_options,
+    validate_pipeline,
     sanitize_filename,
     validate_quality,
-    validate_resize_dimensions
+    validate_resize_dimensions,
+    validate_max_bytes,
+    validate_source_id,
+    validate_webhook_signature,
+    validate_profiler_token,
+    PIPELINE_OPERATIONS,
+    WATERMARK_POSITIONS
 )
 from app.services.file_handler import file_handler
-from app.services.converter import cloudconvert_service, ConversionError
+from app.services.file_io import file_io
+from app.services.converter import (
+    cloudconvert_service,
+    conversion_options,
+    ConversionError,
+    PreparedJob,
+    OUTPUT_CONTENT_TYPES
+)
+from app.services.job_journal import job_journal, hash_file
+from app.services.job_queue import job_queue, STATUS_QUEUED, STATUS_FINISHED
+from app.services.job_events import job_events
+from app.services.profiler import request_profiler
+from app.services.loop_monitor import loop_monitor
+from app.services.archive import archive_converter
+from app.services.key_pool import key_pool
+from app.services.variants import variant_cache, negotiate_format, wants_image, CONTENT_TYPES
 
 router = APIRouter()
 
@@ -26,16 +60,14 @@ router = APIRouter()
 @router.get("/api/health")
 async def health_check():
     """Health check endpoint."""
-    api_configured = bool(
-        settings.cloudconvert_api_key and 
-        settings.cloudconvert_api_key != "your_api_key_here"
-    )
-    
     return {
         "status": "healthy",
-        "api_configured": api_configured,
+        "api_configured": key_pool.configured,
+        "api_keys": len(key_pool.keys),
         "supported_formats": settings.supported_formats,
-        "max_file_size_mb": settings.max_file_size_mb
+        "max_file_size_mb": settings.max_file_size_mb,
+        "worker_mode": settings.job_queue_enabled,
+        "queue": await file_io.run(job_queue.stats) if settings.job_queue_enabled else None
     }
 
 
@@ -44,35 +76,70 @@ async def get_supported_formats():
     """Get list of supported file formats."""
     return {
         "input_formats": settings.supported_formats,
-        "output_formats": settings.supported_formats
+        "output_formats": settings.output_formats,
+        "avif_speed_presets": list(settings.avif_speed_presets),
+        "pipeline_steps": PIPELINE_OPERATIONS,
+        "watermark_positions": WATERMARK_POSITIONS
     }
 
 
 @router.post("/api/convert")
 async def convert_file(
+    request: Request,
     file: UploadFile = File(...),
     output_format: str = Form(...),
     quality: Optional[int] = Form(None),
+    speed: Optional[str] = Form(None),
+    pipeline: Optional[str] = Form(None),
     resize_width: Optional[int] = Form(None),
-    resize_height: Optional[int] = Form(None)
+    resize_height: Optional[int] = Form(None),
+    max_bytes: Optional[int] = Form(None),
+    allow_downscale: bool = Form(True),
+    inline: bool = False,
+    wait: bool = True
 ):
     """
     Convert an uploaded image file to a different format.
     
+    A ZIP archive of images can be uploaded instead; every image in it is
+    converted and the results are streamed back as a ZIP. Archives larger
+    than MAX_FILE_SIZE_MB must go to /api/convert/archive.
+    
+    With ?inline=1 (or an Accept header listing an image type) the
+    converted image itself is returned instead of a download link.
+    
+    In worker mode the conversion is queued for a worker process. With
+    ?wait=0, or if it takes longer than QUEUE_RESULT_TIMEOUT, the answer is
+    202 with a status URL instead of the result.
+    
     Args:
-        file: The image file to convert
-        output_format: Desired output format (jpeg, png, webp, gif)
+        request: The request (may carry a job prepared during the upload)
+        file: The image file (or ZIP archive of images) to convert
+        output_format: Desired output format (jpeg, png, webp, gif, avif)
         quality: Optional quality for lossy formats (1-100)
+        speed: Optional AVIF encoder speed preset (fastest ... smallest)
+        pipeline: Optional JSON list of transform steps (crop, rotate,
+            auto_orient, strip, watermark) applied before conversion
         resize_width: Optional width in pixels
         resize_height: Optional height in pixels
+        max_bytes: Optional output size budget; the highest quality that
+            fits is chosen automatically (cannot be combined with quality)
+        allow_downscale: Whether max_bytes may shrink the image to fit
+        inline: Whether to respond with the image bytes
+        wait: Whether to wait for a queued conversion (worker mode)
         
     Returns:
-        Information about the conversion and download URL
+        Information about the conversion and download URL, or the image
     """
     input_file_path = None
     output_file_path = None
     
     try:
+        if get_file_extension(file.filename) == "zip":
+            return _convert_archive(
+                file, output_format, quality, speed, pipeline, resize_width, resize_height
+            )
+        
         # Validate file size
         validate_file_size(file)
         
@@ -83,22 +150,36 @@ async def convert_file(
         output_format = validate_output_format(output_format)
         
         # Validate optional conversion options
-        quality_value = None
-        if quality is not None:
-            quality_value = validate_quality(quality)
-            if output_format not in ["jpg", "jpeg", "webp"]:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Quality is only supported for JPEG and WebP output formats"
-                )
+        quality_value, speed = validate_format_options(output_format, quality, speed)
+        steps = validate_pipeline(pipeline)
         
         resize_width, resize_height = validate_resize_dimensions(
             resize_width,
             resize_height
         )
         
-        # Check if conversion is needed
-        if input_format == output_format:
+        if max_bytes is not None:
+            max_bytes = validate_max_bytes(max_bytes)
+            if quality_value is not None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Use either quality or max_bytes, not both"
+                )
+        
+        inline = inline or wants_image(request.headers.get("accept"))
+        if inline and max_bytes is not None:
+            raise HTTPException(
+                status_code=400,
+                detail="max_bytes cannot be combined with an inline response"
+            )
+        if inline and not wait:
+            raise HTTPException(
+                status_code=400,
+                detail="wait=0 cannot be combined with an inline response"
+            )
+        
+        # Check if conversion is needed (a pipeline edits the image anyway)
+        if input_format == output_format and not steps:
             # Normalize jpg/jpeg
             if not (input_format in ['jpg', 'jpeg'] and output_format in ['jpg', 'jpeg']):
                 return {
@@ -116,15 +197,81 @@ async def convert_file(
         )
         output_file_path = file_handler.get_temp_path(f"{uuid.uuid4()}_{output_filename}")
         
-        # Perform conversion
-        await cloudconvert_service.convert_image(
-            input_file_path,
-            output_format,
-            output_file_path,
-            quality=quality_value,
-            resize_width=resize_width,
-            resize_height=resize_height
+        if max_bytes is not None and not settings.job_queue_enabled:
+            # Search for the highest quality that fits the byte budget
+            size_result = await _unless_disconnected(request, cloudconvert_service.convert_to_size(
+                input_file_path,
+                output_format,
+                output_file_path,
+                max_bytes,
+                resize_width=resize_width,
+                resize_height=resize_height,
+                allow_downscale=allow_downscale,
+                pipeline=steps
+            ))
+            
+            return {
+                "success": True,
+                "message": "Conversion completed successfully",
+                "original_filename": file.filename,
+                "output_filename": output_filename,
+                "download_url": f"/api/download/{output_file_path.name}",
+                "input_format": input_format,
+                "output_format": output_format,
+                "max_bytes": max_bytes,
+                **size_result
+            }
+        
+        # Reuse a finished result for the same input and options if we have one
+        input_hash = await file_io.run(hash_file, input_file_path)
+        options = conversion_options(
+            output_format, quality_value, resize_width, resize_height, speed, steps
         )
+        previous = None
+        if max_bytes is None:
+            previous = await file_io.run(job_journal.find_finished, input_hash, options)
+        
+        if settings.job_queue_enabled and not previous:
+            # Hand the conversion to a worker process
+            job_id = await file_io.run(job_queue.enqueue, {
+                "input_path": str(input_file_path),
+                "output_path": str(output_file_path),
+                "original_filename": file.filename,
+                "output_filename": output_filename,
+                "input_format": input_format,
+                "input_hash": input_hash,
+                "options": options,
+                "max_bytes": max_bytes,
+                "allow_downscale": allow_downscale
+            })
+            # The worker deletes the input once the job is done
+            input_file_path = None
+            return await _queued_response(request, job_id, wait, inline)
+        
+        if inline:
+            return await _inline_response(
+                request, input_file_path, options, previous, input_format, output_filename
+            )
+        
+        if previous:
+            await file_handler.copy_file(Path(previous["output_path"]), output_file_path)
+        else:
+            prepared = _claim_prepared_job(request, options)
+            
+            # Perform conversion, recording progress so it can be resumed
+            journal_id = await file_io.run(job_journal.create, input_hash, options, output_file_path)
+            await _unless_disconnected(request, cloudconvert_service.convert_image(
+                input_file_path,
+                output_format,
+                output_file_path,
+                quality=quality_value,
+                resize_width=resize_width,
+                resize_height=resize_height,
+                journal_id=journal_id,
+                prepared=prepared,
+                speed=speed,
+                pipeline=steps
+            ))
         
         # Generate download URL
         download_url = f"/api/download/{output_file_path.name}"
@@ -142,24 +289,31 @@ async def convert_file(
     except ConversionError as e:
         # Clean up files
         if input_file_path:
-            file_handler.delete_file(input_file_path)
+            await file_handler.delete_file(input_file_path)
         if output_file_path:
-            file_handler.delete_file(output_file_path)
+            await file_handler.delete_file(output_file_path)
         
         raise HTTPException(status_code=500, detail=str(e))
         
     except HTTPException:
         # Re-raise HTTP exceptions
         if input_file_path:
-            file_handler.delete_file(input_file_path)
+            await file_handler.delete_file(input_file_path)
         raise
         
+    except ClientDisconnect:
+        # The conversion was cancelled; nobody will download the output
+        print(f"Client disconnected, cancelled conversion of {file.filename}")
+        if output_file_path:
+            await file_handler.delete_file(output_file_path)
+        return Response(status_code=499)
+        
     except Exception as e:
         # Clean up files
         if input_file_path:
-            file_handler.delete_file(input_file_path)
+            await file_handler.delete_file(input_file_path)
         if output_file_path:
-            file_handler.delete_file(output_file_path)
+            await file_handler.delete_file(output_file_path)
         
         raise HTTPException(
             status_code=500,
@@ -167,8 +321,277 @@ async def convert_file(
         )
     finally:
         # Always clean up input file
-        if input_file_path and input_file_path.exists():
-            file_handler.delete_file(input_file_path)
+        if input_file_path and await file_handler.file_exists(input_file_path):
+            await file_handler.delete_file(input_file_path)
+
+
+def _claim_prepared_job(request: Request, options: Dict[str, Any]) -> Optional[PreparedJob]:
+    """The job created while the upload was arriving, if it matches the options."""
+    prepared = getattr(request.state, "prepared_job", None)
+    if prepared is not None and not prepared.claim(options):
+        prepared = None
+    return prepared
+
+
+async def _inline_response(
+    request: Request,
+    input_file_path: Path,
+    options: Dict[str, Any],
+    previous: Optional[Dict[str, Any]],
+    input_format: str,
+    output_filename: str
+) -> Response:
+    """
+    Respond with the converted image itself.
+    
+    The output is passed straight through from CloudConvert as it
+    downloads and is never written to temp storage or the journal. A
+    finished result for the same input and options is served instead when
+    there is one.
+    
+    Args:
+        request: The request (may carry a job prepared during the upload)
+        input_file_path: Path to the staged upload
+        options: Conversion options
+        previous: Finished journal entry for the same input, if any
+        input_format: Format of the upload
+        output_filename: Filename suggested to the client
+        
+    Returns:
+        The converted image
+    """
+    output_format = options["output_format"]
+    media_type = OUTPUT_CONTENT_TYPES[output_format]
+    headers = {
+        "Content-Disposition": f'inline; filename="{output_filename}"',
+        "X-Input-Format": input_format,
+        "X-Output-Format": output_format,
+        "Cache-Control": "no-store"
+    }
+    
+    if previous:
+        return Response(
+            content=await file_handler.read_file(Path(previous["output_path"])),
+            media_type=media_type,
+            headers=headers
+        )
+    
+    stream = await _unless_disconnected(request, cloudconvert_service.convert_to_stream(
+        input_file_path,
+        **options,
+        prepared=_claim_prepared_job(request, options)
+    ))
+    if stream.size is not None:
+        headers["Content-Length"] = str(stream.size)
+    
+    # The background task also runs when the client disconnects mid-stream
+    return StreamingResponse(
+        stream.iter_bytes(),
+        media_type=stream.media_type,
+        headers=headers,
+        background=BackgroundTask(stream.aclose)
+    )
+
+
+def _queued_job_body(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Status of a queued conversion, with the usual result once finished."""
+    payload = job["payload"]
+    body: Dict[str, Any] = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "job_attempts": job["attempts"],
+        "status_url": f"/api/jobs/{job['id']}"
+    }
+    if job["status"] == STATUS_FINISHED:
+        options = payload["options"]
+        body.update({
+            "success": True,
+            "message": "Conversion completed successfully",
+            "original_filename": payload["original_filename"],
+            "output_filename": payload["output_filename"],
+            "download_url": f"/api/download/{Path(payload['output_path']).name}",
+            "input_format": payload["input_format"],
+            "output_format": options["output_format"]
+        })
+        if payload.get("max_bytes") is not None:
+            body["max_bytes"] = payload["max_bytes"]
+        body.update(job["result"] or {})
+    elif job["error"]:
+        body["error"] = job["error"]
+    return body
+
+
+async def _queued_response(request: Request, job_id: str, wait: bool, inline: bool) -> Response:
+    """
+    Answer a request whose conversion was queued for a worker.
+    
+    Args:
+        request: The request
+        job_id: The queued job
+        wait: Whether to wait for the result
+        inline: Whether to respond with the image bytes
+        
+    Returns:
+        The result (as for a direct conversion), or 202 with the job's
+        status if it is not waited for or does not finish in time
+        
+    Raises:
+        HTTPException: If the conversion failed
+        ClientDisconnect: If the client went away while waiting
+    """
+    job = None
+    if wait:
+        try:
+            job = await _unless_disconnected(
+                request, job_queue.wait(job_id, settings.queue_result_timeout)
+            )
+        except ClientDisconnect:
+            # Stop the job; a worker converting it notices at its next renewal
+            queued = await file_io.run(job_queue.get, job_id)
+            if await file_io.run(job_queue.cancel, job_id) == STATUS_QUEUED:
+                await file_handler.delete_file(Path(queued["payload"]["input_path"]))
+            raise
+    
+    if job is None:
+        job = await file_io.run(job_queue.get, job_id)
+        return JSONResponse(status_code=202, content=_queued_job_body(job))
+    
+    if job["status"] != STATUS_FINISHED:
+        raise HTTPException(status_code=500, detail=job["error"] or f"Conversion {job['status']}")
+    
+    body = _queued_job_body(job)
+    if not inline:
+        return JSONResponse(content=body)
+    
+    # Nothing is kept for inline responses, so the output goes once sent
+    output_path = Path(job["payload"]["output_path"])
+    return FileResponse(
+        path=output_path,
+        media_type=OUTPUT_CONTENT_TYPES[body["output_format"]],
+        headers={
+            "Content-Disposition": f'inline; filename="{body["output_filename"]}"',
+            "X-Input-Format": body["input_format"],
+            "X-Output-Format": body["output_format"],
+            "Cache-Control": "no-store"
+        },
+        background=BackgroundTask(file_handler.delete_file, output_path)
+    )
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    """Return once the client closes the connection."""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _unless_disconnected(request: Request, work: Awaitable[Any]) -> Any:
+    """
+    Run a conversion, cancelling it if the client disconnects first.
+    
+    Cancelling the conversion deletes its CloudConvert job and stops any
+    upload, status polling or download still in progress.
+    
+    Args:
+        request: The request whose body has already been read
+        work: The conversion to run
+        
+    Returns:
+        The conversion's result
+        
+    Raises:
+        ClientDisconnect: If the client went away before it finished
+    """
+    task = asyncio.ensure_future(work)
+    request_profiler.track(task)
+    disconnected = asyncio.create_task(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnected.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    if task.cancelled():
+        raise ClientDisconnect()
+    return task.result()
+
+
+@router.post("/api/convert/archive")
+async def convert_archive(
+    file: UploadFile = File(...),
+    output_format: str = Form(...),
+    quality: Optional[int] = Form(None),
+    speed: Optional[str] = Form(None),
+    pipeline: Optional[str] = Form(None),
+    resize_width: Optional[int] = Form(None),
+    resize_height: Optional[int] = Form(None)
+):
+    """
+    Convert every image in an uploaded ZIP archive.
+    
+    Unlike /api/convert, this endpoint accepts uploads up to
+    ZIP_MAX_UPLOAD_MB.
+    
+    Args:
+        file: The ZIP archive of images to convert
+        output_format: Desired output format (jpeg, png, webp, gif, avif)
+        quality: Optional quality for lossy formats (1-100)
+        speed: Optional AVIF encoder speed preset (fastest ... smallest)
+        pipeline: Optional JSON list of transform steps
+        resize_width: Optional width in pixels
+        resize_height: Optional height in pixels
+        
+    Returns:
+        The converted images as a streamed ZIP
+    """
+    if get_file_extension(file.filename) != "zip":
+        raise HTTPException(status_code=400, detail="Upload a .zip archive to this endpoint")
+    return _convert_archive(
+        file, output_format, quality, speed, pipeline, resize_width, resize_height
+    )
+
+
+def _convert_archive(
+    file: UploadFile,
+    output_format: str,
+    quality: Optional[int],
+    speed: Optional[str],
+    pipeline: Optional[str],
+    resize_width: Optional[int],
+    resize_height: Optional[int]
+) -> StreamingResponse:
+    """
+    Stream the conversion of every image in an uploaded ZIP archive.
+    
+    Entries are read one at a time from the upload and the output archive
+    is sent as each conversion finishes, so neither archive is held in
+    memory.
+    """
+    validate_file_size(file, settings.zip_max_upload_bytes)
+    output_format = validate_output_format(output_format)
+    quality_value, speed = validate_format_options(output_format, quality, speed)
+    steps = validate_pipeline(pipeline)
+    
+    resize_width, resize_height = validate_resize_dimensions(resize_width, resize_height)
+    archive = archive_converter.open_archive(file.file)
+    
+    stem = Path(sanitize_filename(file.filename)).stem
+    return StreamingResponse(
+        archive_converter.stream_conversions(
+            archive,
+            output_format,
+            quality=quality_value,
+            speed=speed,
+            pipeline=steps,
+            resize_width=resize_width,
+            resize_height=resize_height
+        ),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{stem}_converted.zip"'}
+    )
 
 
 @router.get("/api/download/{filename}")
@@ -186,7 +609,7 @@ async def download_file(filename: str):
     filename = sanitize_filename(filename)
     file_path = file_handler.get_temp_path(filename)
     
-    if not file_path.exists():
+    if not await file_handler.file_exists(file_path):
         raise HTTPException(
             status_code=404,
             detail="File not found. It may have been deleted or expired."
@@ -198,9 +621,217 @@ async def download_file(filename: str):
     else:
         display_filename = filename
     
+    if file_handler.is_in_memory(file_path):
+        # Small files are served straight from the in-memory tier
+        return Response(
+            content=await file_handler.read_file(file_path),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{display_filename}"'}
+        )
+    
     return FileResponse(
         path=file_path,
         filename=display_filename,
         media_type="application/octet-stream",
         background=None  # We'll handle cleanup separately
     )
+
+
+@router.get("/api/jobs/{job_id}")
+async def get_queued_job(job_id: str):
+    """
+    Status of a conversion queued in worker mode.
+    
+    Args:
+        job_id: The job id from a 202 response
+        
+    Returns:
+        The job's status, with the conversion result once it finished
+    """
+    job = await file_io.run(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _queued_job_body(job)
+
+
+@router.post("/api/sources")
+async def register_source(file: UploadFile = File(...)):
+    """
+    Register a source image for the image origin.
+    
+    Registering the same image again returns the same id.
+    
+    Args:
+        file: The source image
+        
+    Returns:
+        The source id and the URL its variants are served from
+    """
+    validate_file_size(file)
+    input_format = validate_file_format(file.filename)
+    
+    result = await variant_cache.register(file, input_format)
+    return {
+        "success": True,
+        **result,
+        "url": f"/img/{result['source_id']}"
+    }
+
+
+@router.get("/img/{source_id}")
+async def get_image_variant(
+    source_id: str,
+    request: Request,
+    w: Optional[int] = None,
+    h: Optional[int] = None,
+    q: Optional[int] = None
+):
+    """
+    Serve a variant of a registered source image.
+    
+    The format (AVIF, WebP or JPEG) is chosen from the Accept header. Each variant
+    is converted on its first request and served from the variant cache
+    afterwards, with long-lived caching headers for browsers and CDNs.
+    
+    Args:
+        source_id: Id returned by /api/sources
+        w: Optional width in pixels
+        h: Optional height in pixels
+        q: Optional quality (1-100)
+        
+    Returns:
+        The image variant
+    """
+    source_path = await file_io.run(variant_cache.source_path, validate_source_id(source_id))
+    if source_path is None:
+        raise HTTPException(status_code=404, detail="Source image not found")
+    
+    w, h = validate_resize_dimensions(w, h)
+    if q is not None:
+        q = validate_quality(q)
+    
+    output_format = negotiate_format(request.headers.get("accept"))
+    key = variant_cache.variant_key(source_id, output_format, w, h, q)
+    headers = {
+        "Cache-Control": f"public, max-age={settings.variant_max_age_seconds}, immutable",
+        "Vary": "Accept",
+        "ETag": f'"{key}"'
+    }
+    
+    # Variants never change, so a matching ETag is always still valid
+    if_none_match = request.headers.get("if-none-match", "")
+    etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if headers["ETag"] in etags or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        variant_path = await variant_cache.get_variant(source_path, key, output_format, w, h, q)
+    except ConversionError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return FileResponse(
+        path=variant_path,
+        media_type=CONTENT_TYPES[output_format],
+        headers=headers
+    )
+
+
+@router.post("/api/webhooks/cloudconvert")
+async def cloudconvert_webhook(request: Request):
+    """
+    Receive CloudConvert job notifications.
+    
+    Handles job.finished and job.failed events by waking the request
+    that is waiting on the job.
+    
+    Args:
+        request: The webhook request, signed with the webhook secret
+        
+    Returns:
+        Whether a waiting conversion was notified
+    """
+    payload = await request.body()
+    validate_webhook_signature(payload, request.headers.get("CloudConvert-Signature"))
+    
+    try:
+        event = json.loads(payload)
+        job = event["job"]
+        job_id = job["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Malformed webhook payload")
+    
+    if event.get("event") not in ("job.finished", "job.failed"):
+        return {"received": True, "delivered": False}
+    
+    delivered = job_events.resolve(job_id, {"data": job})
+    return {"received": True, "delivered": delivered}
+
+
+@router.get("/api/keys")
+async def list_api_keys(x_profiler_token: Optional[str] = Header(None)):
+    """
+    Usage of each configured CloudConvert API key.
+    
+    Keys are identified by a hash prefix, never by the key itself.
+    Requires the X-Profiler-Token header.
+    """
+    validate_profiler_token(x_profiler_token)
+    return {"keys": key_pool.usage()}
+
+
+@router.get("/api/loop")
+async def event_loop_stats(x_profiler_token: Optional[str] = Header(None)):
+    """
+    Event loop lag percentiles, recent stalls and file I/O pool activity.
+    
+    The stacks that were blocking the loop are included when a valid
+    X-Profiler-Token header is sent.
+    """
+    include_stacks = x_profiler_token is not None
+    if include_stacks:
+        validate_profiler_token(x_profiler_token)
+    return {
+        **loop_monitor.stats(include_stacks=include_stacks),
+        "file_io": file_io.stats()
+    }
+
+
+@router.get("/api/profiles")
+async def list_profiles(x_profiler_token: Optional[str] = Header(None)):
+    """
+    List recent request profiles, newest first.
+    
+    Requires the X-Profiler-Token header.
+    """
+    validate_profiler_token(x_profiler_token)
+    return {"profiles": await file_io.run(request_profiler.list_profiles)}
+
+
+@router.get("/api/profiles/{profile_id}/{kind}")
+async def get_profile(
+    profile_id: str,
+    kind: str,
+    x_profiler_token: Optional[str] = Header(None)
+):
+    """
+    Fetch a profile in folded-stack (flame graph) format.
+    
+    Args:
+        profile_id: Profile id from /api/profiles
+        kind: "wall" for time including awaits, "cpu" for on-CPU time
+        
+    Returns:
+        The folded stacks as plain text
+    """
+    validate_profiler_token(x_profiler_token)
+    
+    if kind not in ("wall", "cpu"):
+        raise HTTPException(status_code=400, detail="Profile kind must be 'wall' or 'cpu'")
+    
+    profile_path = request_profiler.profile_dir / f"{sanitize_filename(profile_id)}.{kind}.folded"
+    try:
+        content = await file_io.run(profile_path.read_text, encoding='utf-8')
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return PlainTextResponse(content)
@@ -0,0 +1,379 @@
+"""
+Command-line bulk converter.
+Converts a whole directory tree without starting the HTTP server, using the
+same validators and CloudConvert service as the web API.
+
+Usage:
+    python -m app.cli INPUT_DIR OUTPUT_DIR --format webp [--jobs 8] [--quality 80]
+    python -m app.cli INPUT_DIR OUTPUT_DIR --format avif [--speed fast]
+
+Outputs mirror the input tree. A manifest in the output directory records
+each converted file's mtime, size and hash, so files whose outputs are
+already up to date are skipped and an interrupted run resumes where it
+stopped. Sources that would share an output name (a.png and a.jpg both
+becoming a.webp) are not both converted: the first keeps the name and the
+other is reported as failed.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import argparse
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List
+from fastapi import HTTPException
+from app.utils.validators import (
+    validate_byte_count,
+    validate_file_format,
+    validate_output_format,
+    validate_format_options,
+    validate_pipeline,
+    validate_resize_dimensions
+)
+from app.services.converter import cloudconvert_service, conversion_options, ConversionError
+from app.services.file_io import file_io
+from app.services.job_journal import hash_file
+
+MANIFEST_NAME = ".convert-manifest.jsonl"
+
+
+class Manifest:
+    """
+    Append-only record of converted files, keyed by relative source path.
+
+    Each successful conversion appends one JSON line, so progress is saved
+    as it happens and the last line for a path wins when loading.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry["source"]] = entry
+                    except (ValueError, KeyError):
+                        # Ignore a partially written last line
+                        continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        # Records are written from file I/O pool threads
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Record a converted file."""
+        with self._lock:
+            self.entries[entry["source"]] = entry
+            self._file.write(json.dumps(entry, sort_keys=True) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+@dataclass
+class BulkStats:
+    """Running totals for progress reporting."""
+    total: int = 0
+    converted: int = 0
+    skipped: int = 0
+    failed: int = 0
+    bytes_in: int = 0
+    started: float = field(default_factory=time.monotonic)
+    failures: List[str] = field(default_factory=list)
+
+    @property
+    def done(self) -> int:
+        return self.converted + self.skipped + self.failed
+
+    def summary(self) -> str:
+        """One-line throughput/ETA summary."""
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        rate = self.converted / elapsed
+        mb_rate = self.bytes_in / elapsed / (1024 * 1024)
+        remaining = self.total - self.done
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "--"
+        return (
+            f"{self.done}/{self.total} done | {self.converted} converted, "
+            f"{self.skipped} skipped, {self.failed} failed | "
+            f"{rate:.2f} files/s, {mb_rate:.2f} MB/s | ETA {eta}"
+        )
+
+
+class BulkConverter:
+    """Converts a directory tree with bounded parallelism."""
+
+    def __init__(
+        self,
+        input_dir: Path,
+        output_dir: Path,
+        output_format: str,
+        jobs: int = 4,
+        quality: Optional[int] = None,
+        resize_width: Optional[int] = None,
+        resize_height: Optional[int] = None,
+        manifest_path: Optional[Path] = None,
+        speed: Optional[str] = None,
+        pipeline: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.jobs = jobs
+        self.options = conversion_options(
+            output_format, quality, resize_width, resize_height, speed, pipeline
+        )
+        self.manifest = Manifest(manifest_path or output_dir / MANIFEST_NAME)
+        self.stats = BulkStats()
+        # Output path -> relative source path that owns it
+        self._output_owners: Dict[Path, str] = {
+            Path(entry["output"]): source for source, entry in self.manifest.entries.items()
+        }
+
+    def find_sources(self) -> List[Path]:
+        """
+        Walk the input tree and return files with a supported extension.
+
+        The output directory is skipped when it lies inside the input
+        tree, so outputs are never converted again.
+        """
+        output_dir = self.output_dir.resolve()
+        sources = []
+        for root, dirs, files in os.walk(self.input_dir):
+            dirs[:] = sorted(d for d in dirs if (Path(root) / d).resolve() != output_dir)
+            for name in sorted(files):
+                path = Path(root) / name
+                try:
+                    validate_file_format(name)
+                except HTTPException:
+                    continue
+                sources.append(path)
+        return sources
+
+    def output_path_for(self, source: Path) -> Path:
+        """Mirror the source's location under the output directory."""
+        relative = source.relative_to(self.input_dir)
+        return (self.output_dir / relative).with_suffix(f".{self.output_format}")
+
+    def is_up_to_date(self, source: Path, stat: os.stat_result) -> bool:
+        """
+        Check the manifest for a current output of this source.
+
+        Files whose mtime and size are unchanged are trusted without hashing;
+        otherwise the content hash decides.
+        """
+        key = str(source.relative_to(self.input_dir))
+        entry = self.manifest.entries.get(key)
+        if not entry or entry.get("options") != self.options:
+            return False
+        if not Path(entry["output"]).exists():
+            return False
+        if entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            return True
+        if entry["size"] != stat.st_size:
+            return False
+
+        # Touched but possibly unchanged: compare content
+        if hash_file(source) == entry["hash"]:
+            self.manifest.record({**entry, "mtime": stat.st_mtime})
+            return True
+        return False
+
+    async def _claim_output(self, source: Path, output_path: Path) -> Optional[str]:
+        """
+        Reserve an output path for a source.
+
+        Returns:
+            The source that already owns the output path, or None if it is
+            now reserved for this one (a previous owner that no longer
+            exists gives it up)
+        """
+        key = str(source.relative_to(self.input_dir))
+        owner = self._output_owners.setdefault(output_path, key)
+        if owner == key:
+            return None
+        if await file_io.run((self.input_dir / owner).exists):
+            return owner
+        # The owner was deleted: take the name over, unless another source
+        # did while we were checking
+        current = self._output_owners[output_path]
+        if current == owner:
+            self._output_owners[output_path] = key
+            return None
+        return None if current == key else current
+
+    async def convert_one(self, source: Path) -> str:
+        """
+        Convert a single file, updating stats and the manifest.
+
+        Returns:
+            "converted", "skipped" or "failed"
+        """
+        output_path = self.output_path_for(source)
+        owner = await self._claim_output(source, output_path)
+        if owner is not None:
+            self.stats.failed += 1
+            self.stats.failures.append(
+                f"{source}: output {output_path.name} is already used by {owner}"
+            )
+            return "failed"
+
+        # Stats, hashing and manifest writes run in the file I/O pool so the
+        # watch-folder daemon does not block the server's event loop
+        stat = await file_io.run(source.stat)
+        if await file_io.run(self.is_up_to_date, source, stat):
+            self.stats.skipped += 1
+            return "skipped"
+
+        partial_path = output_path.with_name(output_path.name + ".part")
+        try:
+            validate_byte_count(stat.st_size)
+            input_format = validate_file_format(source.name)
+            if not self.options.get("pipeline") and (input_format == self.output_format or (
+                input_format in ['jpg', 'jpeg'] and self.output_format in ['jpg', 'jpeg']
+            )):
+                self.stats.skipped += 1
+                return "skipped"
+
+            await file_io.run(output_path.parent.mkdir, parents=True, exist_ok=True)
+            await cloudconvert_service.convert_image(
+                source,
+                self.output_format,
+                partial_path,
+                quality=self.options["quality"],
+                resize_width=self.options["resize_width"],
+                resize_height=self.options["resize_height"],
+                speed=self.options.get("speed"),
+                pipeline=self.options.get("pipeline")
+            )
+            # Only a complete output ever appears under its final name
+            await file_io.run(os.replace, partial_path, output_path)
+        except (ConversionError, HTTPException, OSError) as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            self.stats.failed += 1
+            self.stats.failures.append(f"{source}: {detail}")
+            await file_io.run(partial_path.unlink, missing_ok=True)
+            return "failed"
+
+        await file_io.run(self.manifest.record, {
+            "source": str(source.relative_to(self.input_dir)),
+            "output": str(output_path),
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "hash": await file_io.run(hash_file, source),
+            "options": self.options
+        })
+        self.stats.converted += 1
+        self.stats.bytes_in += stat.st_size
+        return "converted"
+
+    async def run(self, progress_interval: float = 1.0) -> BulkStats:
+        """Convert every source file and return the final stats."""
+        sources = await file_io.run(self.find_sources)
+        self.stats.total = len(sources)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for source in sources:
+            queue.put_nowait(source)
+
+        async def worker():
+            while True:
+                try:
+                    source = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self.convert_one(source)
+
+        async def report():
+            while True:
+                await asyncio.sleep(progress_interval)
+                print(f"\r{self.stats.summary()}", end="", flush=True)
+
+        reporter = asyncio.create_task(report())
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.jobs)))
+        finally:
+            reporter.cancel()
+            self.manifest.close()
+            print(f"\r{self.stats.summary()}")
+
+        return self.stats
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="Convert every image in a directory tree."
+    )
+    parser.add_argument("input_dir", type=Path, help="Directory to read images from")
+    parser.add_argument("output_dir", type=Path, help="Directory to write converted images to")
+    parser.add_argument("--format", "-f", required=True, dest="output_format",
+                        help="Output format (jpeg, png, webp, gif, avif)")
+    parser.add_argument("--jobs", "-j", type=int, default=4,
+                        help="Number of conversions to run in parallel (default: 4)")
+    parser.add_argument("--quality", "-q", type=int, help="Quality for JPEG/WebP/AVIF output (1-100)")
+    parser.add_argument("--speed", help="AVIF encoder speed preset "
+                        "(fastest, fast, balanced, small, smallest)")
+    parser.add_argument("--pipeline", help="JSON list of transform steps applied before "
+                        "conversion, e.g. '[{\"op\": \"auto_orient\"}, {\"op\": \"strip\"}]'")
+    parser.add_argument("--width", type=int, help="Resize width in pixels")
+    parser.add_argument("--height", type=int, help="Resize height in pixels")
+    parser.add_argument("--manifest", type=Path,
+                        help=f"Manifest path (default: OUTPUT_DIR/{MANIFEST_NAME})")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the bulk converter."""
+    args = parse_args(argv)
+
+    if not args.input_dir.is_dir():
+        print(f"Input directory not found: {args.input_dir}")
+        return 2
+    if args.jobs < 1:
+        print("--jobs must be at least 1")
+        return 2
+
+    try:
+        output_format = validate_output_format(args.output_format)
+        quality, speed = validate_format_options(output_format, args.quality, args.speed)
+        pipeline = validate_pipeline(args.pipeline)
+        width, height = validate_resize_dimensions(args.width, args.height)
+    except HTTPException as e:
+        print(e.detail)
+        return 2
+
+    converter = BulkConverter(
+        args.input_dir.resolve(),
+        args.output_dir.resolve(),
+        output_format,
+        jobs=args.jobs,
+        quality=quality,
+        resize_width=width,
+        resize_height=height,
+        manifest_path=args.manifest,
+        speed=speed,
+        pipeline=pipeline
+    )
+
+    # No web server receives job notifications here, so poll CloudConvert
+    cloudconvert_service.receives_webhooks = False
+    try:
+        stats = asyncio.run(converter.run())
+    except KeyboardInterrupt:
+        print("\nInterrupted. Run the same command again to resume.")
+        return 130
+
+    for failure in stats.failures:
+        print(f"❌ {failure}")
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
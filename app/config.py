@@ -26,13 +26,75 @@ class Settings(BaseSettings):
     
     # API Configuration
     cloudconvert_api_key: str = os.getenv("CLOUDCONVERT_API_KEY", "")
+    # Extra keys (comma-separated, one per account) to spread load across
+    cloudconvert_api_keys: str = os.getenv("CLOUDCONVERT_API_KEYS", "")
+    # Seconds a key rests after a 429 without Retry-After, or after a 402
+    # (out of credits), and how often remaining credits are checked (0 = never)
+    key_cooldown_seconds: float = float(os.getenv("KEY_COOLDOWN_SECONDS", "60"))
+    key_quota_cooldown_seconds: float = float(os.getenv("KEY_QUOTA_COOLDOWN_SECONDS", "3600"))
+    key_credits_refresh_seconds: float = float(os.getenv("KEY_CREDITS_REFRESH_SECONDS", "300"))
+    
+    # Create the CloudConvert job while the upload is still being received
+    # (needs the form fields to come before the file in the request body)
+    prefetch_jobs: bool = os.getenv("PREFETCH_JOBS", "true").lower() == "true"
+    # Upload tasks created ahead of time per API key (0 disables the pool),
+    # and how long an unused one is trusted to still be valid upstream
+    import_pool_size: int = int(os.getenv("IMPORT_POOL_SIZE", "0"))
+    import_pool_max_age_seconds: float = float(os.getenv("IMPORT_POOL_MAX_AGE_SECONDS", "600"))
     
     # File Upload Settings
     max_file_size_mb: int = int(os.getenv("MAX_FILE_SIZE_MB", "10"))
     max_file_size_bytes: int = max_file_size_mb * 1024 * 1024
     
-    # Supported formats
+    # ZIP archive uploads (each entry is still limited to max_file_size_mb)
+    zip_max_upload_mb: int = int(os.getenv("ZIP_MAX_UPLOAD_MB", "200"))
+    zip_max_upload_bytes: int = zip_max_upload_mb * 1024 * 1024
+    zip_max_entries: int = int(os.getenv("ZIP_MAX_ENTRIES", "1000"))
+    zip_concurrency: int = int(os.getenv("ZIP_CONCURRENCY", "4"))
+    
+    # Largest request body accepted (file plus multipart form overhead);
+    # only the archive endpoint accepts bodies up to the ZIP limit
+    max_request_bytes: int = max_file_size_bytes + 1024 * 1024
+    max_archive_request_bytes: int = zip_max_upload_bytes + 1024 * 1024
+    
+    # Process-wide cap on upload and download bytes being handled at once
+    max_in_flight_mb: int = int(os.getenv("MAX_IN_FLIGHT_MB", "256"))
+    max_in_flight_bytes: int = max_in_flight_mb * 1024 * 1024
+    byte_budget_wait_seconds: float = float(os.getenv("BYTE_BUDGET_WAIT_SECONDS", "10"))
+    byte_budget_retry_after: int = int(os.getenv("BYTE_BUDGET_RETRY_AFTER", "5"))
+    
+    # Supported formats (input and output; AVIF is output only)
     supported_formats: list = ["jpg", "jpeg", "png", "webp", "gif"]
+    output_formats: list = ["jpg", "jpeg", "png", "webp", "gif", "avif"]
+    # Formats that take a quality setting
+    lossy_formats: list = ["jpg", "jpeg", "webp", "avif"]
+    
+    # Per-format defaults used when a request sets no quality (0 leaves it
+    # to CloudConvert)
+    jpeg_default_quality: int = int(os.getenv("JPEG_DEFAULT_QUALITY", "0"))
+    webp_default_quality: int = int(os.getenv("WEBP_DEFAULT_QUALITY", "0"))
+    avif_default_quality: int = int(os.getenv("AVIF_DEFAULT_QUALITY", "0"))
+    
+    # AVIF encoder speed presets, mapped to encoder effort (0 = fastest
+    # encode, largest file; 9 = slowest encode, smallest file)
+    avif_speed_presets: dict = {
+        "fastest": 0,
+        "fast": 2,
+        "balanced": 4,
+        "small": 6,
+        "smallest": 9
+    }
+    avif_default_speed: str = os.getenv("AVIF_DEFAULT_SPEED", "balanced")
+    
+    # Transform pipeline (pipeline on /api/convert): steps allowed per
+    # request and the longest watermark text
+    pipeline_max_steps: int = int(os.getenv("PIPELINE_MAX_STEPS", "10"))
+    watermark_max_text_length: int = int(os.getenv("WATERMARK_MAX_TEXT_LENGTH", "200"))
+    
+    # Target file size mode (max_bytes on /api/convert)
+    target_size_tolerance: float = float(os.getenv("TARGET_SIZE_TOLERANCE", "0.1"))
+    target_size_max_attempts: int = int(os.getenv("TARGET_SIZE_MAX_ATTEMPTS", "8"))
+    target_size_min_quality: int = int(os.getenv("TARGET_SIZE_MIN_QUALITY", "10"))
     
     # Server Settings
     host: str = os.getenv("HOST", "0.0.0.0")
@@ -42,10 +104,91 @@ class Settings(BaseSettings):
     temp_dir: Path = BASE_DIR / "temp"
     static_dir: Path = BASE_DIR / "static"
     templates_dir: Path = BASE_DIR / "templates"
+    data_dir: Path = BASE_DIR / "data"
+    
+    # In-memory tier for small temp files (0 disables it). Files up to
+    # MEMORY_TIER_MAX_FILE_KB are kept in memory until the tier is full,
+    # after which the least recently used ones are moved to disk.
+    memory_tier_mb: int = int(os.getenv("MEMORY_TIER_MB", "64"))
+    memory_tier_max_file_kb: int = int(os.getenv("MEMORY_TIER_MAX_FILE_KB", "512"))
+    
+    # Image origin (/img/{source_id}): variant cache size (0 = unlimited)
+    # and how long browsers and CDNs may cache a variant
+    variant_cache_max_mb: int = int(os.getenv("VARIANT_CACHE_MAX_MB", "1024"))
+    variant_max_age_seconds: int = int(os.getenv("VARIANT_MAX_AGE_SECONDS", "31536000"))
+    
+    # Threads for blocking filesystem work (temp file reads and writes,
+    # deletes, cleanup scans), which is kept off the event loop
+    file_io_threads: int = int(os.getenv("FILE_IO_THREADS", "8"))
+    
+    # Event loop lag monitor (/api/loop). The loop is checked every
+    # interval; stalls longer than LOOP_SLOW_CALLBACK_MS are recorded with
+    # the stack that was blocking it. Lag percentiles cover the last
+    # LOOP_LAG_WINDOW_SECONDS.
+    loop_monitor_enabled: bool = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+    loop_monitor_interval_ms: float = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50"))
+    loop_slow_callback_ms: float = float(os.getenv("LOOP_SLOW_CALLBACK_MS", "100"))
+    loop_lag_window_seconds: float = float(os.getenv("LOOP_LAG_WINDOW_SECONDS", "300"))
+    loop_slow_callbacks_kept: int = int(os.getenv("LOOP_SLOW_CALLBACKS_KEPT", "50"))
+    
+    # Temp file cleanup
+    cleanup_interval_seconds: float = float(os.getenv("CLEANUP_INTERVAL_SECONDS", "3600"))
+    cleanup_max_age_hours: float = float(os.getenv("CLEANUP_MAX_AGE_HOURS", "2"))
+    
+    # Job journal (SQLite database of conversions, survives restarts)
+    journal_path: Path = BASE_DIR / "data" / "jobs.db"
+    resume_jobs_on_startup: bool = os.getenv("RESUME_JOBS_ON_STARTUP", "true").lower() == "true"
+    
+    # Worker mode: /api/convert adds conversions to a SQLite queue and
+    # separate worker processes (python run.py --worker) convert them. The
+    # API and the workers must share TEMP_DIR and QUEUE_PATH, and the
+    # memory tier is turned off so files are visible to every process.
+    job_queue_enabled: bool = os.getenv("JOB_QUEUE_ENABLED", "false").lower() == "true"
+    queue_path: Path = BASE_DIR / "data" / "queue.db"
+    worker_concurrency: int = int(os.getenv("WORKER_CONCURRENCY", "4"))
+    # Seconds a leased job stays reserved without a renewal (workers renew
+    # at a third of it), attempts per job and the first retry delay
+    queue_lease_seconds: float = float(os.getenv("QUEUE_LEASE_SECONDS", "60"))
+    queue_max_attempts: int = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+    queue_retry_delay_seconds: float = float(os.getenv("QUEUE_RETRY_DELAY_SECONDS", "5"))
+    # How often idle workers and waiting requests check the queue, and how
+    # long /api/convert waits for a result before answering 202
+    queue_poll_interval: float = float(os.getenv("QUEUE_POLL_INTERVAL", "0.5"))
+    queue_result_timeout: float = float(os.getenv("QUEUE_RESULT_TIMEOUT", "300"))
     
     # CloudConvert API Settings
     cloudconvert_api_url: str = "https://api.cloudconvert.com/v2"
-    cloudconvert_sync_api_url: str = "https://sync.api.cloudconvert.com/v2"
+    # Seconds to wait for a job to finish before giving up
+    cloudconvert_job_timeout: float = float(os.getenv("CLOUDCONVERT_JOB_TIMEOUT", "120"))
+    
+    # CloudConvert webhooks (job.finished / job.failed) replace status polling
+    # when a signing secret is set. The URL is sent with each job; leave it
+    # empty if the webhook is configured in the CloudConvert dashboard instead.
+    cloudconvert_webhook_secret: str = os.getenv("CLOUDCONVERT_WEBHOOK_SECRET", "")
+    cloudconvert_webhook_url: str = os.getenv("CLOUDCONVERT_WEBHOOK_URL", "")
+    webhook_fallback_poll_interval: int = int(os.getenv("WEBHOOK_FALLBACK_POLL_INTERVAL", "30"))
+    
+    # Request profiler (opt-in). Profiles of requests slower than the
+    # threshold, plus a random sample, are saved under data/profiles and
+    # served by /api/profiles to callers presenting PROFILER_TOKEN.
+    profiler_enabled: bool = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+    profiler_threshold_ms: float = float(os.getenv("PROFILER_THRESHOLD_MS", "2000"))
+    profiler_sample_rate: float = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+    profiler_interval_ms: float = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+    profiler_max_profiles: int = int(os.getenv("PROFILER_MAX_PROFILES", "100"))
+    profiler_token: str = os.getenv("PROFILER_TOKEN", "")
+    
+    # Watch-folder daemon (converts files dropped into WATCH_INPUT_DIR).
+    # When both directories are set, the web server also runs the watcher.
+    watch_input_dir: str = os.getenv("WATCH_INPUT_DIR", "")
+    watch_output_dir: str = os.getenv("WATCH_OUTPUT_DIR", "")
+    watch_output_format: str = os.getenv("WATCH_OUTPUT_FORMAT", "webp")
+    watch_concurrency: int = int(os.getenv("WATCH_CONCURRENCY", "4"))
+    watch_debounce_seconds: float = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "2"))
+    watch_poll_interval: float = float(os.getenv("WATCH_POLL_INTERVAL", "5"))
+    # Full stat sweep interval when polling, to catch files modified in
+    # place (0 = off; inotify never needs it)
+    watch_rescan_seconds: float = float(os.getenv("WATCH_RESCAN_SECONDS", "0"))
     
     class Config:
         env_file = ".env"
@@ -55,6 +198,7 @@ class Settings(BaseSettings):
         super().__init__(**kwargs)
         # Create temp directory if it doesn't exist
         self.temp_dir.mkdir(exist_ok=True)
+        self.data_dir.mkdir(exist_ok=True)
         
         # Warn if API key is not set
         if not self.cloudconvert_api_key or self.cloudconvert_api_key == "your_api_key_here":
@@ -12,7 +12,16 @@ import asyncio
 
 from app.config import settings
 from app.api.routes import router
+from app.middleware import UploadLimitMiddleware, ProfilingMiddleware, JobPrefetchMiddleware
 from app.services.file_handler import file_handler
+from app.services.converter import cloudconvert_service
+from app.services.job_journal import job_journal
+from app.services.job_queue import job_queue
+from app.services.key_pool import key_pool
+from app.services.import_pool import import_pool
+from app.services.loop_monitor import loop_monitor
+from app.services.file_io import file_io
+from app.watcher import watcher_from_settings
 
 
 @asynccontextmanager
@@ -25,28 +34,68 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Jim's File Converter...")
     print(f"📁 Temp directory: {settings.temp_dir}")
     print(f"📊 Max file size: {settings.max_file_size_mb}MB")
+    if settings.max_archive_request_bytes > settings.max_in_flight_bytes:
+        print(
+            f"⚠️ MAX_IN_FLIGHT_MB ({settings.max_in_flight_mb}) is below the ZIP upload "
+            f"limit; archives over it will be rejected"
+        )
     print(f"🔧 Supported formats: {', '.join(settings.supported_formats)}")
     
     # Start background task for cleanup
     cleanup_task = asyncio.create_task(periodic_cleanup())
     
+    # Measure event loop lag and record what blocks it
+    monitor_task = None
+    if settings.loop_monitor_enabled:
+        monitor_task = asyncio.create_task(loop_monitor.run())
+    
+    # Resume conversions left in flight by a previous run (in worker mode
+    # the queue hands interrupted jobs to another worker instead)
+    resume_task = None
+    if settings.resume_jobs_on_startup and not settings.job_queue_enabled:
+        resume_task = asyncio.create_task(cloudconvert_service.resume_unfinished_jobs())
+    
+    # Track remaining credits so new jobs favour the fullest account
+    credits_task = None
+    if len(key_pool.keys) > 1 and settings.key_credits_refresh_seconds > 0:
+        print(f"🔑 Balancing conversions across {len(key_pool.keys)} CloudConvert API keys")
+        credits_task = asyncio.create_task(key_pool.refresh_credits_periodically())
+    
+    # Keep pre-created upload tasks ready so uploads can start at once
+    pool_task = None
+    if import_pool.enabled and key_pool.configured and not settings.job_queue_enabled:
+        pool_task = asyncio.create_task(import_pool.run())
+    
+    # Run the watch-folder daemon alongside the server if configured
+    watch_task = None
+    if settings.watch_input_dir and settings.watch_output_dir:
+        watch_task = asyncio.create_task(watcher_from_settings().run())
+    
     yield
     
     # Shutdown
     print("🛑 Shutting down...")
-    cleanup_task.cancel()
-    try:
-        await cleanup_task
-    except asyncio.CancelledError:
-        pass
+    for task in (cleanup_task, monitor_task, resume_task, credits_task, pool_task, watch_task):
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    file_io.shutdown()
+    job_journal.close()
+    job_queue.close()
 
 
 async def periodic_cleanup():
     """Background task to clean up old temporary files."""
     while True:
         try:
-            await asyncio.sleep(3600)  # Run every hour
-            await file_handler.cleanup_old_files(max_age_hours=2)
+            await asyncio.sleep(settings.cleanup_interval_seconds)  # Hourly by default
+            await file_handler.cleanup_old_files(max_age_hours=settings.cleanup_max_age_hours)
+            if settings.job_queue_enabled:
+                await file_io.run(job_queue.prune, settings.cleanup_max_age_hours * 3600)
         except asyncio.CancelledError:
             break
         except Exception as e:
@@ -61,6 +110,19 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Start creating CloudConvert jobs while uploads are still arriving (not in
+# worker mode, where this process does not convert)
+if settings.prefetch_jobs and not settings.job_queue_enabled:
+    app.add_middleware(JobPrefetchMiddleware)
+
+# Reject oversized uploads before reading them and cap in-flight bytes
+# (added first so CORS headers are still applied to its rejections)
+app.add_middleware(UploadLimitMiddleware)
+
+# Opt-in sampling profiler for slow requests
+if settings.profiler_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,309 @@
+"""
+ASGI middleware for the application.
+"""
+
+from typing import Optional, Dict, Any
+import multipart
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.utils.validators import (
+    get_file_extension,
+    validate_file_format,
+    validate_output_format,
+    validate_format_options,
+    validate_pipeline,
+    validate_resize_dimensions
+)
+from app.services.converter import cloudconvert_service, conversion_options
+from app.services.byte_budget import byte_budget, BudgetExhausted
+from app.services.profiler import request_profiler
+from app.services.file_io import file_io
+
+# The only endpoint that accepts bodies up to the ZIP upload limit
+ARCHIVE_PATH = "/api/convert/archive"
+
+
+class UploadLimitMiddleware:
+    """
+    Limits request bodies before they are read.
+
+    Requests whose Content-Length is over the limit are rejected straight
+    away, without receiving the body. Every request body reserves its size
+    from the process-wide byte budget until it has been received; when the
+    budget is exhausted, requests wait briefly and then get a 503.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        if scope.get("path") == ARCHIVE_PATH:
+            limit = settings.max_archive_request_bytes
+        else:
+            limit = settings.max_request_bytes
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError:
+                await self._reject(scope, receive, send, 400, "Invalid Content-Length header")
+                return
+            if declared > limit:
+                await self._reject(
+                    scope, receive, send, 413,
+                    f"Request too large. Maximum request size is {limit // (1024 * 1024)}MB"
+                )
+                return
+            reserved = declared
+        else:
+            # Chunked upload of unknown size: assume the worst case, but
+            # never more than the whole budget (larger bodies get a 413)
+            reserved = min(limit, byte_budget.capacity)
+
+        try:
+            await byte_budget.acquire(reserved, timeout=settings.byte_budget_wait_seconds)
+        except BudgetExhausted as e:
+            await self._reject(
+                scope, receive, send, 503, str(e),
+                headers={"Retry-After": str(settings.byte_budget_retry_after)}
+            )
+            return
+
+        received = 0
+        released = False
+
+        async def release():
+            nonlocal released
+            if not released:
+                released = True
+                await byte_budget.release(reserved)
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > reserved:
+                    # Body is larger than declared (or than the limit)
+                    await release()
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Request too large. Maximum request size is {reserved // (1024 * 1024)}MB"
+                    )
+                if not message.get("more_body", False):
+                    # Upload finished; the conversion reserves its own bytes
+                    await release()
+            elif message["type"] == "http.disconnect":
+                await release()
+            return message
+
+        try:
+            await self.app(scope, limited_receive, send)
+        finally:
+            await release()
+
+    @staticmethod
+    async def _reject(scope, receive, send, status_code: int, detail: str, headers=None):
+        response = JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+        await response(scope, receive, send)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles API requests with the sampling profiler.
+
+    Only requests under /api/ are profiled, apart from the profile
+    endpoints themselves.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith("/api/")
+            or path.startswith("/api/profiles")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = request_profiler.start(scope["method"], path)
+        status_code = None
+
+        async def recording_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            await file_io.run(request_profiler.stop, profile, status_code)
+
+
+class _LeadingFormFields:
+    """
+    Incremental parser for the plain fields at the start of a multipart body.
+
+    Stops at the first file part, so the file itself is never parsed twice.
+    """
+
+    # Longest field value kept; conversion options are short
+    MAX_FIELD_BYTES = 256
+
+    def __init__(self, boundary: bytes):
+        self.fields: Dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.done = False
+        self._header_field = b""
+        self._header_value = b""
+        self._name: Optional[str] = None
+        self._value = b""
+        self._parser = multipart.MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_end": self._on_end
+        })
+
+    def feed(self, chunk: bytes) -> None:
+        if self.done or not chunk:
+            return
+        try:
+            self._parser.write(chunk)
+        except Exception:
+            # Malformed bodies are left for the form parser to reject
+            self.done = True
+
+    def _on_part_begin(self) -> None:
+        self._name = None
+        self._value = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition" and not self.done:
+            _, options = parse_options_header(self._header_value)
+            self._name = options.get(b"name", b"").decode("latin-1")
+            if b"filename" in options:
+                # First file part: every field before it is known now
+                self.filename = options[b"filename"].decode("latin-1")
+                self.done = True
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self.done:
+            return
+        self._value += data[start:end]
+        if len(self._value) > self.MAX_FIELD_BYTES:
+            self.done = True
+
+    def _on_part_end(self) -> None:
+        if not self.done and self._name:
+            self.fields[self._name] = self._value.decode("utf-8", errors="replace")
+
+    def _on_end(self) -> None:
+        self.done = True
+
+
+def _prefetch_options(fields: Dict[str, str], filename: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Conversion options for a job that can be created before the file arrives.
+
+    Returns None for anything the route handles differently (ZIP archives,
+    target sizes) or would reject, so no job is created for it.
+    """
+    if "output_format" not in fields or "max_bytes" in fields:
+        return None
+    if not filename or get_file_extension(filename) == "zip":
+        return None
+    try:
+        output_format = validate_output_format(fields["output_format"])
+        quality = fields.get("quality")
+        quality, speed = validate_format_options(
+            output_format,
+            int(quality) if quality else None,
+            fields.get("speed") or None
+        )
+        pipeline = validate_pipeline(fields.get("pipeline"))
+        width = int(fields["resize_width"]) if fields.get("resize_width") else None
+        height = int(fields["resize_height"]) if fields.get("resize_height") else None
+        width, height = validate_resize_dimensions(width, height)
+        input_format = validate_file_format(filename)
+    except (HTTPException, ValueError):
+        return None
+    if input_format == output_format and not pipeline:
+        return None
+    return conversion_options(output_format, quality, width, height, speed, pipeline)
+
+
+class JobPrefetchMiddleware:
+    """
+    Starts creating the CloudConvert job while a conversion upload is
+    still being received.
+
+    The form fields before the file are parsed as the body streams in. As
+    soon as the file part starts, a job is prepared with those options and
+    left in request.state.prepared_job for /api/convert to claim. Jobs that
+    are not claimed (invalid request, reused result, client gone) are
+    discarded when the request ends.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope.get("path") != "/api/convert"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        content_type, params = parse_options_header(dict(scope["headers"]).get(b"content-type", b""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            await self.app(scope, receive, send)
+            return
+
+        fields = _LeadingFormFields(params[b"boundary"])
+        state = scope.setdefault("state", {})
+
+        async def sniffing_receive():
+            message = await receive()
+            if message["type"] == "http.request" and not fields.done:
+                fields.feed(message.get("body", b""))
+                if fields.done:
+                    options = _prefetch_options(fields.fields, fields.filename)
+                    if options is not None:
+                        try:
+                            state["prepared_job"] = cloudconvert_service.prepare_job(**options)
+                        except Exception as e:
+                            print(f"Could not prepare conversion job early: {e}")
+            return message
+
+        try:
+            await self.app(scope, sniffing_receive, send)
+        finally:
+            prepared = state.get("prepared_job")
+            if prepared is not None and not prepared.claimed:
+                await cloudconvert_service.discard_prepared(prepared)
@@ -0,0 +1,287 @@
+"""
+ZIP archive conversion service.
+Converts every image in an uploaded ZIP and streams the results back as a
+ZIP that is written while conversions finish.
+"""
+
+import json
+import uuid
+import asyncio
+import zipfile
+import posixpath
+from pathlib import Path
+from typing import Optional, Dict, Any, List, AsyncIterator, BinaryIO
+from fastapi import HTTPException
+from app.config import settings
+from app.utils.validators import get_file_extension
+from app.services.file_handler import file_handler
+from app.services.file_io import file_io
+from app.services.converter import cloudconvert_service, ConversionError
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipSink:
+    """
+    Write-only, unseekable file object for zipfile.
+
+    zipfile falls back to streaming mode (data descriptors after each entry)
+    when it cannot seek, so the archive can be handed to the client in
+    pieces as it is written.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        """Return and forget everything written so far."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ArchiveConverter:
+    """Converts the images inside a ZIP archive."""
+
+    def open_archive(self, archive_file: BinaryIO) -> zipfile.ZipFile:
+        """
+        Open and sanity-check an uploaded ZIP archive.
+
+        Args:
+            archive_file: The uploaded archive (seekable file object)
+
+        Returns:
+            The opened archive
+
+        Raises:
+            HTTPException: If the archive is invalid or has too many entries
+        """
+        try:
+            archive = zipfile.ZipFile(archive_file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="File is not a valid ZIP archive")
+
+        if len(archive.infolist()) > settings.zip_max_entries:
+            archive.close()
+            raise HTTPException(
+                status_code=400,
+                detail=f"ZIP archive has too many entries. Maximum is {settings.zip_max_entries}"
+            )
+        return archive
+
+    @staticmethod
+    def _output_name(entry_name: str, output_format: str) -> str:
+        if output_format == 'jpg':
+            output_format = 'jpeg'
+        stem, _ = posixpath.splitext(entry_name)
+        return f"{stem}.{output_format}"
+
+    def _plan(self, archive: zipfile.ZipFile, output_format: str, edited: bool = False) -> tuple:
+        """
+        Split entries into ones to convert and skipped ones with a reason.
+
+        Entries already in the output format are only skipped when there
+        are no pipeline steps (edited=False). An entry whose output name is
+        already taken by an earlier entry (a.png and a.jpg) is failed.
+        """
+        convertible: List[zipfile.ZipInfo] = []
+        skipped: List[Dict[str, Any]] = []
+        output_owners: Dict[str, str] = {}
+
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+
+            name = info.filename
+            normalized = posixpath.normpath(name)
+            extension = get_file_extension(name)
+
+            reason = None
+            if name.startswith('/') or normalized.startswith('..'):
+                reason = "Unsafe path"
+            elif posixpath.basename(name).startswith('.') or '__MACOSX' in name.split('/'):
+                reason = "Hidden or metadata file"
+            elif extension not in settings.supported_formats:
+                reason = f"Unsupported format: .{extension}"
+            elif info.file_size > settings.max_file_size_bytes:
+                reason = f"File too large. Maximum size is {settings.max_file_size_mb}MB"
+            elif not edited and (extension == output_format or (
+                extension in ['jpg', 'jpeg'] and output_format in ['jpg', 'jpeg']
+            )):
+                reason = f"Already in {output_format} format"
+
+            if reason:
+                skipped.append({"entry": name, "status": "skipped", "reason": reason})
+                continue
+
+            output_name = self._output_name(name, output_format)
+            if output_name in output_owners:
+                skipped.append({
+                    "entry": name,
+                    "status": "failed",
+                    "reason": f"Output {output_name} is already used by {output_owners[output_name]}"
+                })
+            else:
+                output_owners[output_name] = name
+                convertible.append(info)
+
+        return convertible, skipped
+
+    def _extract(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Path:
+        """
+        Copy one entry to a temp file, enforcing the declared size.
+
+        Blocking; runs in the file I/O pool (zipfile serialises reads of
+        the shared upload, so entries can be extracted concurrently).
+        """
+        entry_path = file_handler.get_temp_path(
+            f"{uuid.uuid4()}.{get_file_extension(info.filename)}"
+        )
+        written = 0
+        try:
+            with archive.open(info) as source, file_handler.open_file(entry_path, 'wb') as dest:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > settings.max_file_size_bytes:
+                        raise ConversionError("Entry is larger than its declared size")
+                    dest.write(chunk)
+        except Exception:
+            file_handler.storage.delete(entry_path)
+            raise
+        return entry_path
+
+    @staticmethod
+    def _copy_chunk(source: BinaryIO, dest: BinaryIO) -> bool:
+        """Copy (and compress) the next chunk; False once the source is done."""
+        chunk = source.read(CHUNK_SIZE)
+        dest.write(chunk)
+        return bool(chunk)
+
+    async def stream_conversions(
+        self,
+        archive: zipfile.ZipFile,
+        output_format: str,
+        quality: Optional[int] = None,
+        resize_width: Optional[int] = None,
+        resize_height: Optional[int] = None,
+        speed: Optional[str] = None,
+        pipeline: Optional[List[Dict[str, Any]]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Convert entries with bounded parallelism and stream the output ZIP.
+
+        Converted entries are added in the order they finish. A report.json
+        entry listing every entry's outcome is written last.
+
+        Yields:
+            Consecutive chunks of the output ZIP
+        """
+        convertible, report = self._plan(archive, output_format, bool(pipeline))
+        concurrency = max(1, settings.zip_concurrency)
+        # Bounded queues keep at most a few extracted/converted files around
+        pending: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        finished: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+        async def feed():
+            for info in convertible:
+                await pending.put(info)
+            for _ in range(concurrency):
+                await pending.put(None)
+
+        async def convert():
+            while True:
+                info = await pending.get()
+                if info is None:
+                    return
+                entry_path = None
+                output_path = file_handler.get_temp_path(f"{uuid.uuid4()}.{output_format}")
+                try:
+                    entry_path = await file_io.run(self._extract, archive, info)
+                    await cloudconvert_service.convert_image(
+                        entry_path,
+                        output_format,
+                        output_path,
+                        quality=quality,
+                        resize_width=resize_width,
+                        resize_height=resize_height,
+                        speed=speed,
+                        pipeline=pipeline
+                    )
+                except Exception as e:
+                    # Any failure (encrypted or corrupt entry, unsupported
+                    # compression, conversion error) is reported, never
+                    # dropped: the response waits for one result per entry
+                    await file_handler.delete_file(output_path)
+                    await finished.put((info, None, str(e) or type(e).__name__))
+                else:
+                    await finished.put((info, output_path, None))
+                finally:
+                    if entry_path:
+                        await file_handler.delete_file(entry_path)
+
+        tasks = [asyncio.create_task(feed())]
+        tasks += [asyncio.create_task(convert()) for _ in range(concurrency)]
+
+        sink = _ZipSink()
+        output = zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        try:
+            for _ in range(len(convertible)):
+                info, output_path, error = await finished.get()
+                if error:
+                    report.append({"entry": info.filename, "status": "failed", "reason": error})
+                    continue
+
+                output_name = self._output_name(info.filename, output_format)
+                try:
+                    source = await file_io.run(file_handler.open_file, output_path)
+                    try:
+                        with output.open(output_name, 'w') as dest:
+                            while await file_io.run(self._copy_chunk, source, dest):
+                                data = sink.drain()
+                                if data:
+                                    yield data
+                    finally:
+                        source.close()
+                    report.append({
+                        "entry": info.filename,
+                        "status": "converted",
+                        "output": output_name,
+                        "input_size": info.file_size,
+                        "output_size": await file_handler.file_size(output_path)
+                    })
+                finally:
+                    await file_handler.delete_file(output_path)
+                yield sink.drain()
+
+            output.writestr("report.json", json.dumps({
+                "converted": sum(1 for r in report if r["status"] == "converted"),
+                "skipped": sum(1 for r in report if r["status"] == "skipped"),
+                "failed": sum(1 for r in report if r["status"] == "failed"),
+                "entries": report
+            }, indent=2))
+            output.close()
+            yield sink.drain()
+        finally:
+            # Client went away or something failed: stop outstanding work
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            while not finished.empty():
+                _, output_path, _ = finished.get_nowait()
+                if output_path:
+                    await file_handler.delete_file(output_path)
+            archive.close()
+
+
+# Create singleton instance
+archive_converter = ArchiveConverter()
@@ -0,0 +1,81 @@
+"""
+Process-wide budget of in-flight bytes.
+Caps the total size of uploads and downloads being handled at once, so
+memory and disk use stay bounded however many requests arrive.
+"""
+
+import asyncio
+from typing import Optional
+from app.config import settings
+
+
+class BudgetExhausted(Exception):
+    """Raised when bytes cannot be reserved before the timeout."""
+    pass
+
+
+class ByteBudget:
+    """Counting semaphore measured in bytes."""
+
+    def __init__(self, capacity: Optional[int] = None):
+        self._capacity = capacity
+        self._in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def capacity(self) -> int:
+        """Total bytes that may be in flight (resolved lazily from settings)."""
+        return self._capacity or settings.max_in_flight_bytes
+
+    @property
+    def in_flight(self) -> int:
+        """Bytes currently reserved."""
+        return self._in_flight
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self, size: int, timeout: Optional[float] = None) -> None:
+        """
+        Reserve bytes, waiting for other transfers to finish if necessary.
+
+        Args:
+            size: Number of bytes to reserve
+            timeout: Seconds to wait before giving up (None waits forever)
+
+        Raises:
+            BudgetExhausted: If the bytes could not be reserved in time, or
+                the request is larger than the whole budget
+        """
+        if size <= 0:
+            return
+        if size > self.capacity:
+            raise BudgetExhausted(
+                f"Transfer of {size} bytes exceeds the in-flight budget of {self.capacity} bytes"
+            )
+
+        condition = self._get_condition()
+        async with condition:
+            try:
+                await asyncio.wait_for(
+                    condition.wait_for(lambda: self._in_flight + size <= self.capacity),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                raise BudgetExhausted("Server is busy handling other transfers")
+            self._in_flight += size
+
+    async def release(self, size: int) -> None:
+        """Return previously reserved bytes to the budget."""
+        if size <= 0:
+            return
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight = max(0, self._in_flight - size)
+            condition.notify_all()
+
+
+# Create singleton instance
+byte_budget = ByteBudget()
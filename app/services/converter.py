@@ -3,12 +3,36 @@ CloudConvert API integration service.
 Handles image format conversion using the CloudConvert API.
 """
 
+import math
+import uuid
 import httpx
 import asyncio
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable, AsyncIterator
 from fastapi import HTTPException
 from app.config import settings
+from app.services.http_client import async_client
+from app.utils.image_info import read_image_dimensions
+from app.services.file_handler import file_handler
+from app.services.file_io import file_io
+from app.services.byte_budget import byte_budget, BudgetExhausted
+from app.services.job_events import job_events
+from app.services.key_pool import key_pool, ApiKey
+from app.services.import_pool import import_pool
+from app.services.job_journal import (
+    job_journal,
+    STAGE_CREATED,
+    STAGE_UPLOADED,
+    STAGE_FINISHED,
+    STAGE_FAILED
+)
+
+
+# Downloaded bytes are batched into writes of about this size
+DOWNLOAD_WRITE_SIZE = 256 * 1024
+
+# Uploads are read from temp storage in chunks of this size
+UPLOAD_CHUNK_SIZE = 256 * 1024
 
 
 class ConversionError(Exception):
@@ -16,16 +40,130 @@ class ConversionError(Exception):
     pass
 
 
+class KeyRefused(ConversionError):
+    """Raised when a key is rate limited or out of credits."""
+    pass
+
+
+class PreparedJob:
+    """
+    A CloudConvert job created ahead of its upload.
+    
+    The job is created in the background as soon as the conversion options
+    are known. If a pooled upload task was available, the file can be
+    uploaded to it while the job is still being created.
+    """
+    
+    def __init__(
+        self,
+        api_key: ApiKey,
+        options: Dict[str, Any],
+        creation: "asyncio.Task",
+        import_task: Optional[Dict[str, Any]] = None
+    ):
+        self.api_key = api_key
+        self.options = options
+        self.creation = creation
+        self.import_task = import_task
+        self.claimed = False
+    
+    def claim(self, options: Dict[str, Any]) -> bool:
+        """
+        Take the job for a conversion if it was made with the same options.
+        
+        Returns:
+            Whether the job can be used (unclaimed jobs must be discarded)
+        """
+        if self.claimed or self.options != options:
+            return False
+        self.claimed = True
+        return True
+
+
+# MIME type of each output format
+OUTPUT_CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif",
+    "avif": "image/avif"
+}
+
+
+# Watermark positions as CloudConvert (vertical, horizontal) anchors
+WATERMARK_ANCHORS = {
+    "top-left": ("top", "left"),
+    "top": ("top", "center"),
+    "top-right": ("top", "right"),
+    "left": ("center", "left"),
+    "center": ("center", "center"),
+    "right": ("center", "right"),
+    "bottom-left": ("bottom", "left"),
+    "bottom": ("bottom", "center"),
+    "bottom-right": ("bottom", "right")
+}
+
+
+class ConvertedStream:
+    """Converted output being passed through from CloudConvert."""
+    
+    def __init__(self, response: httpx.Response, client: httpx.AsyncClient, output_format: str):
+        self._response = response
+        self._client = client
+        self.media_type = OUTPUT_CONTENT_TYPES.get(output_format, "application/octet-stream")
+        length = response.headers.get("content-length")
+        self.size: Optional[int] = int(length) if length and length.isdigit() else None
+    
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """Yield the output as it arrives, closing the stream at the end."""
+        try:
+            async for chunk in self._response.aiter_bytes():
+                yield chunk
+        finally:
+            await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close the download and its client (safe to call more than once)."""
+        await self._response.aclose()
+        await self._client.aclose()
+
+
+def conversion_options(
+    output_format: str,
+    quality: Optional[int] = None,
+    resize_width: Optional[int] = None,
+    resize_height: Optional[int] = None,
+    speed: Optional[str] = None,
+    pipeline: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Options identifying a conversion, as matched by prepared jobs and the
+    job journal. Speed and pipeline are only included when set, so entries
+    journaled before they existed still match.
+    """
+    options: Dict[str, Any] = {
+        "output_format": output_format,
+        "quality": quality,
+        "resize_width": resize_width,
+        "resize_height": resize_height
+    }
+    if speed is not None:
+        options["speed"] = speed
+    if pipeline:
+        options["pipeline"] = pipeline
+    return options
+
+
 class CloudConvertService:
     """Service for interacting with CloudConvert API."""
     
     def __init__(self):
-        self.api_key = settings.cloudconvert_api_key
         self.api_url = settings.cloudconvert_api_url
-        self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        # Background deletions of jobs abandoned by cancelled conversions
+        self._abandoned: set = set()
+        # Webhooks are delivered to the web server; worker processes poll
+        self.receives_webhooks = True
     
     async def convert_image(
         self,
@@ -34,18 +172,27 @@ class CloudConvertService:
         output_file_path: Path,
         quality: Optional[int] = None,
         resize_width: Optional[int] = None,
-        resize_height: Optional[int] = None
+        resize_height: Optional[int] = None,
+        journal_id: Optional[str] = None,
+        prepared: Optional[PreparedJob] = None,
+        speed: Optional[str] = None,
+        pipeline: Optional[List[Dict[str, Any]]] = None
     ) -> Path:
         """
         Convert an image file to a different format.
         
         Args:
             input_file_path: Path to input file
-            output_format: Desired output format (jpeg, png, webp, gif)
+            output_format: Desired output format (jpeg, png, webp, gif, avif)
             output_file_path: Path where converted file should be saved
             quality: Optional quality for lossy formats (1-100)
             resize_width: Optional target width in pixels
             resize_height: Optional target height in pixels
+            journal_id: Optional job journal entry to record progress in
+            prepared: Optional job already created for these options
+                (see prepare_job)
+            speed: Optional AVIF encoder speed preset
+            pipeline: Optional validated transform steps to apply first
             
         Returns:
             Path to the converted file
@@ -53,51 +200,545 @@ class CloudConvertService:
         Raises:
             ConversionError: If conversion fails
         """
-        if not self.api_key or self.api_key == "your_api_key_here":
+        if not key_pool.configured:
+            raise ConversionError(
+                "CloudConvert API key not configured. "
+                "Please set CLOUDCONVERT_API_KEY in your .env file."
+            )
+        
+        options = conversion_options(
+            output_format, quality, resize_width, resize_height, speed, pipeline
+        )
+        
+        async with async_client(120.0) as client:
+            async def deliver(export_task: Dict[str, Any]) -> Path:
+                await self._download_file(client, export_task, output_file_path)
+                await self._journal(journal_id, stage=STAGE_FINISHED, output_path=output_file_path)
+                return output_file_path
+            
+            return await self._convert(
+                client, input_file_path, options, deliver, journal_id, prepared
+            )
+    
+    async def convert_to_stream(
+        self,
+        input_file_path: Path,
+        output_format: str,
+        quality: Optional[int] = None,
+        resize_width: Optional[int] = None,
+        resize_height: Optional[int] = None,
+        prepared: Optional[PreparedJob] = None,
+        speed: Optional[str] = None,
+        pipeline: Optional[List[Dict[str, Any]]] = None
+    ) -> "ConvertedStream":
+        """
+        Convert an image and open its output for streaming.
+        
+        Nothing is written to temp storage or the journal: the output is
+        passed straight through from CloudConvert as it is read.
+        
+        Args:
+            input_file_path: Path to input file
+            output_format: Desired output format
+            quality: Optional quality for lossy formats (1-100)
+            resize_width: Optional target width in pixels
+            resize_height: Optional target height in pixels
+            prepared: Optional job already created for these options
+            speed: Optional AVIF encoder speed preset
+            pipeline: Optional validated transform steps to apply first
+            
+        Returns:
+            The open output; iterate it or close it
+            
+        Raises:
+            ConversionError: If conversion fails
+        """
+        if not key_pool.configured:
             raise ConversionError(
                 "CloudConvert API key not configured. "
                 "Please set CLOUDCONVERT_API_KEY in your .env file."
             )
         
+        options = conversion_options(
+            output_format, quality, resize_width, resize_height, speed, pipeline
+        )
+        # The client outlives this call; the stream closes it
+        client = async_client(120.0)
+        
+        async def deliver(export_task: Dict[str, Any]) -> ConvertedStream:
+            file_info = export_task["result"]["files"][0]
+            response = await client.send(client.build_request("GET", file_info["url"]), stream=True)
+            if response.status_code != 200:
+                await response.aread()
+                await response.aclose()
+                raise ConversionError(f"Failed to download converted file: {response.text}")
+            return ConvertedStream(response, client, output_format)
+        
+        try:
+            return await self._convert(client, input_file_path, options, deliver, prepared=prepared)
+        except BaseException:
+            await client.aclose()
+            raise
+    
+    async def _convert(
+        self,
+        client: httpx.AsyncClient,
+        input_file_path: Path,
+        options: Dict[str, Any],
+        deliver: Callable[[Dict[str, Any]], Awaitable[Any]],
+        journal_id: Optional[str] = None,
+        prepared: Optional[PreparedJob] = None
+    ) -> Any:
+        """
+        Run a conversion job and hand its finished export task to deliver.
+        
+        Returns:
+            Whatever deliver returns
+            
+        Raises:
+            ConversionError: If conversion fails
+        """
+        api_key = None
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                # Step 1: Create a job
-                job_response = await self._create_job(
+            # Steps 1 and 2: create a job on the least busy key that
+            # accepts it, and upload the file
+            refused = []
+            while True:
+                if prepared is None:
+                    prepared = self.prepare_job(**options, exclude=refused)
+                api_key = prepared.api_key
+                try:
+                    job_response = await self._create_and_upload(
+                        client, prepared, input_file_path, journal_id
+                    )
+                    break
+                except KeyRefused:
+                    key_pool.release(api_key, refused=True)
+                    refused.append(api_key)
+                    api_key = None
+                    prepared = None
+            job_id = job_response["data"]["id"]
+            
+            # Step 3: Wait for conversion to complete
+            completed_job = await self._wait_for_job(client, api_key, job_id)
+            
+            # Step 4: Fetch the converted file
+            export_task = self._find_task(completed_job, "export/url")
+            result = await deliver(export_task)
+            
+            key_pool.release(api_key)
+            return result
+            
+        except asyncio.CancelledError:
+            # Usually the client went away: stop the job upstream so it
+            # does not keep using credits and a concurrency slot
+            await self._journal(journal_id, stage=STAGE_FAILED, error="Cancelled")
+            if api_key is not None:
+                key_pool.release(api_key, failed=True)
+                self._abandon(prepared)
+            raise
+        except httpx.HTTPError as e:
+            await self._journal(journal_id, stage=STAGE_FAILED, error=str(e))
+            if api_key is not None:
+                key_pool.release(api_key, failed=True)
+            raise ConversionError(f"Network error during conversion: {str(e)}")
+        except Exception as e:
+            await self._journal(journal_id, stage=STAGE_FAILED, error=str(e))
+            if api_key is not None:
+                key_pool.release(api_key, failed=True)
+            raise ConversionError(f"Conversion failed: {str(e)}")
+    
+    def prepare_job(
+        self,
+        output_format: str,
+        quality: Optional[int] = None,
+        resize_width: Optional[int] = None,
+        resize_height: Optional[int] = None,
+        speed: Optional[str] = None,
+        pipeline: Optional[List[Dict[str, Any]]] = None,
+        exclude: Optional[list] = None
+    ) -> PreparedJob:
+        """
+        Start creating a job before the file to convert is available.
+        
+        Picks an API key and starts creating the job in the background.
+        Pass the result to convert_image, or to discard_prepared if it
+        ends up unused.
+        
+        Args:
+            output_format: Desired output format
+            quality: Optional quality for lossy formats (1-100)
+            resize_width: Optional target width in pixels
+            resize_height: Optional target height in pixels
+            speed: Optional AVIF encoder speed preset
+            pipeline: Optional validated transform steps to apply first
+            exclude: API keys not to use
+            
+        Returns:
+            The job being prepared
+            
+        Raises:
+            NoKeyAvailable: If every API key is cooling down
+        """
+        options = conversion_options(
+            output_format, quality, resize_width, resize_height, speed, pipeline
+        )
+        api_key = key_pool.acquire(exclude=exclude)
+        import_task = import_pool.take(api_key) if import_pool.enabled else None
+        
+        async def create() -> Dict[str, Any]:
+            async with async_client(120.0) as client:
+                return await self._create_job(
                     client,
+                    api_key,
                     output_format,
                     quality=quality,
                     resize_width=resize_width,
-                    resize_height=resize_height
+                    resize_height=resize_height,
+                    speed=speed,
+                    pipeline=pipeline,
+                    import_task_id=import_task["id"] if import_task else None
                 )
+        
+        return PreparedJob(api_key, options, asyncio.create_task(create()), import_task)
+    
+    async def discard_prepared(self, prepared: PreparedJob) -> None:
+        """Cancel or delete a prepared job that was not used."""
+        key_pool.release(prepared.api_key, refused=True)
+        await self._delete_prepared_job(prepared)
+    
+    async def _delete_prepared_job(self, prepared: PreparedJob) -> None:
+        """Stop a job's creation, or delete the job if it was created."""
+        if not prepared.creation.done():
+            prepared.creation.cancel()
+        try:
+            job_response = await prepared.creation
+        except (asyncio.CancelledError, Exception):
+            return
+        
+        # CloudConvert cancels a job's running tasks when it is deleted
+        try:
+            async with async_client(30.0) as client:
+                await client.delete(
+                    f"{self.api_url}/jobs/{job_response['data']['id']}",
+                    headers=prepared.api_key.headers
+                )
+        except httpx.HTTPError as e:
+            print(f"Error deleting job: {e}")
+    
+    def _abandon(self, prepared: Optional[PreparedJob]) -> None:
+        """Delete the job of a cancelled conversion in the background."""
+        if prepared is None:
+            return
+        task = asyncio.create_task(self._delete_prepared_job(prepared))
+        self._abandoned.add(task)
+        task.add_done_callback(self._abandoned.discard)
+    
+    async def _create_and_upload(
+        self,
+        client: httpx.AsyncClient,
+        prepared: PreparedJob,
+        input_file_path: Path,
+        journal_id: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Finish creating a prepared job and upload the file to it.
+        
+        With a pooled upload task, the upload runs while the job is still
+        being created.
+        
+        Returns:
+            The created job
+        """
+        if prepared.import_task is not None:
+            upload = asyncio.create_task(
+                self._upload_file(client, prepared.import_task, input_file_path)
+            )
+            try:
+                job_response = await prepared.creation
+                await self._record_created(journal_id, prepared, job_response)
+            except BaseException:
+                upload.cancel()
+                raise
+            await upload
+        else:
+            job_response = await prepared.creation
+            await self._record_created(journal_id, prepared, job_response)
+            upload_task = self._find_task(job_response, "import/upload")
+            await self._upload_file(client, upload_task, input_file_path)
+        
+        await self._journal(journal_id, stage=STAGE_UPLOADED)
+        return job_response
+    
+    async def _record_created(
+        self,
+        journal_id: Optional[str],
+        prepared: PreparedJob,
+        job_response: Dict[str, Any]
+    ) -> None:
+        await self._journal(
+            journal_id,
+            stage=STAGE_CREATED,
+            cloudconvert_job_id=job_response["data"]["id"],
+            api_key_id=prepared.api_key.id
+        )
+    
+    async def convert_to_size(
+        self,
+        input_file_path: Path,
+        output_format: str,
+        output_file_path: Path,
+        max_bytes: int,
+        resize_width: Optional[int] = None,
+        resize_height: Optional[int] = None,
+        allow_downscale: bool = True,
+        pipeline: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Convert an image to the highest quality that fits a byte budget.
+        
+        For JPEG, WebP and AVIF, tries full quality first and returns it if
+        it fits; otherwise bisects the quality range below it, stopping
+        early once a result is within the configured tolerance below the
+        budget. If even the lowest quality is too large (or the format has
+        no quality setting) and downscaling is allowed, the width is reduced
+        in proportion to how far over budget the result is.
+        
+        Args:
+            input_file_path: Path to input file
+            output_format: Desired output format
+            output_file_path: Path where the chosen result should be saved
+            max_bytes: Maximum size of the output in bytes
+            resize_width: Optional starting width in pixels
+            resize_height: Optional starting height in pixels
+            allow_downscale: Whether the image may be made smaller to fit
+            pipeline: Optional validated transform steps to apply first
+            
+        Returns:
+            The achieved size, quality, dimensions, attempts and whether
+            the target was met
+            
+        Raises:
+            ConversionError: If conversion fails
+        """
+        lossy = output_format in settings.lossy_formats
+        tolerance = settings.target_size_tolerance
+        max_attempts = settings.target_size_max_attempts
+        probes: Dict[Path, Dict[str, Any]] = {}
+        
+        async def probe(quality: Optional[int], width: Optional[int], height: Optional[int]) -> Dict[str, Any]:
+            probe_path = output_file_path.with_name(f"probe_{uuid.uuid4()}{output_file_path.suffix}")
+            await self.convert_image(
+                input_file_path,
+                output_format,
+                probe_path,
+                quality=quality,
+                resize_width=width,
+                resize_height=height,
+                pipeline=pipeline
+            )
+            result = {
+                "path": probe_path,
+                "size": await file_handler.file_size(probe_path),
+                "quality": quality,
+                "width": width,
+                "height": height
+            }
+            probes[probe_path] = result
+            return result
+        
+        def good_enough(result: Dict[str, Any]) -> bool:
+            return max_bytes * (1 - tolerance) <= result["size"] <= max_bytes
+        
+        best: Optional[Dict[str, Any]] = None
+        smallest: Optional[Dict[str, Any]] = None
+        
+        def consider(result: Dict[str, Any]) -> None:
+            nonlocal best, smallest
+            if smallest is None or result["size"] < smallest["size"]:
+                smallest = result
+            if result["size"] <= max_bytes:
+                # Prefer higher quality, then larger (closer to budget) output
+                key = (result["quality"] or 0, result["size"])
+                if best is None or key > (best["quality"] or 0, best["size"]):
+                    best = result
+        
+        try:
+            width, height = resize_width, resize_height
+            
+            # Step 1: try full quality, then bisect below it at the requested
+            # dimensions (an image that already fits costs one conversion)
+            if lossy:
+                low, high = settings.target_size_min_quality, 100
+                top = await probe(high, width, height)
+                consider(top)
+                high = high - 1 if top["size"] > max_bytes else low - 1
+                floor_checked = False
+                while low <= high and len(probes) < max_attempts:
+                    quality = (low + high + 1) // 2
+                    result = await probe(quality, width, height)
+                    consider(result)
+                    if good_enough(result):
+                        break
+                    if result["size"] <= max_bytes:
+                        low = quality + 1
+                        continue
+                    high = quality - 1
+                    
+                    if not floor_checked and best is None and low < quality:
+                        # Check the lowest quality once, so an unreachable
+                        # budget goes straight to downscaling
+                        floor_checked = True
+                        floor = await probe(low, width, height)
+                        consider(floor)
+                        if floor["size"] > max_bytes or good_enough(floor):
+                            break
+                        low += 1
+            else:
+                consider(await probe(None, width, height))
+            
+            # Step 2: shrink the image if nothing fits
+            if best is None and allow_downscale and smallest is not None:
+                def read_dimensions():
+                    # The full-size output reflects any crop or rotation;
+                    # fall back to the input for formats we cannot read
+                    for path in (smallest["path"], input_file_path):
+                        with file_handler.open_file(path) as f:
+                            dimensions = read_image_dimensions(f)
+                        if dimensions:
+                            return dimensions
+                    return None
+                dimensions = await file_io.run(read_dimensions)
+                if width is None and height is None and dimensions:
+                    width, height = dimensions[0], None
+                quality = settings.target_size_min_quality if lossy else None
+                if lossy and smallest["quality"] is not None:
+                    quality = smallest["quality"]
                 
-                # Step 2: Upload the file
-                upload_task = self._find_task(job_response, "import/upload")
-                await self._upload_file(client, upload_task, input_file_path)
-                
-                # Step 3: Wait for conversion to complete
-                job_id = job_response["data"]["id"]
-                completed_job = await self._wait_for_job(client, job_id)
-                
-                # Step 4: Download the converted file
+                last_size = smallest["size"]
+                while best is None and len(probes) < max_attempts and (width or height):
+                    # Output size scales roughly with pixel count
+                    scale = math.sqrt(max_bytes / last_size) * 0.95
+                    width = max(1, int(width * scale)) if width else None
+                    height = max(1, int(height * scale)) if height else None
+                    result = await probe(quality, width, height)
+                    consider(result)
+                    last_size = result["size"]
+            
+            chosen = best or smallest
+            if chosen is None:
+                raise ConversionError("No conversion attempts were made")
+            
+            await file_handler.move_file(chosen["path"], output_file_path)
+            return {
+                "output_size": chosen["size"],
+                "quality": chosen["quality"],
+                "width": chosen["width"],
+                "height": chosen["height"],
+                "attempts": len(probes),
+                "target_met": chosen["size"] <= max_bytes
+            }
+        finally:
+            for probe_path in probes:
+                await file_io.run(file_handler.storage.delete, probe_path)
+    
+    async def resume_job(self, entry: Dict[str, Any]) -> Path:
+        """
+        Resume a journaled job whose file was already uploaded.
+        
+        Polls the existing CloudConvert job and downloads its result
+        instead of uploading the input again.
+        
+        Args:
+            entry: Job journal entry with a CloudConvert job id and output path
+            
+        Returns:
+            Path to the converted file
+            
+        Raises:
+            ConversionError: If the job cannot be resumed
+        """
+        output_file_path = Path(entry["output_path"])
+        
+        # Jobs only exist on the account that created them
+        api_key = key_pool.get(entry.get("api_key_id"))
+        if api_key is None and not entry.get("api_key_id") and key_pool.configured:
+            # Journaled before key pools: it was the primary key
+            api_key = key_pool.keys[0]
+        if api_key is None:
+            await self._journal(entry["id"], stage=STAGE_FAILED, error="API key no longer configured")
+            raise ConversionError("Failed to resume job: API key no longer configured")
+        
+        try:
+            async with async_client(120.0) as client:
+                completed_job = await self._wait_for_job(
+                    client, api_key, entry["cloudconvert_job_id"]
+                )
                 export_task = self._find_task(completed_job, "export/url")
                 await self._download_file(client, export_task, output_file_path)
-                
-                return output_file_path
-                
-        except httpx.HTTPError as e:
-            raise ConversionError(f"Network error during conversion: {str(e)}")
         except Exception as e:
-            raise ConversionError(f"Conversion failed: {str(e)}")
+            await self._journal(entry["id"], stage=STAGE_FAILED, error=str(e))
+            raise ConversionError(f"Failed to resume job: {str(e)}")
+        
+        await self._journal(entry["id"], stage=STAGE_FINISHED)
+        return output_file_path
+    
+    async def resume_unfinished_jobs(self) -> None:
+        """
+        Resume jobs left in flight by a previous run of the process.
+        
+        Jobs whose upload finished are polled and downloaded. Jobs that never
+        got that far cannot complete upstream, so they are marked as failed.
+        """
+        for entry in await file_io.run(job_journal.list_unfinished):
+            if entry["stage"] != STAGE_UPLOADED or not entry["output_path"]:
+                await file_io.run(
+                    job_journal.update,
+                    entry["id"],
+                    stage=STAGE_FAILED,
+                    error="Interrupted before the upload completed"
+                )
+                continue
+            
+            try:
+                await self.resume_job(entry)
+                print(f"Resumed conversion job {entry['cloudconvert_job_id']}")
+            except ConversionError as e:
+                print(f"Could not resume job {entry['cloudconvert_job_id']}: {e}")
+    
+    async def _journal(self, journal_id: Optional[str], **fields: Any) -> None:
+        """Record job progress in the journal, if this job is journaled."""
+        if journal_id is None:
+            return
+        try:
+            await file_io.run(job_journal.update, journal_id, **fields)
+        except Exception as e:
+            print(f"Error updating job journal: {e}")
     
     async def _create_job(
         self,
         client: httpx.AsyncClient,
+        api_key: ApiKey,
         output_format: str,
         quality: Optional[int] = None,
         resize_width: Optional[int] = None,
-        resize_height: Optional[int] = None
+        resize_height: Optional[int] = None,
+        speed: Optional[str] = None,
+        pipeline: Optional[List[Dict[str, Any]]] = None,
+        import_task_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Create a conversion job."""
+        """
+        Create a conversion job.
+        
+        Options left unset fall back to the configured per-format defaults.
+        With import_task_id, the job converts the file uploaded to that
+        existing upload task instead of creating its own. Pipeline steps
+        become tasks chained between the upload and the conversion, so the
+        whole edit is still one job.
+        
+        Raises:
+            KeyRefused: If the key is rate limited or out of credits
+        """
         # Normalize format
         if output_format == 'jpg':
             output_format = 'jpeg'
@@ -108,18 +749,35 @@ class CloudConvertService:
             "output_format": output_format
         }
         
+        if quality is None:
+            # Per-format default (jpeg_default_quality etc.; 0 means unset)
+            quality = getattr(settings, f"{output_format}_default_quality", 0) or None
         if quality is not None:
             convert_task["quality"] = quality
+        if output_format == "avif":
+            preset = speed or settings.avif_default_speed
+            convert_task["effort"] = settings.avif_speed_presets.get(
+                preset, settings.avif_speed_presets["balanced"]
+            )
         if resize_width is not None:
             convert_task["width"] = resize_width
         if resize_height is not None:
             convert_task["height"] = resize_height
         
-        job_data = {
+        if import_task_id is not None:
+            # Convert the file uploaded to a pooled task
+            convert_task["input"] = import_task_id
+        
+        transform_tasks, convert_task["input"] = self._transform_tasks(
+            pipeline or [], convert_task["input"]
+        )
+        
+        job_data: Dict[str, Any] = {
             "tasks": {
                 "import-my-file": {
                     "operation": "import/upload"
                 },
+                **transform_tasks,
                 "convert-my-file": {
                     **convert_task
                 },
@@ -130,18 +788,99 @@ class CloudConvertService:
             }
         }
         
+        if import_task_id is not None:
+            del job_data["tasks"]["import-my-file"]
+        
+        # Ask CloudConvert to notify us instead of relying on polling
+        if self.webhooks_enabled and settings.cloudconvert_webhook_url:
+            job_data["webhook_url"] = settings.cloudconvert_webhook_url
+        
         response = await client.post(
             f"{self.api_url}/jobs",
             json=job_data,
-            headers=self.headers
+            headers=api_key.headers
         )
         
+        if key_pool.record_response(api_key, response):
+            raise KeyRefused(f"CloudConvert key {api_key.id} refused the job ({response.status_code})")
+        
         if response.status_code not in [200, 201]:
             error_detail = response.json().get("message", "Unknown error")
             raise ConversionError(f"Failed to create job: {error_detail}")
         
         return response.json()
     
+    @staticmethod
+    def _transform_tasks(
+        pipeline: List[Dict[str, Any]],
+        source: str
+    ) -> Tuple[Dict[str, Dict[str, Any]], str]:
+        """
+        Compile pipeline steps into chained CloudConvert tasks.
+        
+        Consecutive crop/rotate/auto-orient/strip steps share one
+        ImageMagick command task; each watermark is a watermark task.
+        Intermediate results are PNG, so only the final conversion is lossy.
+        
+        Args:
+            pipeline: Validated pipeline steps
+            source: Name or id of the task that provides the input file
+            
+        Returns:
+            Tuple of (tasks by name, name of the task with the final result)
+        """
+        tasks: Dict[str, Dict[str, Any]] = {}
+        arguments: List[str] = []
+        
+        def flush() -> None:
+            nonlocal source
+            if not arguments:
+                return
+            name = f"transform-{len(tasks) + 1}"
+            # The uploaded file's name is not known when the job is created,
+            # so the input is matched with an ImageMagick wildcard ([0] is
+            # the first frame)
+            tasks[name] = {
+                "operation": "command",
+                "input": source,
+                "engine": "imagemagick",
+                "command": "convert",
+                "arguments": " ".join(
+                    [f"/input/{source}/*[0]", *arguments, f"/output/{name}.png"]
+                )
+            }
+            arguments.clear()
+            source = name
+        
+        for step in pipeline:
+            op = step["op"]
+            if op == "auto_orient":
+                arguments.append("-auto-orient")
+            elif op == "strip":
+                arguments.append("-strip")
+            elif op == "crop":
+                geometry = f"{step['width']}x{step['height']}+{step['x']}+{step['y']}"
+                arguments += ["-crop", geometry, "+repage"]
+            elif op == "rotate":
+                arguments += ["-rotate", str(step["degrees"])]
+            elif op == "watermark":
+                flush()
+                vertical, horizontal = WATERMARK_ANCHORS[step["position"]]
+                name = f"transform-{len(tasks) + 1}"
+                tasks[name] = {
+                    "operation": "watermark",
+                    "input": source,
+                    "text": step["text"],
+                    "font_size": step["font_size"],
+                    "opacity": step["opacity"],
+                    "position_vertical": vertical,
+                    "position_horizontal": horizontal
+                }
+                source = name
+        flush()
+        
+        return tasks, source
+    
     def _find_task(self, job_data: Dict[str, Any], operation: str) -> Dict[str, Any]:
         """Find a specific task in the job data."""
         tasks = job_data["data"]["tasks"]
@@ -156,69 +895,182 @@ class CloudConvertService:
         upload_task: Dict[str, Any],
         file_path: Path
     ) -> None:
-        """Upload file to CloudConvert."""
+        """
+        Upload file to CloudConvert.
+        
+        httpx reads file objects synchronously, so the multipart body is
+        built here and the file streamed into it chunk by chunk from the
+        file I/O pool; the file is never held in memory as a whole.
+        """
         upload_url = upload_task["result"]["form"]["url"]
         upload_params = upload_task["result"]["form"]["parameters"]
         
-        with open(file_path, 'rb') as f:
-            files = {'file': (file_path.name, f, 'application/octet-stream')}
-            response = await client.post(
-                upload_url,
-                data=upload_params,
-                files=files
-            )
+        boundary = uuid.uuid4().hex
+        head = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in upload_params.items()
+        )
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+            f'filename="{file_path.name}"\r\nContent-Type: application/octet-stream\r\n\r\n'
+        ).encode()
+        tail = f"\r\n--{boundary}--\r\n".encode()
+        size = await file_handler.file_size(file_path)
+        
+        async def body() -> AsyncIterator[bytes]:
+            yield head
+            f = await file_io.run(file_handler.open_file, file_path)
+            try:
+                while True:
+                    chunk = await file_io.run(f.read, UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                await file_io.run(f.close)
+            yield tail
+        
+        response = await client.post(
+            upload_url,
+            content=body(),
+            headers={
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+                "Content-Length": str(len(head) + size + len(tail))
+            }
+        )
         
         if response.status_code not in [200, 201]:
             raise ConversionError(f"File upload failed: {response.text}")
     
+    @property
+    def webhooks_enabled(self) -> bool:
+        """Whether job completion is signalled by webhooks."""
+        return self.receives_webhooks and bool(settings.cloudconvert_webhook_secret)
+    
     async def _wait_for_job(
         self,
         client: httpx.AsyncClient,
+        api_key: ApiKey,
         job_id: str,
-        max_wait: int = 120
+        max_wait: Optional[float] = None
     ) -> Dict[str, Any]:
-        """Wait for job to complete."""
-        waited = 0
-        while waited < max_wait:
-            response = await client.get(
-                f"{self.api_url}/jobs/{job_id}",
-                headers=self.headers
-            )
-            
-            if response.status_code != 200:
-                raise ConversionError(f"Failed to check job status: {response.text}")
-            
-            job_data = response.json()
-            status = job_data["data"]["status"]
-            
-            if status == "finished":
-                return job_data
-            elif status == "error":
-                error_msg = job_data["data"].get("message", "Unknown error")
-                raise ConversionError(f"Conversion failed: {error_msg}")
-            
-            # Wait before checking again
-            await asyncio.sleep(2)
-            waited += 2
+        """
+        Wait for job to complete.
+        
+        With webhooks enabled, waits for the webhook notification and only
+        polls as a slow safety net. Otherwise polls every 2 seconds.
+        """
+        if max_wait is None:
+            max_wait = settings.cloudconvert_job_timeout
+        waiter = job_events.register(job_id) if self.webhooks_enabled else None
+        poll_interval = settings.webhook_fallback_poll_interval if waiter else 2
+        
+        try:
+            waited = 0
+            while waited < max_wait:
+                if waiter is not None:
+                    timeout = min(poll_interval, max_wait - waited)
+                    done, _ = await asyncio.wait({waiter}, timeout=timeout)
+                    if done:
+                        completed_job = self._check_job_status(waiter.result())
+                        if completed_job:
+                            return completed_job
+                        # Not a final state; wait for the next notification
+                        waiter = job_events.register(job_id)
+                        continue
+                    waited += timeout
+                
+                response = await client.get(
+                    f"{self.api_url}/jobs/{job_id}",
+                    headers=api_key.headers
+                )
+                
+                if key_pool.record_response(api_key, response):
+                    # Rate limited: keep waiting, but back off this key
+                    await asyncio.sleep(poll_interval)
+                    waited += poll_interval
+                    continue
+                
+                if response.status_code != 200:
+                    raise ConversionError(f"Failed to check job status: {response.text}")
+                
+                completed_job = self._check_job_status(response.json())
+                if completed_job:
+                    return completed_job
+                
+                if waiter is None:
+                    # Wait before checking again
+                    await asyncio.sleep(poll_interval)
+                    waited += poll_interval
+        finally:
+            if waiter is not None:
+                job_events.discard(job_id)
         
         raise ConversionError("Conversion timed out")
     
+    def _check_job_status(self, job_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Check whether a job has reached a final state.
+        
+        Returns:
+            The job data if the job finished, None if it is still running
+            
+        Raises:
+            ConversionError: If the job failed
+        """
+        status = job_data["data"]["status"]
+        
+        if status == "finished":
+            return job_data
+        elif status == "error":
+            error_msg = job_data["data"].get("message", "Unknown error")
+            raise ConversionError(f"Conversion failed: {error_msg}")
+        
+        return None
+    
     async def _download_file(
         self,
         client: httpx.AsyncClient,
         export_task: Dict[str, Any],
         output_path: Path
     ) -> None:
-        """Download the converted file."""
-        download_url = export_task["result"]["files"][0]["url"]
-        
-        response = await client.get(download_url)
+        """
+        Download the converted file.
         
-        if response.status_code != 200:
-            raise ConversionError(f"Failed to download converted file: {response.text}")
+        The file is streamed to temp storage (memory or disk, depending on
+        its size), and its size is reserved from the in-flight byte budget
+        while the download runs. Chunks are batched and written from the
+        file I/O pool.
+        """
+        download_url = export_task["result"]["files"][0]["url"]
         
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
+        async with client.stream("GET", download_url) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise ConversionError(f"Failed to download converted file: {response.text}")
+            
+            # Unknown sizes reserve the largest file we would accept
+            reserved = int(response.headers.get("content-length", settings.max_file_size_bytes))
+            try:
+                await byte_budget.acquire(reserved, timeout=settings.byte_budget_wait_seconds)
+            except BudgetExhausted as e:
+                raise ConversionError(f"Failed to download converted file: {e}")
+            
+            try:
+                f = await file_io.run(file_handler.open_file, output_path, 'wb')
+                try:
+                    pending = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        pending += chunk
+                        if len(pending) >= DOWNLOAD_WRITE_SIZE:
+                            await file_io.run(f.write, bytes(pending))
+                            pending.clear()
+                    if pending:
+                        await file_io.run(f.write, bytes(pending))
+                finally:
+                    await file_io.run(f.close)
+            finally:
+                await byte_budget.release(reserved)
 
 
 # Create singleton instance
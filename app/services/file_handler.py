@@ -8,16 +8,34 @@ import uuid
 import asyncio
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, BinaryIO, Callable, Any
 from fastapi import UploadFile
 from app.config import settings
+from app.services.storage import TieredStorage
+from app.services.file_io import file_io
 
 
 class FileHandler:
-    """Handles file operations for uploads and downloads."""
+    """
+    Handles file operations for uploads and downloads.
+    
+    Temp files are addressed by path, but small ones are kept in an
+    in-memory tier, so use the methods here rather than the filesystem
+    to read, write, check or delete them. The async methods run anything
+    that touches the disk in the file I/O thread pool; open_file is
+    synchronous and meant for code already running there.
+    """
     
     def __init__(self):
         self.temp_dir = settings.temp_dir
+        # Workers and the API exchange files through the temp dir, so in
+        # worker mode nothing may live only in one process's memory
+        memory_tier_mb = 0 if settings.job_queue_enabled else settings.memory_tier_mb
+        self.storage = TieredStorage(
+            self.temp_dir,
+            capacity=memory_tier_mb * 1024 * 1024,
+            max_file_bytes=settings.memory_tier_max_file_kb * 1024
+        )
         
     async def save_upload(self, file: UploadFile) -> Path:
         """
@@ -39,8 +57,7 @@ class FileHandler:
         
         # Save file
         content = await file.read()
-        with open(file_path, 'wb') as f:
-            f.write(content)
+        await file_io.run(self.storage.store, file_path, content)
         
         return file_path
     
@@ -56,7 +73,50 @@ class FileHandler:
         """
         return self.temp_dir / filename
     
-    def delete_file(self, file_path: Path) -> None:
+    def open_file(self, file_path: Path, mode: str = 'rb') -> BinaryIO:
+        """
+        Open a file for binary reading ('rb') or writing ('wb').
+        
+        Args:
+            file_path: Path to the file
+            mode: 'rb' or 'wb'
+            
+        Returns:
+            A binary file object
+        """
+        return self.storage.open(file_path, mode)
+    
+    async def _run(self, file_path: Path, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a storage call, in the I/O pool unless the file is in memory."""
+        if self.storage.in_memory(file_path):
+            return func(*args)
+        return await file_io.run(func, *args)
+    
+    async def read_file(self, file_path: Path) -> bytes:
+        """Read a whole file from either tier."""
+        return await self._run(file_path, self.storage.read_bytes, file_path)
+    
+    async def file_exists(self, file_path: Path) -> bool:
+        """Check whether a file exists in either tier."""
+        return await self._run(file_path, self.storage.exists, file_path)
+    
+    async def file_size(self, file_path: Path) -> int:
+        """Size of a file in bytes."""
+        return await self._run(file_path, self.storage.size, file_path)
+    
+    def is_in_memory(self, file_path: Path) -> bool:
+        """Whether a file is held in the in-memory tier."""
+        return self.storage.in_memory(file_path)
+    
+    async def copy_file(self, source: Path, destination: Path) -> None:
+        """Copy a file between any two locations."""
+        await file_io.run(self.storage.copy, source, destination)
+    
+    async def move_file(self, source: Path, destination: Path) -> None:
+        """Move a file between any two locations."""
+        await file_io.run(self.storage.replace, source, destination)
+    
+    async def delete_file(self, file_path: Path) -> None:
         """
         Delete a file from temporary storage.
         
@@ -64,13 +124,12 @@ class FileHandler:
             file_path: Path to the file to delete
         """
         try:
-            if file_path.exists():
-                file_path.unlink()
+            if await self._run(file_path, self.storage.delete, file_path):
                 print(f"Deleted temporary file: {file_path}")
         except Exception as e:
             print(f"Error deleting file {file_path}: {e}")
     
-    async def cleanup_old_files(self, max_age_hours: int = 1) -> None:
+    async def cleanup_old_files(self, max_age_hours: float = 1) -> None:
         """
         Clean up temporary files older than specified age.
         
@@ -79,13 +138,14 @@ class FileHandler:
         """
         cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
         
-        for file_path in self.temp_dir.glob('*'):
-            if file_path.is_file():
-                # Get file modification time
-                file_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-                
-                if file_time < cutoff_time:
-                    self.delete_file(file_path)
+        # The directory scan stats every file, so it runs in the I/O pool
+        files = await file_io.run(lambda: list(self.storage.list_files()))
+        for file_path, mtime in files:
+            # Get file modification time
+            file_time = datetime.fromtimestamp(mtime)
+            
+            if file_time < cutoff_time:
+                await self.delete_file(file_path)
     
     def generate_output_filename(self, original_filename: str, output_format: str) -> str:
         """
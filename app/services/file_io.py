@@ -0,0 +1,67 @@
+"""
+Thread pool for blocking filesystem work.
+Disk reads, writes, deletes and directory scans run here instead of on the
+event loop, so a slow disk delays only the request waiting for it. The
+pool is bounded and separate from the default executor, so a burst of
+disk work queues up here rather than starving other blocking calls.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, Dict, Any
+from app.config import settings
+
+
+class FileIOPool:
+    """Bounded thread pool that runs blocking file operations."""
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.in_flight = 0
+        self.completed = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The pool (created on first use)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.file_io_threads),
+                thread_name_prefix="file-io"
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking function in the pool and wait for its result.
+
+        If the caller is cancelled, the function still runs to completion
+        in its thread; only the result is discarded.
+        """
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs)
+            )
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        """Wait for queued operations to finish and stop the threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, int]:
+        """Pool size and activity."""
+        return {
+            "threads": max(1, settings.file_io_threads),
+            "in_flight": self.in_flight,
+            "completed": self.completed
+        }
+
+
+# Create singleton instance
+file_io = FileIOPool()
@@ -0,0 +1,15 @@
+"""
+Outgoing HTTP clients.
+Building an SSL context reads and parses the CA bundle, which blocks the
+event loop for tens of milliseconds, so one context is built at startup
+and shared by every client instead of each client building its own.
+"""
+
+import httpx
+
+SSL_CONTEXT = httpx.create_ssl_context()
+
+
+def async_client(timeout: float) -> httpx.AsyncClient:
+    """An AsyncClient that reuses the shared SSL context."""
+    return httpx.AsyncClient(timeout=timeout, verify=SSL_CONTEXT)
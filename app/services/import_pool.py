@@ -0,0 +1,102 @@
+"""
+Warm pool of CloudConvert upload tasks.
+Keeps a few import/upload tasks created ahead of time for each API key,
+so a conversion can start uploading straight away and create its job
+while the upload runs, instead of waiting for the job first.
+"""
+
+import time
+import asyncio
+from collections import deque
+from typing import Optional, Dict, Any, Deque, Tuple
+import httpx
+from app.config import settings
+from app.services.http_client import async_client
+from app.services.key_pool import key_pool, ApiKey
+
+
+class ImportTaskPool:
+    """Per-key pools of unused import/upload tasks, refilled in the background."""
+
+    def __init__(self):
+        self._tasks: Dict[str, Deque[Tuple[float, Dict[str, Any]]]] = {}
+        self._wake: Optional[asyncio.Event] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.import_pool_size > 0
+
+    def available(self, api_key: ApiKey) -> int:
+        """Number of pooled tasks for a key."""
+        return len(self._tasks.get(api_key.id, ()))
+
+    def take(self, api_key: ApiKey) -> Optional[Dict[str, Any]]:
+        """
+        Take a pooled import task for a key.
+
+        Returns:
+            The import/upload task (with its upload form), or None if the
+            pool for this key is empty
+        """
+        pool = self._tasks.get(api_key.id)
+        task = None
+        cutoff = time.monotonic() - settings.import_pool_max_age_seconds
+        while pool:
+            created, candidate = pool.popleft()
+            if created >= cutoff:
+                task = candidate
+                break
+        if self._wake is not None:
+            self._wake.set()
+        return task
+
+    async def _create_task(self, client: httpx.AsyncClient, api_key: ApiKey) -> Optional[Dict[str, Any]]:
+        response = await client.post(
+            f"{settings.cloudconvert_api_url}/import/upload",
+            json={},
+            headers=api_key.headers
+        )
+        if key_pool.record_response(api_key, response):
+            return None
+        if response.status_code not in [200, 201]:
+            print(f"Error creating pooled upload task for key {api_key.id}: {response.text}")
+            return None
+        return response.json()["data"]
+
+    async def fill(self, client: httpx.AsyncClient) -> None:
+        """Top up every key's pool to the configured size."""
+        now = time.monotonic()
+        cutoff = now - settings.import_pool_max_age_seconds
+        for api_key in key_pool.keys:
+            pool = self._tasks.setdefault(api_key.id, deque())
+            # Drop tasks that may have expired upstream
+            while pool and pool[0][0] < cutoff:
+                pool.popleft()
+            while len(pool) < settings.import_pool_size and not api_key.cooling_down(now):
+                task = await self._create_task(client, api_key)
+                if task is None:
+                    break
+                pool.append((time.monotonic(), task))
+
+    async def run(self) -> None:
+        """Keep the pools full (run as a background task)."""
+        self._wake = asyncio.Event()
+        async with async_client(30.0) as client:
+            while True:
+                self._wake.clear()
+                try:
+                    await self.fill(client)
+                except httpx.HTTPError as e:
+                    print(f"Error filling upload task pool: {e}")
+                try:
+                    # Refill as tasks are taken, and regularly replace stale ones
+                    await asyncio.wait_for(
+                        self._wake.wait(),
+                        timeout=settings.import_pool_max_age_seconds / 2
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+
+# Create singleton instance
+import_pool = ImportTaskPool()
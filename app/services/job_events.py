@@ -0,0 +1,72 @@
+"""
+In-process registry of CloudConvert jobs waiting for a webhook.
+Lets the webhook endpoint wake the coroutine that is waiting on a job.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any
+
+
+class JobEventRegistry:
+    """Maps CloudConvert job ids to futures resolved by webhook notifications."""
+
+    def __init__(self, max_early_events: int = 1000):
+        self._waiters: Dict[str, asyncio.Future] = {}
+        # Events that arrived before anyone registered for the job
+        self._early_events: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_early_events = max_early_events
+
+    def register(self, job_id: str) -> asyncio.Future:
+        """
+        Register interest in a job's completion.
+
+        Args:
+            job_id: CloudConvert job id
+
+        Returns:
+            Future resolved with the job data when a webhook arrives
+        """
+        future = asyncio.get_running_loop().create_future()
+        early = self._early_events.pop(job_id, None)
+        if early is not None:
+            future.set_result(early)
+        self._waiters[job_id] = future
+        return future
+
+    def resolve(self, job_id: str, job_data: Dict[str, Any]) -> bool:
+        """
+        Deliver a job notification to its waiter.
+
+        Args:
+            job_id: CloudConvert job id
+            job_data: Job data in the same shape as GET /jobs/{id}
+
+        Returns:
+            True if a waiting coroutine was woken
+        """
+        future = self._waiters.get(job_id)
+        if future is not None and not future.done():
+            future.set_result(job_data)
+            return True
+
+        # Keep it briefly in case the waiter registers right after
+        self._early_events[job_id] = job_data
+        while len(self._early_events) > self._max_early_events:
+            self._early_events.popitem(last=False)
+        return False
+
+    def discard(self, job_id: str) -> None:
+        """Stop waiting for a job."""
+        future = self._waiters.pop(job_id, None)
+        if future is not None and not future.done():
+            future.cancel()
+
+    @property
+    def pending_count(self) -> int:
+        """Number of jobs currently waiting for a webhook."""
+        return len(self._waiters)
+
+
+# Create singleton instance
+job_events = JobEventRegistry()
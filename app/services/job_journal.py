@@ -0,0 +1,228 @@
+"""
+Conversion job journal.
+Records every conversion in a local SQLite database so in-flight
+CloudConvert jobs survive a restart and finished results can be reused.
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+import uuid
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from app.config import settings
+from app.services.file_handler import file_handler
+
+
+# Job stages, in the order a conversion moves through them
+STAGE_PENDING = "pending"        # Recorded, no CloudConvert job yet
+STAGE_CREATED = "created"        # CloudConvert job created, upload not finished
+STAGE_UPLOADED = "uploaded"      # File uploaded, CloudConvert is converting
+STAGE_FINISHED = "finished"      # Output downloaded to output_path
+STAGE_FAILED = "failed"          # Conversion failed or could not be resumed
+
+UNFINISHED_STAGES = (STAGE_PENDING, STAGE_CREATED, STAGE_UPLOADED)
+
+
+def hash_file(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 hash of a file.
+
+    Args:
+        file_path: Path to the file
+        chunk_size: Number of bytes to read at a time
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with file_handler.open_file(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JobJournal:
+    """SQLite-backed journal of conversion jobs."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self._db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def db_path(self) -> Path:
+        """Path to the journal database (resolved lazily from settings)."""
+        return self._db_path or settings.journal_path
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use and create the schema."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    input_hash TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    cloudconvert_job_id TEXT,
+                    stage TEXT NOT NULL,
+                    output_path TEXT,
+                    error TEXT,
+                    api_key_id TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_lookup "
+                "ON jobs (input_hash, options, stage)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_stage ON jobs (stage)")
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "api_key_id" not in columns:
+                # Journals created before API key pools
+                conn.execute("ALTER TABLE jobs ADD COLUMN api_key_id TEXT")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _encode_options(options: Dict[str, Any]) -> str:
+        """Serialize options so equal option sets compare equal in SQL."""
+        return json.dumps(options, sort_keys=True, separators=(',', ':'))
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["options"] = json.loads(record["options"])
+        return record
+
+    def create(
+        self,
+        input_hash: str,
+        options: Dict[str, Any],
+        output_path: Optional[Path] = None
+    ) -> str:
+        """
+        Record a new conversion.
+
+        Args:
+            input_hash: SHA-256 hash of the input file
+            options: Conversion options (format, quality, dimensions)
+            output_path: Where the converted file will be written
+
+        Returns:
+            The journal entry id
+        """
+        entry_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO jobs (id, input_hash, options, stage, output_path, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry_id,
+                    input_hash,
+                    self._encode_options(options),
+                    STAGE_PENDING,
+                    str(output_path) if output_path else None,
+                    now,
+                    now
+                )
+            )
+            conn.commit()
+        return entry_id
+
+    def update(self, entry_id: str, **fields: Any) -> None:
+        """
+        Update fields of a journal entry.
+
+        Args:
+            entry_id: The journal entry id
+            **fields: Columns to update (stage, cloudconvert_job_id,
+                api_key_id, output_path, error)
+        """
+        allowed = {"stage", "cloudconvert_job_id", "api_key_id", "output_path", "error"}
+        unknown = set(fields) - allowed
+        if unknown:
+            raise ValueError(f"Unknown journal fields: {', '.join(sorted(unknown))}")
+
+        if "output_path" in fields and fields["output_path"] is not None:
+            fields["output_path"] = str(fields["output_path"])
+        fields["updated_at"] = datetime.now().isoformat()
+
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), entry_id)
+            )
+            conn.commit()
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """Get a journal entry by id."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM jobs WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def find_finished(
+        self,
+        input_hash: str,
+        options: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the most recent finished conversion whose output still exists.
+
+        Checks the output on disk, so call it from the file I/O pool.
+
+        Args:
+            input_hash: SHA-256 hash of the input file
+            options: Conversion options
+
+        Returns:
+            The journal entry, or None if there is no reusable result
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM jobs WHERE input_hash = ? AND options = ? AND stage = ? "
+                "ORDER BY updated_at DESC",
+                (input_hash, self._encode_options(options), STAGE_FINISHED)
+            ).fetchall()
+
+        for row in rows:
+            if row["output_path"] and file_handler.storage.exists(Path(row["output_path"])):
+                return self._row_to_dict(row)
+        return None
+
+    def list_unfinished(self) -> List[Dict[str, Any]]:
+        """List entries that were still in flight (e.g. when the process stopped)."""
+        placeholders = ", ".join("?" for _ in UNFINISHED_STAGES)
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT * FROM jobs WHERE stage IN ({placeholders}) ORDER BY created_at",
+                UNFINISHED_STAGES
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Create singleton instance
+job_journal = JobJournal()
@@ -0,0 +1,316 @@
+"""
+Durable conversion queue.
+In worker mode the API validates and stores each upload, then adds a job
+here; separate worker processes lease jobs and convert them. The queue is
+a SQLite database, so it survives restarts and can be shared by every
+process on the host.
+
+A leased job belongs to one worker until its lease expires. Workers renew
+the lease while they work, so a job whose worker died becomes available
+again once the lease runs out. Failed jobs are retried with exponential
+backoff up to a maximum number of attempts.
+"""
+
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import asyncio
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, Any
+from app.config import settings
+from app.services.file_io import file_io
+
+
+# Job statuses
+STATUS_QUEUED = "queued"          # Waiting for a worker (or for its retry time)
+STATUS_LEASED = "leased"          # Being converted by a worker
+STATUS_FINISHED = "finished"      # Output written to the payload's output_path
+STATUS_FAILED = "failed"          # Out of attempts
+STATUS_CANCELLED = "cancelled"    # The client went away before it finished
+
+DONE_STATUSES = (STATUS_FINISHED, STATUS_FAILED, STATUS_CANCELLED)
+
+
+def new_worker_id() -> str:
+    """Identifier for one worker, unique across hosts and processes."""
+    return f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+
+
+class JobQueue:
+    """SQLite-backed queue of conversion jobs with leases."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self._db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def db_path(self) -> Path:
+        """Path to the queue database (resolved lazily from settings)."""
+        return self._db_path or settings.queue_path
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use and create the schema."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit; multi-statement changes use explicit transactions
+            conn = sqlite3.connect(
+                str(self.db_path), timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS queue (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    lease_until REAL,
+                    worker_id TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_queue_ready ON queue (status, available_at)"
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["payload"] = json.loads(record["payload"])
+        record["result"] = json.loads(record["result"]) if record["result"] else None
+        return record
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        """
+        Add a job.
+
+        Args:
+            payload: What the worker needs to run the conversion (paths
+                in shared temp storage and conversion options)
+
+        Returns:
+            The job id
+        """
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO queue (id, payload, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), STATUS_QUEUED, time.time(), now, now)
+            )
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Take the oldest job that is ready, or whose previous lease expired.
+
+        Jobs whose lease expired on their last attempt are failed instead.
+
+        Args:
+            worker_id: The worker taking the job
+            lease_seconds: How long the job is reserved without a renewal
+
+        Returns:
+            The leased job, or None if nothing is ready
+        """
+        now = time.time()
+        updated_at = datetime.now().isoformat()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE queue SET status = ?, error = ?, worker_id = NULL, updated_at = ? "
+                    "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                    (
+                        STATUS_FAILED, "Worker stopped responding", updated_at,
+                        STATUS_LEASED, now, settings.queue_max_attempts
+                    )
+                )
+                row = conn.execute(
+                    "SELECT id FROM queue "
+                    "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (STATUS_QUEUED, now, STATUS_LEASED, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE queue SET status = ?, attempts = attempts + 1, lease_until = ?, "
+                    "worker_id = ?, updated_at = ? WHERE id = ?",
+                    (STATUS_LEASED, now + lease_seconds, worker_id, updated_at, row["id"])
+                )
+                job = conn.execute("SELECT * FROM queue WHERE id = ?", (row["id"],)).fetchone()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return self._row_to_dict(job)
+
+    def _update_leased(self, job_id: str, worker_id: str, **fields: Any) -> bool:
+        """Update a job only if the worker still holds its lease."""
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            cursor = self._connect().execute(
+                f"UPDATE queue SET {assignments} WHERE id = ? AND status = ? AND worker_id = ?",
+                (*fields.values(), job_id, STATUS_LEASED, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Extend a lease.
+
+        Returns:
+            False if the worker no longer holds the job (it was cancelled,
+            or the lease expired and another worker took it)
+        """
+        return self._update_leased(job_id, worker_id, lease_until=time.time() + lease_seconds)
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Record a finished job.
+
+        Returns:
+            False if the worker no longer holds the job
+        """
+        return self._update_leased(
+            job_id, worker_id, status=STATUS_FINISHED, result=json.dumps(result),
+            lease_until=None, error=None
+        )
+
+    def fail(self, job_id: str, worker_id: str, attempts: int, error: str) -> bool:
+        """
+        Record a failed attempt, queueing a retry unless it was the last one.
+
+        Retries wait QUEUE_RETRY_DELAY_SECONDS, doubled after each attempt.
+
+        Returns:
+            False if the worker no longer holds the job
+        """
+        if attempts >= settings.queue_max_attempts:
+            return self._update_leased(
+                job_id, worker_id, status=STATUS_FAILED, error=error, lease_until=None
+            )
+        delay = settings.queue_retry_delay_seconds * 2 ** (attempts - 1)
+        return self._update_leased(
+            job_id, worker_id, status=STATUS_QUEUED, error=error, lease_until=None,
+            worker_id=None, available_at=time.time() + delay
+        )
+
+    def release(self, job_id: str, worker_id: str) -> bool:
+        """Put a job back without counting the attempt (worker shutting down)."""
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE queue SET status = ?, attempts = attempts - 1, lease_until = NULL, "
+                "worker_id = NULL, available_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ? AND worker_id = ?",
+                (
+                    STATUS_QUEUED, time.time(), datetime.now().isoformat(),
+                    job_id, STATUS_LEASED, worker_id
+                )
+            )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a job that has not finished.
+
+        A worker converting it finds out at its next lease renewal.
+
+        Returns:
+            The job's status before cancelling, or None if it was not found
+            or had already finished
+        """
+        updated_at = datetime.now().isoformat()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT status FROM queue WHERE id = ?", (job_id,)).fetchone()
+                if row is None or row["status"] in DONE_STATUSES:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE queue SET status = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                    (STATUS_CANCELLED, updated_at, job_id)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return row["status"]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by id."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM queue WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for a job to finish, fail or be cancelled.
+
+        Returns:
+            The job once it is done, or None if it is still running after
+            timeout seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await file_io.run(self.get, job_id)
+            if job is None or job["status"] in DONE_STATUSES:
+                return job
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(settings.queue_poll_interval)
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Forget finished, failed and cancelled jobs older than max_age_seconds."""
+        cutoff = datetime.fromtimestamp(time.time() - max_age_seconds).isoformat()
+        placeholders = ", ".join("?" for _ in DONE_STATUSES)
+        with self._lock:
+            cursor = self._connect().execute(
+                f"DELETE FROM queue WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*DONE_STATUSES, cutoff)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs in each status."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT status, COUNT(*) AS count FROM queue GROUP BY status"
+            ).fetchall()
+        counts = {status: 0 for status in (STATUS_QUEUED, STATUS_LEASED, *DONE_STATUSES)}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Create singleton instance
+job_queue = JobQueue()
@@ -0,0 +1,224 @@
+"""
+CloudConvert API key pool.
+Spreads conversions across several CloudConvert accounts, so throughput is
+not capped by one account's concurrency and credit limits.
+
+Each job runs entirely on the key that created it (CloudConvert job ids
+belong to an account). New jobs go to the key with the fewest jobs in
+flight, preferring keys with more remaining credits. Keys that hit a rate
+limit (429) or run out of credits (402) are put into cooldown.
+"""
+
+import time
+import asyncio
+import hashlib
+from typing import Optional, Dict, Any, List
+import httpx
+from app.config import settings
+from app.services.http_client import async_client
+
+
+class NoKeyAvailable(Exception):
+    """Raised when every configured API key is cooling down."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(
+            f"All CloudConvert API keys are rate limited or out of credits. "
+            f"Retry in {int(retry_after) + 1} seconds."
+        )
+
+
+class ApiKey:
+    """One CloudConvert API key and its usage."""
+
+    def __init__(self, key: str):
+        self.key = key
+        # Stable, non-secret identifier for logs, the journal and the usage API
+        self.id = hashlib.sha256(key.encode()).hexdigest()[:12]
+        self.in_flight = 0
+        self.jobs_started = 0
+        self.jobs_failed = 0
+        self.rate_limited = 0
+        self.quota_exceeded = 0
+        self.credits: Optional[int] = None
+        self.cooldown_until = 0.0
+        self.cooldown_reason: Optional[str] = None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.key}",
+            "Content-Type": "application/json"
+        }
+
+    def cooling_down(self, now: float) -> bool:
+        return now < self.cooldown_until
+
+    def usage(self, now: float) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "in_flight": self.in_flight,
+            "jobs_started": self.jobs_started,
+            "jobs_failed": self.jobs_failed,
+            "rate_limited": self.rate_limited,
+            "quota_exceeded": self.quota_exceeded,
+            "credits": self.credits,
+            "cooldown_seconds": round(max(self.cooldown_until - now, 0), 1),
+            "cooldown_reason": self.cooldown_reason if self.cooling_down(now) else None
+        }
+
+
+class KeyPool:
+    """Load balancer over the configured CloudConvert API keys."""
+
+    def __init__(self, keys: Optional[List[str]] = None):
+        self._configured_keys = keys
+        self._keys: Optional[List[ApiKey]] = None
+
+    @property
+    def keys(self) -> List[ApiKey]:
+        """Configured keys (resolved lazily from settings)."""
+        if self._keys is None:
+            raw = self._configured_keys
+            if raw is None:
+                raw = [settings.cloudconvert_api_key, *settings.cloudconvert_api_keys.split(",")]
+            unique = []
+            for key in (k.strip() for k in raw):
+                if key and key != "your_api_key_here" and key not in unique:
+                    unique.append(key)
+            self._keys = [ApiKey(key) for key in unique]
+        return self._keys
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.keys)
+
+    def get(self, key_id: Optional[str]) -> Optional[ApiKey]:
+        """Find a key by its id."""
+        for api_key in self.keys:
+            if api_key.id == key_id:
+                return api_key
+        return None
+
+    def acquire(self, exclude: Optional[List[ApiKey]] = None) -> ApiKey:
+        """
+        Pick the key for a new job and count the job against it.
+
+        Args:
+            exclude: Keys not to use (e.g. ones that just refused this job)
+
+        Returns:
+            The chosen key; pass it to release() when the job is done
+
+        Raises:
+            NoKeyAvailable: If every key is cooling down or excluded
+        """
+        now = time.monotonic()
+        candidates = [
+            k for k in self.keys
+            if not k.cooling_down(now) and k not in (exclude or [])
+        ]
+        if not candidates:
+            cooling = [k.cooldown_until - now for k in self.keys if k.cooling_down(now)]
+            raise NoKeyAvailable(min(cooling) if cooling else settings.key_cooldown_seconds)
+
+        # Fewest jobs in flight first, then most credits (unknown counts as plenty)
+        api_key = min(
+            candidates,
+            key=lambda k: (k.in_flight, -(k.credits if k.credits is not None else float("inf")))
+        )
+        api_key.in_flight += 1
+        api_key.jobs_started += 1
+        if api_key.credits is not None:
+            # Every conversion costs at least one credit
+            api_key.credits = max(api_key.credits - 1, 0)
+        return api_key
+
+    def release(self, api_key: ApiKey, failed: bool = False, refused: bool = False) -> None:
+        """
+        Mark a job on this key as done.
+
+        Args:
+            api_key: Key returned by acquire()
+            failed: Whether the job failed
+            refused: Whether the key refused to create the job at all
+        """
+        api_key.in_flight = max(api_key.in_flight - 1, 0)
+        if refused:
+            # The job never started on this key
+            api_key.jobs_started -= 1
+            if api_key.credits:
+                api_key.credits += 1
+        elif failed:
+            api_key.jobs_failed += 1
+
+    def record_response(self, api_key: ApiKey, response: httpx.Response) -> bool:
+        """
+        Put a key into cooldown if a response says it is rate limited or
+        out of credits.
+
+        Returns:
+            Whether the key was put into cooldown
+        """
+        if response.status_code == 429:
+            api_key.rate_limited += 1
+            retry_after = response.headers.get("retry-after", "")
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                seconds = settings.key_cooldown_seconds
+            self._cooldown(api_key, seconds, "rate_limited")
+            return True
+        if response.status_code == 402:
+            api_key.quota_exceeded += 1
+            api_key.credits = 0
+            self._cooldown(api_key, settings.key_quota_cooldown_seconds, "out_of_credits")
+            return True
+        return False
+
+    @staticmethod
+    def _cooldown(api_key: ApiKey, seconds: float, reason: str) -> None:
+        until = time.monotonic() + seconds
+        if until > api_key.cooldown_until:
+            api_key.cooldown_until = until
+            api_key.cooldown_reason = reason
+            print(f"CloudConvert key {api_key.id} cooling down for {seconds:.0f}s ({reason})")
+
+    async def refresh_credits(self, client: httpx.AsyncClient) -> None:
+        """Fetch the remaining credits of every key."""
+        for api_key in self.keys:
+            try:
+                response = await client.get(
+                    f"{settings.cloudconvert_api_url}/users/me",
+                    headers=api_key.headers
+                )
+            except httpx.HTTPError as e:
+                print(f"Error checking credits for key {api_key.id}: {e}")
+                continue
+
+            if response.status_code != 200:
+                self.record_response(api_key, response)
+                continue
+            credits = response.json().get("data", {}).get("credits")
+            if isinstance(credits, int):
+                api_key.credits = credits
+                if credits > 0 and api_key.cooldown_reason == "out_of_credits":
+                    # Topped up: no need to wait out the quota cooldown
+                    api_key.cooldown_until = 0.0
+
+    async def refresh_credits_periodically(self) -> None:
+        """Keep credit counts current (run as a background task)."""
+        async with async_client(30.0) as client:
+            while True:
+                await self.refresh_credits(client)
+                await asyncio.sleep(settings.key_credits_refresh_seconds)
+
+    def usage(self) -> List[Dict[str, Any]]:
+        """Per-key usage counters and state."""
+        now = time.monotonic()
+        return [api_key.usage(now) for api_key in self.keys]
+
+
+# Create singleton instance
+key_pool = KeyPool()
@@ -0,0 +1,149 @@
+"""
+Event loop lag monitor.
+Measures how late the event loop runs a periodic timer (its lag) and
+records what was blocking it when it stalls.
+
+A heartbeat task sleeps for a fixed interval and records how much later
+than expected it woke up. A watchdog thread checks that the heartbeat
+keeps ticking; when it is overdue by more than the slow-callback
+threshold, the loop thread's stack is captured while the blocking code is
+still running, so the culprit shows up in the record.
+"""
+
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Deque, Tuple
+from app.config import settings
+
+
+class SlowCallback:
+    """One stall of the event loop and where it was stuck."""
+
+    def __init__(self, stack: List[str], blocked_ms: float):
+        self.detected_at = datetime.now().isoformat()
+        self.stack = stack
+        # Time blocked when the stack was taken; updated once the loop recovers
+        self.blocked_ms = blocked_ms
+        self.finished = False
+
+    def to_dict(self, include_stack: bool) -> Dict[str, Any]:
+        record = {
+            "detected_at": self.detected_at,
+            "blocked_ms": round(self.blocked_ms, 1),
+            "finished": self.finished,
+            "location": self.stack[-1].splitlines()[0].strip() if self.stack else None
+        }
+        if include_stack:
+            record["stack"] = self.stack
+        return record
+
+
+class LoopMonitor:
+    """Heartbeat task plus watchdog thread for one event loop."""
+
+    def __init__(self):
+        self._lags: Deque[Tuple[float, float]] = deque()
+        self._slow: Deque[SlowCallback] = deque(maxlen=max(1, settings.loop_slow_callbacks_kept))
+        self._slow_total = 0
+        self._current: Optional[SlowCallback] = None
+        self._last_tick: Optional[float] = None
+        self._loop_thread_id: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def interval(self) -> float:
+        return settings.loop_monitor_interval_ms / 1000
+
+    async def run(self) -> None:
+        """Measure loop lag until cancelled (run as a background task)."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        watchdog.start()
+        try:
+            while True:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                self._tick(now, max(now - expected, 0.0) * 1000)
+        finally:
+            self._stop.set()
+
+    def _tick(self, now: float, lag_ms: float) -> None:
+        cutoff = now - settings.loop_lag_window_seconds
+        with self._lock:
+            self._last_tick = now
+            self._lags.append((now, lag_ms))
+            while self._lags and self._lags[0][0] < cutoff:
+                self._lags.popleft()
+            slow, self._current = self._current, None
+
+        if slow is not None:
+            slow.blocked_ms = max(slow.blocked_ms, lag_ms)
+            slow.finished = True
+            print(f"⚠️  Event loop blocked for {slow.blocked_ms:.0f} ms at {slow.to_dict(False)['location']}")
+
+    def _watch(self) -> None:
+        threshold = settings.loop_slow_callback_ms / 1000
+        check_every = min(threshold, self.interval) / 2
+        while not self._stop.wait(check_every):
+            with self._lock:
+                if self._current is not None or self._last_tick is None:
+                    continue
+                overdue = time.monotonic() - self._last_tick - self.interval
+            if overdue < threshold:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            slow = SlowCallback(traceback.format_stack(frame), overdue * 1000)
+            del frame
+            with self._lock:
+                self._current = slow
+                self._slow.append(slow)
+                self._slow_total += 1
+
+    @staticmethod
+    def _percentile(values: List[float], fraction: float) -> Optional[float]:
+        if not values:
+            return None
+        return round(values[min(int(fraction * len(values)), len(values) - 1)], 1)
+
+    def stats(self, include_stacks: bool = False) -> Dict[str, Any]:
+        """
+        Lag percentiles over the recent window and the latest stalls.
+
+        Args:
+            include_stacks: Whether to include the captured stacks
+        """
+        with self._lock:
+            lags = sorted(lag for _, lag in self._lags)
+            slow = list(self._slow)
+            slow_total = self._slow_total
+        return {
+            "enabled": settings.loop_monitor_enabled,
+            "interval_ms": settings.loop_monitor_interval_ms,
+            "window_seconds": settings.loop_lag_window_seconds,
+            "samples": len(lags),
+            "lag_ms": {
+                "p50": self._percentile(lags, 0.50),
+                "p90": self._percentile(lags, 0.90),
+                "p99": self._percentile(lags, 0.99),
+                "max": round(lags[-1], 1) if lags else None
+            },
+            "slow_callback_threshold_ms": settings.loop_slow_callback_ms,
+            "slow_callbacks_total": slow_total,
+            "slow_callbacks": [s.to_dict(include_stacks) for s in reversed(slow)]
+        }
+
+
+# Create singleton instance
+loop_monitor = LoopMonitor()
@@ -0,0 +1,244 @@
+"""
+Sampling request profiler.
+Records where a request spends its time, both on the CPU in this process
+and waiting in awaits (on CloudConvert, sleeps, file transfers).
+
+A single background thread samples every profiled request at a fixed
+interval. Each sample records:
+- the request task's coroutine stack, including where it is suspended
+  (wall-clock profile), and
+- the event loop thread's Python stack when that task is the one running
+  (CPU profile).
+
+Work the request hands to another task (e.g. a conversion run so it can
+be cancelled on disconnect) is attributed to the request once the task is
+passed to track().
+
+Profiles of slow requests, and a random sample of the rest, are written in
+the folded-stack format read by flamegraph.pl, speedscope and similar tools.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import threading
+import contextvars
+from pathlib import Path
+from collections import Counter
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from app.config import settings
+
+# Profile of the request being handled, inherited by tasks it creates
+_current_profile: contextvars.ContextVar[Optional["ActiveProfile"]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _await_chain(coro) -> List[str]:
+    """
+    Labels of a suspended coroutine and everything it is awaiting.
+
+    Task.get_stack() only returns the outermost frame of a suspended task,
+    so follow cr_await (and gi_yieldfrom for generator-based awaitables)
+    down to the innermost await.
+    """
+    labels = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return labels
+
+
+class ActiveProfile:
+    """Samples collected for one in-flight request."""
+
+    def __init__(self, method: str, path: str, task: asyncio.Task, loop: asyncio.AbstractEventLoop):
+        self.id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.task = task
+        # The request task followed by tasks it handed work to
+        self.tasks: List[asyncio.Task] = [task]
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self.sampled = random.random() < settings.profiler_sample_rate
+        self.started_wall = time.perf_counter()
+        self.started_cpu = time.thread_time()
+        self.wall: Counter = Counter()
+        self.cpu: Counter = Counter()
+
+
+class SamplingProfiler:
+    """Background-thread sampler shared by all profiled requests."""
+
+    def __init__(self):
+        self._active: Dict[str, ActiveProfile] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def profile_dir(self) -> Path:
+        return settings.data_dir / "profiles"
+
+    def start(self, method: str, path: str) -> ActiveProfile:
+        """Start profiling the current request task."""
+        profile = ActiveProfile(method, path, asyncio.current_task(), asyncio.get_running_loop())
+        _current_profile.set(profile)
+        with self._lock:
+            self._active[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return profile
+
+    @staticmethod
+    def track(task: asyncio.Task) -> None:
+        """Attribute a task created by the current request to its profile."""
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.tasks.append(task)
+
+    def stop(self, profile: ActiveProfile, status_code: Optional[int]) -> Optional[Path]:
+        """
+        Stop profiling a request and save it if it was slow or sampled.
+
+        Returns:
+            Path of the saved metadata file, or None if it was discarded
+        """
+        with self._lock:
+            self._active.pop(profile.id, None)
+
+        duration_ms = (time.perf_counter() - profile.started_wall) * 1000
+        # Thread CPU time of the loop thread covers all tasks that ran on it,
+        # so it is an upper bound on this request's CPU time
+        cpu_ms = (time.thread_time() - profile.started_cpu) * 1000
+        slow = duration_ms >= settings.profiler_threshold_ms
+        if not (slow or profile.sampled):
+            return None
+
+        try:
+            return self._save(profile, status_code, duration_ms, cpu_ms, slow)
+        except OSError as e:
+            print(f"Error saving profile {profile.id}: {e}")
+            return None
+
+    def _save(
+        self,
+        profile: ActiveProfile,
+        status_code: Optional[int],
+        duration_ms: float,
+        cpu_ms: float,
+        slow: bool
+    ) -> Path:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        for kind, samples in (("wall", profile.wall), ("cpu", profile.cpu)):
+            with open(self.profile_dir / f"{profile.id}.{kind}.folded", 'w', encoding='utf-8') as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+
+        metadata = {
+            "id": profile.id,
+            "method": profile.method,
+            "path": profile.path,
+            "status_code": status_code,
+            "duration_ms": round(duration_ms, 1),
+            "loop_thread_cpu_ms": round(cpu_ms, 1),
+            "wall_samples": sum(profile.wall.values()),
+            "cpu_samples": sum(profile.cpu.values()),
+            "interval_ms": settings.profiler_interval_ms,
+            "reason": "slow" if slow else "sampled",
+            "created_at": datetime.now().isoformat()
+        }
+        metadata_path = self.profile_dir / f"{profile.id}.json"
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+
+        self._prune()
+        return metadata_path
+
+    def _prune(self) -> None:
+        """Keep only the most recent profiles."""
+        profiles = sorted(self.profile_dir.glob("*.json"))
+        excess = len(profiles) - settings.profiler_max_profiles
+        for metadata_path in profiles[:max(excess, 0)]:
+            profile_id = metadata_path.stem
+            for path in self.profile_dir.glob(f"{profile_id}.*"):
+                path.unlink(missing_ok=True)
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Metadata of saved profiles, newest first."""
+        if not self.profile_dir.exists():
+            return []
+        profiles = []
+        for metadata_path in sorted(self.profile_dir.glob("*.json"), reverse=True):
+            try:
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def _run(self) -> None:
+        interval = settings.profiler_interval_ms / 1000
+        while True:
+            with self._lock:
+                active = list(self._active.values())
+            if not active:
+                self._wake.clear()
+                self._wake.wait()
+                continue
+            self._sample(active)
+            time.sleep(interval)
+
+    def _sample(self, active: List[ActiveProfile]) -> None:
+        thread_frames = sys._current_frames()
+        for profile in active:
+            tasks = list(profile.tasks)
+            try:
+                running = asyncio.current_task(profile.loop) in tasks
+            except RuntimeError:
+                running = False
+
+            frame = thread_frames.get(profile.thread_id)
+            if running and frame is not None:
+                # On the CPU: the loop thread's stack belongs to this request
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                folded = ";".join(reversed(stack))
+                profile.cpu[folded] += 1
+                profile.wall[folded] += 1
+                continue
+
+            # Suspended: record where the request is waiting, following it
+            # into the tasks it is waiting on
+            labels = []
+            for task in tasks:
+                if task is not profile.task and task.done():
+                    continue
+                try:
+                    labels += _await_chain(task.get_coro())
+                except (RuntimeError, AttributeError, ValueError):
+                    continue
+            if labels:
+                profile.wall[";".join(labels)] += 1
+
+
+# Create singleton instance
+request_profiler = SamplingProfiler()
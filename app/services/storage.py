@@ -0,0 +1,328 @@
+"""
+Tiered temporary storage.
+Keeps small temp files (uploads, conversion outputs) in memory and larger
+ones on disk, behind a file-like interface keyed by path.
+
+Files are still named by their path under the temp directory, so callers
+do not need to know which tier holds them. Paths outside the temp
+directory always go straight to disk.
+
+A file demoted to disk stays readable from memory until its disk copy is
+complete, so it is never missing from both tiers. Writers that put a path
+on disk drop its memory copy first, so a demotion still in flight cannot
+overwrite newer contents.
+"""
+
+import io
+import os
+import time
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Optional, Dict, Iterator, Tuple, List, Set, BinaryIO
+
+
+class MemoryFile:
+    """Contents and modification time of a file held in memory."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.mtime = time.time()
+
+
+class _SpooledWriter(io.RawIOBase):
+    """
+    Write handle that buffers in memory and spills to disk when it grows.
+
+    On close, a file that stayed small is stored in the memory tier;
+    otherwise it is already on disk.
+    """
+
+    def __init__(self, storage: "TieredStorage", path: Path):
+        self._storage = storage
+        self._path = path
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._disk: Optional[BinaryIO] = None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self._buffer is not None:
+            if self._buffer.tell() + len(data) <= self._storage.max_file_bytes:
+                return self._buffer.write(data)
+            # Too large for the memory tier: move what we have to disk
+            self._storage.discard_memory(self._path)
+            self._disk = open(self._path, 'wb')
+            self._disk.write(self._buffer.getbuffer())
+            self._buffer = None
+        return self._disk.write(data)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buffer is not None:
+                self._storage.store(self._path, self._buffer.getvalue())
+            else:
+                self._disk.close()
+                self._storage.discard_memory(self._path)
+        finally:
+            super().close()
+
+
+class TieredStorage:
+    """Memory tier with a hard byte cap in front of the temp directory."""
+
+    def __init__(self, temp_dir: Path, capacity: int, max_file_bytes: int):
+        """
+        Args:
+            temp_dir: Directory used for the disk tier
+            capacity: Maximum total bytes held in memory (0 disables the tier)
+            max_file_bytes: Largest file kept in memory
+        """
+        self.temp_dir = temp_dir
+        self.capacity = capacity
+        self.max_file_bytes = min(max_file_bytes, capacity)
+        self._files: "OrderedDict[str, MemoryFile]" = OrderedDict()
+        self._used = 0
+        # Entries being written to disk and their total size; they still
+        # count as used until they leave memory
+        self._demoting: Set[str] = set()
+        self._demoting_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes currently held in the memory tier."""
+        return self._used
+
+    @property
+    def memory_files(self) -> int:
+        """Number of files currently held in the memory tier."""
+        return len(self._files)
+
+    def _key(self, path: Path) -> Optional[str]:
+        """Memory tier key for a path, or None if it must live on disk."""
+        path = Path(path)
+        if self.capacity <= 0 or path.parent != self.temp_dir:
+            return None
+        return path.name
+
+    def _get(self, path: Path) -> Optional[MemoryFile]:
+        key = self._key(path)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is not None:
+                self._files.move_to_end(key)
+            return entry
+
+    def _pop(self, key: str) -> Optional[MemoryFile]:
+        """Remove an entry from the memory tier. Call with the lock held."""
+        entry = self._files.pop(key, None)
+        if entry is not None:
+            self._used -= len(entry.data)
+        return entry
+
+    def in_memory(self, path: Path) -> bool:
+        """Whether a file is currently held in the memory tier."""
+        key = self._key(path)
+        return key is not None and key in self._files
+
+    def store(self, path: Path, data: bytes) -> None:
+        """
+        Store a complete file in the most suitable tier.
+
+        Small files go to memory, demoting the least recently used files
+        to disk if the memory tier is full. Everything else goes to disk.
+
+        Demoted files leave memory only once written, so the tier can
+        briefly hold more than its capacity while they are.
+        """
+        key = self._key(path)
+        if key is None or len(data) > self.max_file_bytes:
+            self.discard_memory(path)
+            self._write_disk(Path(path), data)
+            return
+
+        demoted: List[Tuple[str, MemoryFile]] = []
+        with self._lock:
+            self._pop(key)
+            for victim_key, entry in self._files.items():
+                if self._used - self._demoting_bytes + len(data) <= self.capacity:
+                    break
+                if victim_key in self._demoting:
+                    continue
+                demoted.append((victim_key, entry))
+                self._demoting.add(victim_key)
+                self._demoting_bytes += len(entry.data)
+            self._files[key] = MemoryFile(data)
+            self._used += len(data)
+
+        for victim_key, entry in demoted:
+            self._demote_entry(victim_key, entry)
+
+    def discard_memory(self, path: Path) -> None:
+        """Drop a file's memory tier copy after it was written to disk."""
+        key = self._key(path)
+        if key is not None:
+            with self._lock:
+                self._pop(key)
+
+    def _write_disk(self, path: Path, data: bytes) -> None:
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def _demote_entry(self, key: str, entry: MemoryFile) -> bool:
+        """
+        Write a memory entry to disk, then drop it from memory.
+
+        The entry stays readable while it is written. If it was deleted or
+        replaced meanwhile, the disk copy is thrown away instead.
+
+        Returns:
+            Whether the entry was moved to disk
+        """
+        path = self.temp_dir / key
+        partial_path = path.with_name(f"{key}.demoting")
+        moved = False
+        try:
+            self._write_disk(partial_path, entry.data)
+            with self._lock:
+                if self._files.get(key) is entry:
+                    os.replace(partial_path, path)
+                    self._pop(key)
+                    moved = True
+            if moved:
+                # Keep the original age so cleanup treats demoted files the same
+                os.utime(path, (entry.mtime, entry.mtime))
+            return moved
+        finally:
+            with self._lock:
+                if key in self._demoting:
+                    self._demoting.discard(key)
+                    self._demoting_bytes -= len(entry.data)
+            if not moved:
+                partial_path.unlink(missing_ok=True)
+
+    def demote(self, path: Path) -> bool:
+        """Move a file from the memory tier to disk."""
+        key = self._key(path)
+        if key is None:
+            return False
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is None or key in self._demoting:
+                return False
+            self._demoting.add(key)
+            self._demoting_bytes += len(entry.data)
+        return self._demote_entry(key, entry)
+
+    def promote(self, path: Path) -> bool:
+        """Move a small file from disk into the memory tier."""
+        path = Path(path)
+        key = self._key(path)
+        if key is None or key in self._files or not path.is_file():
+            return False
+        if path.stat().st_size > self.max_file_bytes:
+            return False
+        self.store(path, path.read_bytes())
+        return True
+
+    def open(self, path: Path, mode: str = 'rb') -> BinaryIO:
+        """
+        Open a file for binary reading ('rb') or writing ('wb').
+
+        Raises:
+            FileNotFoundError: If a file opened for reading does not exist
+        """
+        if mode == 'rb':
+            entry = self._get(path)
+            if entry is not None:
+                return io.BytesIO(entry.data)
+            return open(path, 'rb')
+        if mode == 'wb':
+            if self._key(path) is None:
+                return open(path, 'wb')
+            return _SpooledWriter(self, Path(path))
+        raise ValueError(f"Unsupported mode: {mode}")
+
+    def read_bytes(self, path: Path) -> bytes:
+        """Read a whole file."""
+        entry = self._get(path)
+        if entry is not None:
+            return entry.data
+        return Path(path).read_bytes()
+
+    def exists(self, path: Path) -> bool:
+        return self.in_memory(path) or Path(path).exists()
+
+    def size(self, path: Path) -> int:
+        """
+        Size of a file in bytes.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        entry = self._get(path)
+        if entry is not None:
+            return len(entry.data)
+        return Path(path).stat().st_size
+
+    def delete(self, path: Path) -> bool:
+        """
+        Delete a file from whichever tier holds it.
+
+        Returns:
+            Whether a file was deleted
+        """
+        key = self._key(path)
+        if key is not None:
+            with self._lock:
+                if self._pop(key) is not None:
+                    return True
+        path = Path(path)
+        if path.exists():
+            path.unlink()
+            return True
+        return False
+
+    def replace(self, source: Path, destination: Path) -> None:
+        """Rename a file, moving it between tiers if needed."""
+        source_key = self._key(source)
+        if source_key is not None:
+            with self._lock:
+                entry = self._pop(source_key)
+            if entry is not None:
+                self.store(destination, entry.data)
+                return
+        self.discard_memory(destination)
+        os.replace(source, destination)
+
+    def copy(self, source: Path, destination: Path) -> None:
+        """Copy a file; the copy goes to the tier that suits its size."""
+        with self.open(source, 'rb') as src, self.open(destination, 'wb') as dst:
+            for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                dst.write(chunk)
+
+    def list_files(self) -> Iterator[Tuple[Path, float]]:
+        """(path, modification time) of every file in both tiers."""
+        with self._lock:
+            memory = [(self.temp_dir / key, entry.mtime) for key, entry in self._files.items()]
+        yield from memory
+        for path in self.temp_dir.glob('*'):
+            if path.is_file():
+                try:
+                    yield path, path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+
+    def stats(self) -> Dict[str, int]:
+        """Memory tier usage."""
+        return {
+            "memory_files": self.memory_files,
+            "memory_bytes": self.memory_bytes,
+            "memory_capacity": self.capacity
+        }
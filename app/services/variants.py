@@ -0,0 +1,243 @@
+"""
+Image origin service.
+Stores registered source images and produces resized/re-encoded variants
+of them on first request, keeping each variant in a persistent cache.
+"""
+
+import os
+import uuid
+import hashlib
+import asyncio
+from pathlib import Path
+from typing import Optional, Dict, Any, BinaryIO
+from fastapi import UploadFile
+from app.config import settings
+from app.services.converter import cloudconvert_service
+from app.services.file_io import file_io
+
+# Formats a variant can be served in, most preferred first, with the MIME
+# type a browser lists in Accept when it can display them
+VARIANT_FORMATS = [
+    ("avif", "image/avif"),
+    ("webp", "image/webp"),
+    ("jpeg", "image/jpeg")
+]
+
+CONTENT_TYPES = {fmt: mime for fmt, mime in VARIANT_FORMATS}
+
+
+def _accepted_types(accept: str) -> Dict[str, float]:
+    """Parse an Accept header into {media type: q-value}."""
+    accepted = {}
+    for item in accept.split(","):
+        parts = [p.strip() for p in item.split(";")]
+        if not parts[0]:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[parts[0].lower()] = q
+    return accepted
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    Choose the variant format for a request's Accept header.
+
+    Formats are tried in order of preference; one is chosen if the client
+    lists its MIME type explicitly. JPEG is the fallback every client can
+    display.
+    """
+    accepted = _accepted_types(accept or "")
+    for fmt, mime in VARIANT_FORMATS:
+        if accepted.get(mime, 0) > 0:
+            return fmt
+    return "jpeg"
+
+
+def wants_image(accept: Optional[str]) -> bool:
+    """
+    Whether an Accept header asks for image bytes rather than JSON.
+
+    Only explicit image types count; */* is sent by most HTTP clients and
+    does not express a preference.
+    """
+    accepted = _accepted_types(accept or "")
+    return any(
+        mime.startswith("image/") and q > 0
+        for mime, q in accepted.items()
+    )
+
+
+class VariantCache:
+    """Registered source images and their cached variants."""
+
+    def __init__(self):
+        self._sources: Dict[str, Path] = {}
+        self._in_progress: Dict[str, asyncio.Task] = {}
+
+    @property
+    def sources_dir(self) -> Path:
+        return settings.data_dir / "sources"
+
+    @property
+    def variants_dir(self) -> Path:
+        return settings.data_dir / "variants"
+
+    async def register(self, file: UploadFile, input_format: str) -> Dict[str, Any]:
+        """
+        Register a source image.
+
+        Sources are content-addressed, so registering the same image again
+        returns the existing id.
+
+        Args:
+            file: The uploaded, validated image
+            input_format: Its validated format
+
+        Returns:
+            The source id and whether it was newly created
+        """
+        return await file_io.run(self._register, file.file, input_format)
+
+    def _register(self, source: BinaryIO, input_format: str) -> Dict[str, Any]:
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(chunk)
+        source_id = digest.hexdigest()[:16]
+
+        if self.source_path(source_id) is not None:
+            return {"source_id": source_id, "created": False}
+
+        self.sources_dir.mkdir(parents=True, exist_ok=True)
+        path = self.sources_dir / f"{source_id}.{input_format}"
+        partial_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+        source.seek(0)
+        with open(partial_path, 'wb') as f:
+            for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                f.write(chunk)
+        os.replace(partial_path, path)
+        self._sources[source_id] = path
+        return {"source_id": source_id, "created": True}
+
+    def source_path(self, source_id: str) -> Optional[Path]:
+        """Path of a registered source, or None if it is unknown."""
+        path = self._sources.get(source_id)
+        if path is not None and path.exists():
+            return path
+        matches = [
+            p for p in self.sources_dir.glob(f"{source_id}.*")
+            if not p.name.endswith(".part")
+        ] if self.sources_dir.exists() else []
+        if not matches:
+            self._sources.pop(source_id, None)
+            return None
+        self._sources[source_id] = matches[0]
+        return matches[0]
+
+    @staticmethod
+    def variant_key(
+        source_id: str,
+        output_format: str,
+        width: Optional[int],
+        height: Optional[int],
+        quality: Optional[int]
+    ) -> str:
+        """Name identifying a variant; also used as its ETag."""
+        return f"{source_id}-w{width or 0}-h{height or 0}-q{quality or 0}.{output_format}"
+
+    async def get_variant(
+        self,
+        source_path: Path,
+        key: str,
+        output_format: str,
+        width: Optional[int],
+        height: Optional[int],
+        quality: Optional[int]
+    ) -> Path:
+        """
+        Path of a cached variant, converting it first if needed.
+
+        Concurrent requests for a variant that is not cached yet share a
+        single conversion, which finishes (and is cached) even if the
+        clients waiting for it disconnect.
+
+        Raises:
+            ConversionError: If the conversion fails
+        """
+        path = self.variants_dir / key
+        # Loops again if another conversion's prune deleted the variant
+        # before this request got to serve it
+        while not await file_io.run(path.exists):
+            task = self._in_progress.get(key)
+            if task is None:
+                task = asyncio.create_task(
+                    self._convert(source_path, path, output_format, width, height, quality)
+                )
+                self._in_progress[key] = task
+                task.add_done_callback(lambda t: self._finished(key, t))
+            await asyncio.shield(task)
+        return path
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        self._in_progress.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Waiters re-raise it; this stops "exception never retrieved"
+            # warnings when they have all gone away
+            print(f"Error creating variant {key}: {task.exception()}")
+
+    async def _convert(
+        self,
+        source_path: Path,
+        path: Path,
+        output_format: str,
+        width: Optional[int],
+        height: Optional[int],
+        quality: Optional[int]
+    ) -> None:
+        await file_io.run(self.variants_dir.mkdir, parents=True, exist_ok=True)
+        partial_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+        try:
+            await cloudconvert_service.convert_image(
+                source_path,
+                output_format,
+                partial_path,
+                quality=quality,
+                resize_width=width,
+                resize_height=height
+            )
+            await file_io.run(os.replace, partial_path, path)
+        finally:
+            await file_io.run(partial_path.unlink, missing_ok=True)
+        await file_io.run(self._prune, path)
+
+    def _prune(self, keep: Path) -> None:
+        """Delete the least recently created variants over the size cap, except keep."""
+        if settings.variant_cache_max_mb <= 0:
+            return
+        variants = []
+        for path in self.variants_dir.iterdir():
+            if path.name.endswith(".part"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            variants.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in variants)
+        limit = settings.variant_cache_max_mb * 1024 * 1024
+        for _, size, path in sorted(variants):
+            if total <= limit:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+# Create singleton instance
+variant_cache = VariantCache()
@@ -0,0 +1,86 @@
+"""
+Image header inspection utilities.
+Reads image dimensions from file headers without decoding the image.
+"""
+
+import struct
+from pathlib import Path
+from typing import Optional, Tuple, BinaryIO
+
+
+def get_image_dimensions(file_path: Path) -> Optional[Tuple[int, int]]:
+    """
+    Read the width and height of a PNG, GIF, JPEG or WebP image.
+
+    Args:
+        file_path: Path to the image file
+
+    Returns:
+        (width, height), or None if the format is not recognised
+    """
+    with open(file_path, 'rb') as f:
+        return read_image_dimensions(f)
+
+
+def read_image_dimensions(f: BinaryIO) -> Optional[Tuple[int, int]]:
+    """
+    Read image dimensions from an open, seekable binary file.
+
+    Args:
+        f: File object positioned at the start of the image
+
+    Returns:
+        (width, height), or None if the format is not recognised
+    """
+    header = f.read(32)
+
+    # PNG: dimensions are in the IHDR chunk right after the signature
+    if header.startswith(b'\x89PNG\r\n\x1a\n') and header[12:16] == b'IHDR':
+        return struct.unpack('>II', header[16:24])
+
+    # GIF: logical screen size follows the signature
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', header[6:10])
+
+    # WebP: RIFF container with a VP8, VP8L or VP8X chunk
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        chunk = header[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', header[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = struct.unpack('<I', header[21:25])[0]
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            width = int.from_bytes(header[24:27], 'little') + 1
+            height = int.from_bytes(header[27:30], 'little') + 1
+            return width, height
+        return None
+
+    # JPEG: walk the segments until a start-of-frame marker
+    if header[:2] == b'\xff\xd8':
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            code = marker[1]
+            if code == 0xFF:
+                # Fill byte before the real marker
+                f.seek(-1, 1)
+                continue
+            if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+                # Standalone markers carry no length
+                continue
+            length_bytes = f.read(2)
+            if len(length_bytes) < 2:
+                return None
+            length = struct.unpack('>H', length_bytes)[0]
+            if code in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                        0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                data = f.read(5)
+                height, width = struct.unpack('>HH', data[1:5])
+                return width, height
+            f.seek(length - 2, 1)
+
+    return None
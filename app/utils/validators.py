@@ -4,9 +4,12 @@ Validates file types, sizes, and formats before processing.
 """
 
 import os
+import hmac
+import json
+import hashlib
 import magic
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Dict, Any
 from fastapi import UploadFile, HTTPException
 from app.config import settings
 
@@ -16,12 +19,13 @@ def get_file_extension(filename: str) -> str:
     return Path(filename).suffix.lower().lstrip('.')
 
 
-def validate_file_size(file: UploadFile) -> None:
+def validate_file_size(file: UploadFile, max_bytes: Optional[int] = None) -> None:
     """
     Validate that file size is within allowed limits.
     
     Args:
         file: The uploaded file
+        max_bytes: Optional limit in bytes (defaults to the max file size)
         
     Raises:
         HTTPException: If file is too large
@@ -31,8 +35,25 @@ def validate_file_size(file: UploadFile) -> None:
     file_size = file.file.tell()
     file.file.seek(0)  # Reset to beginning
     
-    if file_size > settings.max_file_size_bytes:
-        max_mb = settings.max_file_size_mb
+    validate_byte_count(file_size, max_bytes)
+
+
+def validate_byte_count(file_size: int, max_bytes: Optional[int] = None) -> None:
+    """
+    Validate that a file size in bytes is within allowed limits.
+    
+    Args:
+        file_size: Size of the file in bytes
+        max_bytes: Optional limit in bytes (defaults to the max file size)
+        
+    Raises:
+        HTTPException: If file is too large
+    """
+    if max_bytes is None:
+        max_bytes = settings.max_file_size_bytes
+    
+    if file_size > max_bytes:
+        max_mb = max_bytes // (1024 * 1024)
         actual_mb = round(file_size / (1024 * 1024), 2)
         raise HTTPException(
             status_code=413,
@@ -95,16 +116,60 @@ def validate_output_format(output_format: str) -> str:
     """
     output_format = output_format.lower().strip()
     
-    if output_format not in settings.supported_formats:
+    if output_format not in settings.output_formats:
         raise HTTPException(
             status_code=400,
             detail=f"Unsupported output format: {output_format}. "
-                   f"Supported formats: {', '.join(settings.supported_formats)}"
+                   f"Supported formats: {', '.join(settings.output_formats)}"
         )
     
     return output_format
 
 
+def validate_format_options(
+    output_format: str,
+    quality: Optional[int] = None,
+    speed: Optional[str] = None
+) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Validate options that only apply to some output formats.
+    
+    Args:
+        output_format: The validated output format
+        quality: Optional quality (JPEG, WebP and AVIF only)
+        speed: Optional encoder speed preset (AVIF only)
+        
+    Returns:
+        Tuple of validated (quality, speed)
+        
+    Raises:
+        HTTPException: If an option is invalid or not supported by the format
+    """
+    if quality is not None:
+        quality = validate_quality(quality)
+        if output_format not in settings.lossy_formats:
+            raise HTTPException(
+                status_code=400,
+                detail="Quality is only supported for JPEG, WebP and AVIF output formats"
+            )
+    
+    if speed is not None:
+        speed = speed.lower().strip()
+        if output_format != "avif":
+            raise HTTPException(
+                status_code=400,
+                detail="Speed is only supported for AVIF output"
+            )
+        if speed not in settings.avif_speed_presets:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown speed preset: {speed}. "
+                       f"Presets: {', '.join(settings.avif_speed_presets)}"
+            )
+    
+    return quality, speed
+
+
 def sanitize_filename(filename: str) -> str:
     """
     Sanitize filename to prevent directory traversal and other issues.
@@ -152,6 +217,29 @@ def validate_quality(quality: int) -> int:
     return quality
 
 
+def validate_max_bytes(max_bytes: int) -> int:
+    """
+    Validate a target output size.
+    
+    Args:
+        max_bytes: Maximum output size in bytes
+        
+    Returns:
+        Validated byte budget
+        
+    Raises:
+        HTTPException: If the budget is out of range
+    """
+    min_bytes = 1024
+    if max_bytes < min_bytes or max_bytes > settings.max_file_size_bytes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"max_bytes must be between {min_bytes} and "
+                   f"{settings.max_file_size_bytes} bytes"
+        )
+    return max_bytes
+
+
 def validate_resize_dimensions(
     width: Optional[int],
     height: Optional[int]
@@ -185,3 +273,197 @@ def validate_resize_dimensions(
             )
     
     return width, height
+
+
+# Transform pipeline operations and the parameters each one takes
+PIPELINE_OPERATIONS = {
+    "auto_orient": [],
+    "strip": [],
+    "crop": ["x", "y", "width", "height"],
+    "rotate": ["degrees"],
+    "watermark": ["text", "position", "opacity", "font_size"]
+}
+
+WATERMARK_POSITIONS = [
+    "top-left", "top", "top-right",
+    "left", "center", "right",
+    "bottom-left", "bottom", "bottom-right"
+]
+
+
+def _pipeline_int(
+    step: Dict[str, Any],
+    name: str,
+    low: int,
+    high: int,
+    default: Optional[int] = None
+) -> int:
+    """Read an integer step parameter and check its range."""
+    value = step.get(name, default)
+    if value is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pipeline step {step['op']} needs {name}"
+        )
+    if isinstance(value, bool) or not isinstance(value, int) or value < low or value > high:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pipeline step {step['op']}: {name} must be a whole number "
+                   f"between {low} and {high}"
+        )
+    return value
+
+
+def validate_pipeline(pipeline: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Validate a transform pipeline.
+    
+    The pipeline is a JSON list of steps applied in order before the image
+    is resized and converted, for example
+    [{"op": "auto_orient"}, {"op": "crop", "width": 800, "height": 600}].
+    
+    Args:
+        pipeline: JSON-encoded list of steps, or None
+        
+    Returns:
+        The steps with defaults filled in, or None for an empty pipeline
+        
+    Raises:
+        HTTPException: If the pipeline or one of its steps is invalid
+    """
+    if pipeline is None or not pipeline.strip():
+        return None
+    
+    try:
+        steps = json.loads(pipeline)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Pipeline must be a JSON list of steps")
+    if not isinstance(steps, list) or not all(isinstance(s, dict) for s in steps):
+        raise HTTPException(status_code=400, detail="Pipeline must be a JSON list of steps")
+    if len(steps) > settings.pipeline_max_steps:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pipeline has too many steps. Maximum is {settings.pipeline_max_steps}"
+        )
+    
+    max_dimension = 10000
+    validated = []
+    for step in steps:
+        op = step.get("op")
+        if op not in PIPELINE_OPERATIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown pipeline step: {op}. "
+                       f"Steps: {', '.join(PIPELINE_OPERATIONS)}"
+            )
+        unknown = set(step) - {"op"} - set(PIPELINE_OPERATIONS[op])
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Pipeline step {op} does not take {', '.join(sorted(unknown))}"
+            )
+        
+        if op == "crop":
+            step = {
+                "op": op,
+                "x": _pipeline_int(step, "x", 0, max_dimension, default=0),
+                "y": _pipeline_int(step, "y", 0, max_dimension, default=0),
+                "width": _pipeline_int(step, "width", 1, max_dimension),
+                "height": _pipeline_int(step, "height", 1, max_dimension)
+            }
+        elif op == "rotate":
+            step = {"op": op, "degrees": _pipeline_int(step, "degrees", -359, 359)}
+        elif op == "watermark":
+            text = step.get("text")
+            if not isinstance(text, str) or not text.strip():
+                raise HTTPException(status_code=400, detail="Pipeline step watermark needs text")
+            if len(text) > settings.watermark_max_text_length:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Watermark text is too long. Maximum is "
+                           f"{settings.watermark_max_text_length} characters"
+                )
+            position = step.get("position", "bottom-right")
+            if position not in WATERMARK_POSITIONS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown watermark position: {position}. "
+                           f"Positions: {', '.join(WATERMARK_POSITIONS)}"
+                )
+            step = {
+                "op": op,
+                "text": text,
+                "position": position,
+                "opacity": _pipeline_int(step, "opacity", 1, 100, default=50),
+                "font_size": _pipeline_int(step, "font_size", 6, 500, default=36)
+            }
+        else:
+            step = {"op": op}
+        validated.append(step)
+    
+    return validated or None
+
+
+def validate_source_id(source_id: str) -> str:
+    """
+    Validate the id of a registered source image.
+    
+    Args:
+        source_id: Source id from the URL
+        
+    Returns:
+        The source id
+        
+    Raises:
+        HTTPException: If the id is malformed (reported as not found)
+    """
+    if len(source_id) != 16 or any(c not in "0123456789abcdef" for c in source_id):
+        raise HTTPException(status_code=404, detail="Source image not found")
+    return source_id
+
+
+def validate_webhook_signature(payload: bytes, signature: Optional[str]) -> None:
+    """
+    Validate the signature of a CloudConvert webhook.
+    
+    CloudConvert signs the raw request body with HMAC-SHA256 using the
+    webhook signing secret and sends the hex digest in the
+    CloudConvert-Signature header.
+    
+    Args:
+        payload: The raw request body
+        signature: Value of the CloudConvert-Signature header
+        
+    Raises:
+        HTTPException: If webhooks are not configured or the signature is invalid
+    """
+    secret = settings.cloudconvert_webhook_secret
+    if not secret:
+        raise HTTPException(
+            status_code=503,
+            detail="Webhooks are not configured"
+        )
+    
+    expected = hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+    if not signature or not hmac.compare_digest(expected, signature):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid webhook signature"
+        )
+
+
+def validate_profiler_token(token: Optional[str]) -> None:
+    """
+    Validate access to the profiler endpoints.
+    
+    Args:
+        token: Value of the X-Profiler-Token header
+        
+    Raises:
+        HTTPException: If profiling is disabled or the token is wrong
+    """
+    if not settings.profiler_enabled or not settings.profiler_token:
+        raise HTTPException(status_code=404, detail="Not found")
+    
+    if not token or not hmac.compare_digest(token, settings.profiler_token):
+        raise HTTPException(status_code=403, detail="Invalid profiler token")
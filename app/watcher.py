@@ -0,0 +1,422 @@
+"""
+Watch-folder conversion daemon.
+Watches an input directory and converts new or changed images into an
+output directory, using the same converter and manifest as the bulk CLI.
+
+Change detection uses inotify on Linux and falls back to polling an mtime
+index elsewhere. Files are only converted once their size and mtime have
+been stable for the debounce period, so partially written files are left
+alone until the writer is done.
+
+The watcher runs inside the server's event loop, so directory walks, stats
+and hashing run in the file I/O pool; watcher state is only changed on the
+loop.
+"""
+
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import struct
+import asyncio
+from pathlib import Path
+from typing import Optional, Dict, Set, Tuple, List, Callable
+from fastapi import HTTPException
+from app.config import settings
+from app.cli import BulkConverter
+from app.services.file_io import file_io
+from app.utils.validators import validate_file_format, validate_output_format
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+FileSignature = Tuple[float, int]
+
+
+class InotifyBackend:
+    """Recursive directory watch built on Linux inotify (via ctypes)."""
+
+    def __init__(self, root: Path, on_change: Callable[[Path], None], on_overflow: Callable[[], None]):
+        self.root = root
+        self.on_change = on_change
+        self.on_overflow = on_overflow
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def available() -> bool:
+        """Whether inotify can be used on this platform."""
+        if not sys.platform.startswith("linux"):
+            return False
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            return hasattr(ctypes.CDLL(libc_name), "inotify_init1")
+        except OSError:
+            return False
+
+    @staticmethod
+    def _walk(directory: Path) -> Tuple[List[Path], List[Path]]:
+        """Directories and files of a tree (blocking)."""
+        dirs, files = [], []
+        for root, _, names in os.walk(directory):
+            dirs.append(Path(root))
+            files.extend(Path(root) / name for name in names)
+        return dirs, files
+
+    async def add_tree(self, directory: Path, report: bool) -> None:
+        """Watch a directory and all of its subdirectories."""
+        dirs, files = await file_io.run(self._walk, directory)
+        for path in dirs:
+            self._add_watch(path)
+        if report:
+            # New subtree: pick up files already inside
+            for path in files:
+                self.on_change(path)
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            print(f"Cannot watch {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._dirs[wd] = directory
+
+    async def start(self) -> None:
+        await self.add_tree(self.root, report=False)
+        asyncio.get_running_loop().add_reader(self._fd, self._read_events)
+
+    def stop(self) -> None:
+        try:
+            asyncio.get_running_loop().remove_reader(self._fd)
+        except RuntimeError:
+            pass
+        for task in list(self._tasks):
+            task.cancel()
+        os.close(self._fd)
+
+    async def poll(self) -> None:
+        """Nothing to do: inotify pushes events to the reader callback."""
+
+    def _read_events(self) -> None:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self.on_overflow()
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    task = asyncio.create_task(self.add_tree(path, report=True))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                continue
+
+            self.on_change(path)
+
+
+class PollingBackend:
+    """
+    Portable fallback that polls an mtime index.
+
+    Each poll only stats directories and rescans those whose mtime changed
+    (files added, removed or renamed). Files modified in place do not touch
+    their directory's mtime; to catch those too, set ``rescan_seconds`` and
+    a full stat sweep runs that often. It is off by default, so an idle
+    watch only stats directories.
+
+    Scans run in the file I/O pool and only touch the index, one at a
+    time; changed paths are reported back on the event loop.
+    """
+
+    def __init__(self, root: Path, on_change: Callable[[Path], None], rescan_seconds: float = 0):
+        self.root = root
+        self.on_change = on_change
+        self.rescan_seconds = rescan_seconds
+        self._dir_mtimes: Dict[Path, float] = {}
+        self._files: Dict[Path, FileSignature] = {}
+        self._last_full_scan = time.monotonic()
+
+    async def start(self) -> None:
+        await file_io.run(self._scan_tree, self.root, None)
+
+    def stop(self) -> None:
+        pass
+
+    async def poll(self) -> None:
+        for path in await file_io.run(self._changed_paths):
+            self.on_change(path)
+
+    def _changed_paths(self) -> List[Path]:
+        """Update the index and return files that changed (blocking)."""
+        changed: List[Path] = []
+        now = time.monotonic()
+        if self.rescan_seconds > 0 and now - self._last_full_scan >= self.rescan_seconds:
+            self._last_full_scan = now
+            self._scan_tree(self.root, changed)
+            return changed
+
+        for directory, old_mtime in list(self._dir_mtimes.items()):
+            try:
+                mtime = directory.stat().st_mtime
+            except FileNotFoundError:
+                self._forget_dir(directory)
+                continue
+            if mtime != old_mtime:
+                self._scan_dir(directory, changed)
+        return changed
+
+    def _scan_tree(self, directory: Path, changed: Optional[List[Path]]) -> None:
+        for root, _, _ in os.walk(directory):
+            self._scan_dir(Path(root), changed)
+
+    def _scan_dir(self, directory: Path, changed: Optional[List[Path]]) -> None:
+        """Index a directory, adding changed files to changed (if given)."""
+        try:
+            self._dir_mtimes[directory] = directory.stat().st_mtime
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            self._forget_dir(directory)
+            return
+
+        for entry in entries:
+            path = Path(entry.path)
+            if entry.is_dir(follow_symlinks=False):
+                if path not in self._dir_mtimes:
+                    self._scan_tree(path, changed)
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_mtime, stat.st_size)
+            if self._files.get(path) != signature:
+                self._files[path] = signature
+                if changed is not None:
+                    changed.append(path)
+
+    def _forget_dir(self, directory: Path) -> None:
+        self._dir_mtimes.pop(directory, None)
+        for path in [p for p in self._files if p.parent == directory]:
+            del self._files[path]
+
+
+class FolderWatcher:
+    """Converts files dropped into a watched folder."""
+
+    def __init__(
+        self,
+        input_dir: Path,
+        output_dir: Path,
+        output_format: str,
+        concurrency: int = 4,
+        debounce_seconds: float = 2.0,
+        poll_interval: float = 5.0,
+        rescan_seconds: float = 0,
+        quality: Optional[int] = None,
+        resize_width: Optional[int] = None,
+        resize_height: Optional[int] = None,
+        use_inotify: Optional[bool] = None
+    ):
+        self.input_dir = input_dir.resolve()
+        self.output_dir = output_dir.resolve()
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.rescan_seconds = rescan_seconds
+        self.converter = BulkConverter(
+            self.input_dir,
+            self.output_dir,
+            output_format,
+            quality=quality,
+            resize_width=resize_width,
+            resize_height=resize_height
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # path -> (last seen signature, monotonic time it was first seen)
+        self._pending: Dict[Path, Tuple[Optional[FileSignature], float]] = {}
+        self._in_progress: Set[Path] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._rescan_requested = False
+
+        if use_inotify is None:
+            use_inotify = InotifyBackend.available()
+        self._use_inotify = use_inotify
+        self._backend = None
+
+    def mark(self, path: Path) -> None:
+        """Queue a path for conversion once it stops changing."""
+        if self.output_dir in path.parents or path == self.output_dir:
+            return
+        try:
+            validate_file_format(path.name)
+        except HTTPException:
+            return
+        self._pending[path] = (None, time.monotonic())
+
+    def request_rescan(self) -> None:
+        """Rescan the input tree on the next tick (inotify lost events)."""
+        self._rescan_requested = True
+
+    def _stale_sources(self) -> List[Path]:
+        """Files in the input tree without an up-to-date output (blocking)."""
+        stale = []
+        for source in self.converter.find_sources():
+            try:
+                stat = source.stat()
+            except FileNotFoundError:
+                continue
+            if not self.converter.is_up_to_date(source, stat):
+                stale.append(source)
+        return stale
+
+    async def rescan(self) -> None:
+        """Queue every file in the input tree that has no up-to-date output."""
+        for source in await file_io.run(self._stale_sources):
+            self.mark(source)
+
+    @staticmethod
+    def _signatures(paths: List[Path]) -> Dict[Path, Optional[FileSignature]]:
+        """Current (mtime, size) of each path, None if it is gone (blocking)."""
+        signatures: Dict[Path, Optional[FileSignature]] = {}
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                signatures[path] = None
+                continue
+            signatures[path] = (stat.st_mtime, stat.st_size)
+        return signatures
+
+    async def _dispatch_stable(self) -> None:
+        """Start conversions for pending files whose size and mtime have settled."""
+        signatures = await file_io.run(self._signatures, list(self._pending))
+        now = time.monotonic()
+        for path, signature in signatures.items():
+            if path not in self._pending:
+                continue
+            last_signature, since = self._pending[path]
+            if signature is None:
+                del self._pending[path]
+                continue
+
+            if signature != last_signature:
+                self._pending[path] = (signature, now)
+                continue
+            if now - since < self.debounce_seconds or path in self._in_progress:
+                continue
+
+            del self._pending[path]
+            self._in_progress.add(path)
+            task = asyncio.create_task(self._convert(path))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _convert(self, path: Path) -> None:
+        try:
+            async with self._semaphore:
+                result = await self.converter.convert_one(path)
+            if result == "converted":
+                print(f"✅ Converted {path.relative_to(self.input_dir)}")
+            elif result == "failed":
+                print(f"❌ {self.converter.stats.failures[-1]}")
+        except FileNotFoundError:
+            pass
+        finally:
+            self._in_progress.discard(path)
+
+    async def run(self) -> None:
+        """Watch until cancelled."""
+        await file_io.run(self.input_dir.mkdir, parents=True, exist_ok=True)
+        await file_io.run(self.output_dir.mkdir, parents=True, exist_ok=True)
+
+        if self._use_inotify:
+            self._backend = InotifyBackend(self.input_dir, self.mark, self.request_rescan)
+            mode = "inotify"
+        else:
+            self._backend = PollingBackend(self.input_dir, self.mark, self.rescan_seconds)
+            mode = f"polling every {self.poll_interval:g}s"
+        await self._backend.start()
+        print(f"👀 Watching {self.input_dir} -> {self.output_dir} ({mode})")
+
+        # Catch up on anything added while we were not running; the manifest
+        # makes this cheap for files that are already converted
+        await self.rescan()
+
+        tick = min(self.debounce_seconds / 2, self.poll_interval) if self.debounce_seconds else 0.5
+        last_poll = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(tick)
+                if time.monotonic() - last_poll >= self.poll_interval:
+                    await self._backend.poll()
+                    last_poll = time.monotonic()
+                if self._rescan_requested:
+                    self._rescan_requested = False
+                    await self.rescan()
+                if self._pending:
+                    await self._dispatch_stable()
+        finally:
+            self._backend.stop()
+            for task in list(self._tasks):
+                task.cancel()
+            self.converter.manifest.close()
+
+
+def watcher_from_settings(
+    input_dir: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+    output_format: Optional[str] = None
+) -> FolderWatcher:
+    """
+    Build a FolderWatcher from settings, with optional overrides.
+
+    Raises:
+        ValueError: If the input or output directory is not configured
+        HTTPException: If the output format is not supported
+    """
+    input_dir = input_dir or settings.watch_input_dir
+    output_dir = output_dir or settings.watch_output_dir
+    if not input_dir or not output_dir:
+        raise ValueError("Both a watch input and output directory are required")
+
+    return FolderWatcher(
+        Path(input_dir),
+        Path(output_dir),
+        validate_output_format(output_format or settings.watch_output_format),
+        concurrency=settings.watch_concurrency,
+        debounce_seconds=settings.watch_debounce_seconds,
+        poll_interval=settings.watch_poll_interval,
+        rescan_seconds=settings.watch_rescan_seconds
+    )
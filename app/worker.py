@@ -0,0 +1,218 @@
+"""
+Conversion worker.
+Leases jobs from the durable queue, converts them with the CloudConvert
+service and publishes the results to the shared temp directory, where the
+web server picks them up. Run one or more with:
+    python run.py --worker [--processes 4]
+
+While a job is being converted its lease is renewed; if the renewal fails
+(the client cancelled it, or the lease ran out and another worker took
+over) the conversion is stopped.
+"""
+
+import signal
+import sqlite3
+import asyncio
+from pathlib import Path
+from typing import Optional, Dict, Any, Set, Tuple
+from app.config import settings
+from app.services.converter import cloudconvert_service
+from app.services.file_handler import file_handler
+from app.services.file_io import file_io
+from app.services.import_pool import import_pool
+from app.services.job_journal import job_journal
+from app.services.job_queue import job_queue, new_worker_id, STATUS_CANCELLED
+from app.services.key_pool import key_pool
+
+
+class ConversionWorker:
+    """Runs queued conversions with bounded concurrency."""
+
+    def __init__(self, concurrency: Optional[int] = None, worker_id: Optional[str] = None):
+        self.concurrency = max(1, concurrency or settings.worker_concurrency)
+        self.worker_id = worker_id or new_worker_id()
+        self.lease_seconds = settings.queue_lease_seconds
+        self._tasks: Set[asyncio.Task] = set()
+        self.completed = 0
+        self.failed = 0
+
+    async def run(self) -> None:
+        """Lease and convert jobs until cancelled."""
+        # Job notifications go to the web server, so poll CloudConvert
+        cloudconvert_service.receives_webhooks = False
+        background = []
+        if import_pool.enabled and key_pool.configured:
+            background.append(asyncio.create_task(import_pool.run()))
+        if len(key_pool.keys) > 1 and settings.key_credits_refresh_seconds > 0:
+            background.append(asyncio.create_task(key_pool.refresh_credits_periodically()))
+
+        print(f"👷 Worker {self.worker_id} running {self.concurrency} conversions at a time")
+        try:
+            while True:
+                if len(self._tasks) >= self.concurrency:
+                    await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                try:
+                    job = await file_io.run(job_queue.lease, self.worker_id, self.lease_seconds)
+                except sqlite3.Error as e:
+                    print(f"Could not read the job queue: {e}")
+                    job = None
+                if job is None:
+                    await asyncio.sleep(settings.queue_poll_interval)
+                    continue
+                task = asyncio.create_task(self._process(job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            for task in [*self._tasks, *background]:
+                task.cancel()
+            await asyncio.gather(*self._tasks, *background, return_exceptions=True)
+            job_queue.close()
+            job_journal.close()
+            file_io.shutdown()
+
+    async def _process(self, job: Dict[str, Any]) -> None:
+        """Convert one leased job, keeping its lease alive meanwhile."""
+        job_id = job["id"]
+        payload = job["payload"]
+        input_path = Path(payload["input_path"])
+        output_path = Path(payload["output_path"])
+        # Each lease converts into its own file, so a worker that lost the
+        # job can never delete or truncate the output of the one that took
+        # it over; the result is renamed into place once complete
+        attempt_path = output_path.with_name(
+            f"{output_path.stem}.attempt-{job['attempts']}{output_path.suffix}"
+        )
+        conversion = asyncio.create_task(self._convert(payload, attempt_path))
+
+        try:
+            while not conversion.done():
+                await asyncio.wait({conversion}, timeout=self.lease_seconds / 3)
+                if conversion.done():
+                    break
+                held = await file_io.run(job_queue.renew, job_id, self.worker_id, self.lease_seconds)
+                if not held:
+                    conversion.cancel()
+                    await asyncio.gather(conversion, return_exceptions=True)
+        except asyncio.CancelledError:
+            # Shutting down: let another worker pick the job up at once
+            conversion.cancel()
+            await asyncio.gather(conversion, return_exceptions=True)
+            await file_io.run(job_queue.release, job_id, self.worker_id)
+            await file_handler.delete_file(attempt_path)
+            raise
+
+        if conversion.cancelled():
+            print(f"Stopped job {job_id}: no longer leased by this worker")
+            await file_handler.delete_file(attempt_path)
+            await self._discard_if_cancelled(job_id, input_path)
+            return
+
+        error = conversion.exception()
+        if error is None:
+            journal_id, result = conversion.result()
+            await file_handler.move_file(attempt_path, output_path)
+            if journal_id is not None:
+                await file_io.run(job_journal.update, journal_id, output_path=output_path)
+            if await file_io.run(job_queue.complete, job_id, self.worker_id, result):
+                self.completed += 1
+                await file_handler.delete_file(input_path)
+            elif await self._discard_if_cancelled(job_id, input_path):
+                # Cancelled while finishing: nobody will collect the output
+                await file_handler.delete_file(output_path)
+            return
+
+        self.failed += 1
+        print(f"Job {job_id} failed (attempt {job['attempts']}): {error}")
+        await file_handler.delete_file(attempt_path)
+        recorded = await file_io.run(
+            job_queue.fail, job_id, self.worker_id, job["attempts"], str(error)
+        )
+        if recorded and job["attempts"] >= settings.queue_max_attempts:
+            await file_handler.delete_file(input_path)
+
+    async def _discard_if_cancelled(self, job_id: str, input_path: Path) -> bool:
+        """
+        Delete a lost job's input unless another worker now holds the job.
+
+        Returns:
+            Whether the job was cancelled (or is gone)
+        """
+        current = await file_io.run(job_queue.get, job_id)
+        if current is not None and current["status"] != STATUS_CANCELLED:
+            return False
+        await file_handler.delete_file(input_path)
+        return True
+
+    async def _convert(
+        self,
+        payload: Dict[str, Any],
+        output_path: Path
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Run the conversion described by a job payload.
+
+        Args:
+            payload: The job payload
+            output_path: Where this attempt writes its result
+
+        Returns:
+            The journal entry id (None for max_bytes conversions, which are
+            not journaled) and extra result fields for the API response
+            (target size details for max_bytes conversions)
+        """
+        input_path = Path(payload["input_path"])
+        options = payload["options"]
+
+        if payload.get("max_bytes") is not None:
+            return None, await cloudconvert_service.convert_to_size(
+                input_path,
+                options["output_format"],
+                output_path,
+                payload["max_bytes"],
+                resize_width=options["resize_width"],
+                resize_height=options["resize_height"],
+                allow_downscale=payload.get("allow_downscale", True),
+                pipeline=options.get("pipeline")
+            )
+
+        journal_id = await file_io.run(job_journal.create, payload["input_hash"], options, output_path)
+        await cloudconvert_service.convert_image(
+            input_path,
+            options["output_format"],
+            output_path,
+            quality=options["quality"],
+            resize_width=options["resize_width"],
+            resize_height=options["resize_height"],
+            journal_id=journal_id,
+            speed=options.get("speed"),
+            pipeline=options.get("pipeline")
+        )
+        return journal_id, {}
+
+
+async def run_until_stopped(worker: ConversionWorker) -> None:
+    """
+    Run a worker until SIGINT or SIGTERM, then let it put its jobs back.
+
+    Only the first signal counts, so a second one cannot interrupt the
+    shutdown half way.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(worker.run())
+    stopping = False
+
+    def stop() -> None:
+        nonlocal stopping
+        if not stopping:
+            stopping = True
+            task.cancel()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop)
+    try:
+        await task
+    except asyncio.CancelledError:
+        if not stopping:
+            raise
+    print(f"👷 Worker {worker.worker_id} stopped ({worker.completed} converted, {worker.failed} failed)")
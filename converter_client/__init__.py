@@ -0,0 +1,21 @@
+"""
+Python client for Jim's File Converter.
+Wraps the convert, download, ZIP batch and health endpoints with pooled
+connections, retries and streamed file transfers.
+
+    from converter_client import AsyncConverterClient, ConverterClient
+"""
+
+from converter_client.client import (
+    AsyncConverterClient,
+    ConversionResult,
+    ConverterError
+)
+from converter_client.sync import ConverterClient
+
+__all__ = [
+    "AsyncConverterClient",
+    "ConverterClient",
+    "ConversionResult",
+    "ConverterError"
+]
@@ -0,0 +1,469 @@
+"""
+Async client for the converter's HTTP API.
+All calls share one pooled keep-alive connection set, transient failures
+are retried with exponential backoff, and files are streamed from and to
+disk rather than held in memory.
+"""
+
+import os
+import json
+import random
+import asyncio
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Iterable, AsyncIterator, Union, Set
+import httpx
+
+# Responses worth retrying: rate limits, the in-flight byte budget and
+# gateway/restart errors. 500 means the conversion itself failed.
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Final statuses of a queued conversion (server in worker mode)
+JOB_DONE_STATUSES = {"finished", "failed", "cancelled"}
+
+CHUNK_SIZE = 256 * 1024
+
+PathLike = Union[str, os.PathLike]
+
+
+class ConverterError(Exception):
+    """A request the server rejected or that kept failing."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class ConversionResult:
+    """Outcome of one conversion."""
+    source: Path
+    output_format: str
+    output_path: Optional[Path] = None
+    output_filename: Optional[str] = None
+    download_url: Optional[str] = None
+    input_format: Optional[str] = None
+    error: Optional[str] = None
+    # Extra fields the server returned (e.g. quality and attempts for max_bytes)
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _form_fields(
+    output_format: str,
+    quality: Optional[int],
+    speed: Optional[str],
+    resize_width: Optional[int],
+    resize_height: Optional[int],
+    max_bytes: Optional[int],
+    allow_downscale: bool,
+    pipeline: Optional[List[Dict[str, Any]]]
+) -> Dict[str, str]:
+    """Form fields for /api/convert, leaving out unset options."""
+    fields = {"output_format": output_format}
+    optional = {
+        "quality": quality,
+        "speed": speed,
+        "resize_width": resize_width,
+        "resize_height": resize_height,
+        "max_bytes": max_bytes
+    }
+    fields.update({name: str(value) for name, value in optional.items() if value is not None})
+    if max_bytes is not None and not allow_downscale:
+        fields["allow_downscale"] = "false"
+    if pipeline:
+        fields["pipeline"] = json.dumps(pipeline)
+    return fields
+
+
+def _error_detail(response: httpx.Response) -> str:
+    """The server's error message for a failed (already read) response."""
+    try:
+        body = response.json()
+    except ValueError:
+        return response.text or response.reason_phrase
+    if isinstance(body, dict):
+        return str(body.get("detail") or body.get("error") or body)
+    return str(body)
+
+
+def _filename(response: httpx.Response) -> Optional[str]:
+    """Filename from a Content-Disposition header."""
+    disposition = response.headers.get("content-disposition", "")
+    _, _, name = disposition.partition('filename="')
+    return name.rstrip('"') or None
+
+
+class AsyncConverterClient:
+    """
+    Async client for one converter server.
+
+    Use it as an async context manager (or call aclose()) so its pooled
+    connections are closed:
+
+        async with AsyncConverterClient("http://localhost:8000") as client:
+            result = await client.convert("photo.png", "webp", output_path="photo.webp")
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:8000",
+        timeout: float = 300.0,
+        max_connections: int = 10,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        poll_interval: float = 1.0
+    ):
+        """
+        Args:
+            base_url: Server address
+            timeout: Seconds to wait for a response (conversions can be slow)
+            max_connections: Connections kept open to the server
+            retries: Extra attempts for transient failures
+            backoff: Delay before the first retry, doubled for each one after
+            max_backoff: Longest delay between retries
+            poll_interval: Seconds between status checks of a queued
+                conversion
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    async def __aenter__(self) -> "AsyncConverterClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self._client.aclose()
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Seconds to wait before retry number attempt (from 1)."""
+        if response is not None:
+            retry_after = response.headers.get("retry-after", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+        # Jitter so clients that failed together do not retry together
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        upload: Optional[Path] = None,
+        data: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """
+        Send a request, retrying transient failures, and return the open
+        (unread) response.
+
+        The upload is reopened for every attempt and streamed from disk.
+        The caller must close the response.
+
+        Raises:
+            ConverterError: If the server rejects the request or it still
+                fails after the last retry
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            response = None
+            try:
+                if upload is not None:
+                    with open(upload, 'rb') as f:
+                        request = self._client.build_request(
+                            method, url, data=data, params=params,
+                            files={"file": (upload.name, f, "application/octet-stream")}
+                        )
+                        response = await self._client.send(request, stream=True)
+                else:
+                    request = self._client.build_request(method, url, params=params)
+                    response = await self._client.send(request, stream=True)
+            except httpx.TransportError as e:
+                if attempt > self.retries:
+                    raise ConverterError(f"{method} {url} failed: {e}")
+            else:
+                if response.status_code < 400:
+                    return response
+                await response.aread()
+                await response.aclose()
+                if response.status_code not in RETRY_STATUSES or attempt > self.retries:
+                    raise ConverterError(_error_detail(response), response.status_code)
+
+            await asyncio.sleep(self._delay(attempt, response))
+
+    async def _save(self, response: httpx.Response, output_path: Path) -> Path:
+        """Stream a response body to a file, replacing it only when complete."""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = output_path.with_name(output_path.name + ".part")
+        try:
+            with open(partial_path, 'wb') as f:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(partial_path, output_path)
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
+        finally:
+            await response.aclose()
+        return output_path
+
+    async def _json(self, method: str, url: str) -> Dict[str, Any]:
+        response = await self._send(method, url)
+        try:
+            await response.aread()
+            return response.json()
+        finally:
+            await response.aclose()
+
+    async def health(self) -> Dict[str, Any]:
+        """Server status (GET /api/health)."""
+        return await self._json("GET", "/api/health")
+
+    async def formats(self) -> Dict[str, Any]:
+        """Supported formats, AVIF presets and pipeline steps (GET /api/formats)."""
+        return await self._json("GET", "/api/formats")
+
+    async def wait_for_job(self, job_id: str) -> Dict[str, Any]:
+        """
+        Poll a queued conversion until it is done (GET /api/jobs/{job_id}).
+
+        A server in worker mode answers 202 with a job id when a conversion
+        is still queued or running after its wait timeout.
+
+        Returns:
+            The finished job, with the usual conversion fields
+
+        Raises:
+            ConverterError: If the conversion failed or was cancelled
+        """
+        while True:
+            body = await self._json("GET", f"/api/jobs/{job_id}")
+            status = body.get("status")
+            if status == "finished":
+                return body
+            if status in JOB_DONE_STATUSES:
+                raise ConverterError(body.get("error") or f"Conversion {status}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def convert(
+        self,
+        path: PathLike,
+        output_format: str,
+        output_path: Optional[PathLike] = None,
+        quality: Optional[int] = None,
+        speed: Optional[str] = None,
+        resize_width: Optional[int] = None,
+        resize_height: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        allow_downscale: bool = True,
+        pipeline: Optional[List[Dict[str, Any]]] = None
+    ) -> ConversionResult:
+        """
+        Convert one image.
+
+        With output_path, the converted image is written there. It comes
+        back in the same response (inline mode), except for max_bytes
+        conversions, which are downloaded afterwards. Without output_path,
+        the result only carries the server's download_url.
+
+        If the server queues the conversion (worker mode) and answers 202,
+        the job is polled until it finishes, then handled the same way.
+
+        Args:
+            path: Image to upload
+            output_format: Desired output format
+            output_path: Where to save the converted image
+            quality: Optional quality for lossy formats (1-100)
+            speed: Optional AVIF encoder speed preset
+            resize_width: Optional width in pixels
+            resize_height: Optional height in pixels
+            max_bytes: Optional output size budget
+            allow_downscale: Whether max_bytes may shrink the image
+            pipeline: Optional transform steps, e.g. [{"op": "auto_orient"}]
+
+        Returns:
+            The conversion result
+
+        Raises:
+            ConverterError: If the conversion failed
+        """
+        source = Path(path)
+        fields = _form_fields(
+            output_format, quality, speed, resize_width, resize_height,
+            max_bytes, allow_downscale, pipeline
+        )
+        inline = output_path is not None and max_bytes is None
+        response = await self._send(
+            "POST", "/api/convert", upload=source, data=fields,
+            params={"inline": "1"} if inline else None
+        )
+
+        if response.headers.get("content-type", "").startswith("application/json"):
+            try:
+                await response.aread()
+                body = response.json()
+            finally:
+                await response.aclose()
+            if response.status_code == 202:
+                # Still queued on the server: the output is kept there for
+                # download, even for inline requests
+                body = await self.wait_for_job(body["job_id"])
+            elif not body.get("success"):
+                raise ConverterError(_error_detail(response), response.status_code)
+            known = {"success", "message", "original_filename", "output_filename",
+                     "download_url", "input_format", "output_format"}
+            result = ConversionResult(
+                source=source,
+                output_format=body["output_format"],
+                output_filename=body["output_filename"],
+                download_url=body["download_url"],
+                input_format=body["input_format"],
+                details={k: v for k, v in body.items() if k not in known}
+            )
+            if output_path is not None:
+                result.output_path = await self.download(result.download_url, output_path)
+            return result
+
+        result = ConversionResult(
+            source=source,
+            output_format=response.headers.get("x-output-format", output_format),
+            output_filename=_filename(response),
+            input_format=response.headers.get("x-input-format")
+        )
+        result.output_path = await self._save(response, Path(output_path))
+        return result
+
+    async def download(self, download_url: str, output_path: PathLike) -> Path:
+        """
+        Download a converted file.
+
+        Args:
+            download_url: download_url from a conversion, or just its filename
+            output_path: Where to save the file
+
+        Returns:
+            The saved file's path
+        """
+        if not download_url.startswith("/"):
+            download_url = f"/api/download/{download_url}"
+        response = await self._send("GET", download_url)
+        return await self._save(response, Path(output_path))
+
+    async def convert_archive(
+        self,
+        path: PathLike,
+        output_format: str,
+        output_path: PathLike,
+        quality: Optional[int] = None,
+        speed: Optional[str] = None,
+        resize_width: Optional[int] = None,
+        resize_height: Optional[int] = None,
+        pipeline: Optional[List[Dict[str, Any]]] = None
+    ) -> Path:
+        """
+        Convert every image in a ZIP archive on the server.
+
+        The output archive (with a report.json entry) is streamed to
+        output_path as the server produces it.
+
+        Returns:
+            The saved archive's path
+        """
+        source = Path(path)
+        fields = _form_fields(
+            output_format, quality, speed, resize_width, resize_height,
+            None, True, pipeline
+        )
+        response = await self._send("POST", "/api/convert/archive", upload=source, data=fields)
+        return await self._save(response, Path(output_path))
+
+    async def convert_many(
+        self,
+        paths: Iterable[PathLike],
+        output_format: str,
+        output_dir: Optional[PathLike] = None,
+        concurrency: int = 4,
+        **options: Any
+    ) -> AsyncIterator[ConversionResult]:
+        """
+        Convert several images with bounded concurrency.
+
+        Results are yielded in the order conversions finish. A failed
+        conversion (or unreadable file) is yielded with its error instead
+        of stopping the others. Stopping the iteration early cancels the rest.
+
+        Args:
+            paths: Images to convert
+            output_format: Desired output format
+            output_dir: Where to save outputs (as <stem>.<output_format>,
+                or <stem>-2.<output_format> and so on when inputs share a
+                stem); without it only download URLs are returned
+            concurrency: Conversions in flight at once
+            **options: Conversion options passed to convert()
+
+        Yields:
+            One result per image
+        """
+        pending = iter([Path(p) for p in paths])
+        running: Dict[asyncio.Task, Path] = {}
+        used_names: Set[str] = set()
+
+        def output_name(source: Path) -> str:
+            name = f"{source.stem}.{output_format}"
+            number = 1
+            while name in used_names:
+                number += 1
+                name = f"{source.stem}-{number}.{output_format}"
+            used_names.add(name)
+            return name
+
+        def start_next() -> None:
+            source = next(pending, None)
+            if source is None:
+                return
+            output_path = None
+            if output_dir is not None:
+                output_path = Path(output_dir) / output_name(source)
+            task = asyncio.create_task(
+                self.convert(source, output_format, output_path=output_path, **options)
+            )
+            running[task] = source
+
+        for _ in range(max(1, concurrency)):
+            start_next()
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    source = running.pop(task)
+                    start_next()
+                    try:
+                        yield task.result()
+                    except Exception as e:
+                        yield ConversionResult(
+                            source=source,
+                            output_format=output_format,
+                            error=str(e) or type(e).__name__
+                        )
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
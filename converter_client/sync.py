@@ -0,0 +1,108 @@
+"""
+Blocking wrapper around the async client, for scripts.
+Runs the async client on a private event loop, so the same pooled
+connections are reused across calls.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator
+from converter_client.client import AsyncConverterClient, ConversionResult, PathLike
+
+
+class ConverterClient:
+    """
+    Synchronous client for one converter server.
+
+        with ConverterClient("http://localhost:8000") as client:
+            for result in client.convert_many(paths, "webp", output_dir="out"):
+                print(result.source, result.error or result.output_path)
+
+    Not for use inside a running event loop; use AsyncConverterClient there.
+    """
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8000", **kwargs: Any):
+        """
+        Args:
+            base_url: Server address
+            **kwargs: Passed to AsyncConverterClient (timeout, retries, ...)
+        """
+        self._loop = asyncio.new_event_loop()
+        self._client = self._run(self._create(base_url, kwargs))
+
+    @staticmethod
+    async def _create(base_url: str, kwargs: Dict[str, Any]) -> AsyncConverterClient:
+        # Created inside the loop it will be used on
+        return AsyncConverterClient(base_url, **kwargs)
+
+    def _run(self, coro: Any) -> Any:
+        return self._loop.run_until_complete(coro)
+
+    def __enter__(self) -> "ConverterClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the pooled connections and the event loop."""
+        if not self._loop.is_closed():
+            self._run(self._client.aclose())
+            self._loop.close()
+
+    def health(self) -> Dict[str, Any]:
+        """Server status (GET /api/health)."""
+        return self._run(self._client.health())
+
+    def formats(self) -> Dict[str, Any]:
+        """Supported formats, AVIF presets and pipeline steps (GET /api/formats)."""
+        return self._run(self._client.formats())
+
+    def wait_for_job(self, job_id: str) -> Dict[str, Any]:
+        """Poll a queued conversion; see AsyncConverterClient.wait_for_job."""
+        return self._run(self._client.wait_for_job(job_id))
+
+    def convert(self, path: PathLike, output_format: str, **options: Any) -> ConversionResult:
+        """Convert one image; see AsyncConverterClient.convert."""
+        return self._run(self._client.convert(path, output_format, **options))
+
+    def download(self, download_url: str, output_path: PathLike) -> Path:
+        """Download a converted file; see AsyncConverterClient.download."""
+        return self._run(self._client.download(download_url, output_path))
+
+    def convert_archive(
+        self,
+        path: PathLike,
+        output_format: str,
+        output_path: PathLike,
+        **options: Any
+    ) -> Path:
+        """Convert a ZIP archive; see AsyncConverterClient.convert_archive."""
+        return self._run(self._client.convert_archive(path, output_format, output_path, **options))
+
+    def convert_many(
+        self,
+        paths: Iterable[PathLike],
+        output_format: str,
+        output_dir: Optional[PathLike] = None,
+        concurrency: int = 4,
+        **options: Any
+    ) -> Iterator[ConversionResult]:
+        """
+        Convert several images with bounded concurrency, yielding results as
+        they finish; see AsyncConverterClient.convert_many.
+
+        Conversions only make progress while the iterator is being consumed.
+        """
+        results = self._client.convert_many(
+            paths, output_format, output_dir=output_dir, concurrency=concurrency, **options
+        )
+        try:
+            while True:
+                try:
+                    yield self._run(results.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if not self._loop.is_closed():
+                self._run(results.aclose())
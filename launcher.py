@@ -71,12 +71,20 @@ def main():
     # Override settings to use the original directory for temp files
     settings.temp_dir = temp_dir
     
+    # Keep the job journal next to the executable so it survives restarts
+    data_dir = ORIGINAL_DIR / "data"
+    data_dir.mkdir(exist_ok=True)
+    settings.data_dir = data_dir
+    settings.journal_path = data_dir / "jobs.db"
+    
     url = f"http://127.0.0.1:{settings.port}"
     
     print(f"🌐 Starting server at {url}")
     print(f"📁 Temp directory: {temp_dir}")
     print(f"📊 Max file size: {settings.max_file_size_mb}MB")
     print(f"🔧 Supported formats: {', '.join(settings.supported_formats)}")
+    if settings.watch_input_dir and settings.watch_output_dir:
+        print(f"👀 Watching: {settings.watch_input_dir} -> {settings.watch_output_dir}")
     print("=" * 60)
     print("\n✨ Browser will open automatically...")
     print("❌ Close this window to stop the server\n")
@@ -1,9 +1,19 @@
 """
 Convenient startup script for Jim's File Converter.
 Run this file to start the application.
+
+Pass --watch to run only the watch-folder daemon (no web server):
+    python run.py --watch INPUT_DIR OUTPUT_DIR [--format webp]
+
+Pass --worker to run conversion workers for worker mode (JOB_QUEUE_ENABLED):
+    python run.py --worker [--processes 4] [--concurrency 8]
 """
 
 import sys
+import signal
+import argparse
+import asyncio
+import multiprocessing
 try:
     import uvicorn
 except ImportError:
@@ -11,13 +21,107 @@ except ImportError:
     sys.exit(1)
 from app.config import settings
 
+
+def run_watcher(args: argparse.Namespace) -> None:
+    """Run the watch-folder daemon until interrupted."""
+    from fastapi import HTTPException
+    from app.services.converter import cloudconvert_service
+    from app.watcher import watcher_from_settings
+    
+    try:
+        watcher = watcher_from_settings(args.input_dir, args.output_dir, args.format)
+    except ValueError as e:
+        print(f"❌ {e}. Pass INPUT_DIR OUTPUT_DIR or set WATCH_INPUT_DIR/WATCH_OUTPUT_DIR.")
+        sys.exit(2)
+    except HTTPException as e:
+        print(f"❌ {e.detail}")
+        sys.exit(2)
+    print("=" * 60)
+    print("🎨 Jim's File Converter - Watch Folder")
+    print("=" * 60)
+    print("\nPress CTRL+C to stop watching\n")
+    # No web server receives job notifications here, so poll CloudConvert
+    cloudconvert_service.receives_webhooks = False
+    try:
+        asyncio.run(watcher.run())
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
+def run_worker_process(concurrency: int) -> None:
+    """Run one conversion worker until interrupted."""
+    from app.worker import ConversionWorker, run_until_stopped
+    
+    asyncio.run(run_until_stopped(ConversionWorker(concurrency)))
+
+
+def run_workers(args: argparse.Namespace) -> None:
+    """Run conversion worker processes until interrupted."""
+    if not settings.job_queue_enabled:
+        print("❌ Worker mode is off. Set JOB_QUEUE_ENABLED=true for the web server and the workers.")
+        sys.exit(2)
+    concurrency = args.concurrency or settings.worker_concurrency
+    print("=" * 60)
+    print("🎨 Jim's File Converter - Conversion Workers")
+    print("=" * 60)
+    print(f"Queue: {settings.queue_path}")
+    print(f"Temp directory: {settings.temp_dir}")
+    print(f"{args.processes} process(es) x {concurrency} conversions")
+    print("=" * 60)
+    print("\nPress CTRL+C to stop the workers\n")
+    
+    processes = [
+        multiprocessing.Process(target=run_worker_process, args=(concurrency,), name=f"worker-{n}")
+        for n in range(max(1, args.processes))
+    ]
+    for process in processes:
+        process.start()
+    
+    def stop(signum, frame):
+        # Workers put their jobs back on SIGTERM (they ignore repeats)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for process in processes:
+        process.join()
+    print("\n👋 Workers stopped")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start Jim's File Converter")
+    parser.add_argument("--watch", action="store_true",
+                        help="Run the watch-folder daemon instead of the web server")
+    parser.add_argument("input_dir", nargs="?", help="Folder to watch (default: WATCH_INPUT_DIR)")
+    parser.add_argument("output_dir", nargs="?", help="Folder for converted files (default: WATCH_OUTPUT_DIR)")
+    parser.add_argument("--format", help="Output format (default: WATCH_OUTPUT_FORMAT)")
+    parser.add_argument("--worker", action="store_true",
+                        help="Run conversion workers for worker mode instead of the web server")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes (default: 1)")
+    parser.add_argument("--concurrency", type=int,
+                        help="Conversions per worker process (default: WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    
+    if args.watch:
+        run_watcher(args)
+        sys.exit(0)
+    
+    if args.worker:
+        run_workers(args)
+        sys.exit(0)
+    
     print("=" * 60)
     print("🎨 Jim's File Converter")
     print("=" * 60)
     print(f"Starting server at http://{settings.host}:{settings.port}")
     print(f"Max file size: {settings.max_file_size_mb}MB")
     print(f"Supported formats: {', '.join(settings.supported_formats)}")
+    if settings.watch_input_dir and settings.watch_output_dir:
+        print(f"Watching: {settings.watch_input_dir} -> {settings.watch_output_dir}")
+    if settings.job_queue_enabled:
+        print("Worker mode: start conversion workers with python run.py --worker")
     print("=" * 60)
     print("\nPress CTRL+C to stop the server\n")
     
@@ -27,4 +131,3 @@ if __name__ == "__main__":
         port=settings.port,
         reload=True
     )
-
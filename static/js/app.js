@@ -14,6 +14,8 @@ const outputFormat = document.getElementById('outputFormat');
 const optionsSection = document.getElementById('optionsSection');
 const qualityRange = document.getElementById('qualityRange');
 const qualityValue = document.getElementById('qualityValue');
+const speedGroup = document.getElementById('speedGroup');
+const speedSelect = document.getElementById('speedSelect');
 const resizeWidth = document.getElementById('resizeWidth');
 const resizeHeight = document.getElementById('resizeHeight');
 const convertButtonContainer = document.getElementById('convertButtonContainer');
@@ -126,7 +128,7 @@ function handleQualityChange() {
 
 function updateQualityAvailability() {
     const format = outputFormat.value;
-    const supportsQuality = ['jpeg', 'jpg', 'webp'].includes(format);
+    const supportsQuality = ['jpeg', 'jpg', 'webp', 'avif'].includes(format);
     
     qualityRange.disabled = !supportsQuality;
     if (!supportsQuality) {
@@ -134,6 +136,7 @@ function updateQualityAvailability() {
     } else {
         qualityValue.textContent = qualityRange.value;
     }
+    speedGroup.classList.toggle('hidden', format !== 'avif');
 }
 
 // Conversion
@@ -158,15 +161,18 @@ async function convertFile() {
     animateProgress();
     
     try {
-        // Create form data
+        // Create form data (options before the file, so the server can
+        // start the conversion job while the file is still uploading)
         const formData = new FormData();
-        formData.append('file', selectedFile);
         formData.append('output_format', outputFormat.value);
         
         // Optional conversion options
-        if (['jpeg', 'jpg', 'webp'].includes(outputFormat.value)) {
+        if (['jpeg', 'jpg', 'webp', 'avif'].includes(outputFormat.value)) {
             formData.append('quality', qualityRange.value);
         }
+        if (outputFormat.value === 'avif') {
+            formData.append('speed', speedSelect.value);
+        }
         
         const width = parseInt(resizeWidth.value, 10);
         if (!Number.isNaN(width)) {
@@ -178,18 +184,31 @@ async function convertFile() {
             formData.append('resize_height', height);
         }
         
-        // Send conversion request
-        const response = await fetch('/api/convert', {
+        formData.append('file', selectedFile);
+        
+        // Send conversion request; the converted image comes back in the
+        // response itself, so nothing is left behind on the server
+        const response = await fetch('/api/convert?inline=1', {
             method: 'POST',
             body: formData
         });
         
-        const data = await response.json();
-        
-        if (!response.ok) {
-            throw new Error(data.detail || 'Conversion failed');
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!response.ok || contentType.startsWith('application/json')) {
+            const body = await response.json();
+            throw new Error(body.detail || body.error || 'Conversion failed');
         }
         
+        const blob = await response.blob();
+        const disposition = response.headers.get('Content-Disposition') || '';
+        const filename = disposition.match(/filename="([^"]+)"/);
+        const data = {
+            download_url: URL.createObjectURL(blob),
+            output_filename: filename ? filename[1] : `converted.${outputFormat.value}`,
+            input_format: response.headers.get('X-Input-Format'),
+            output_format: response.headers.get('X-Output-Format')
+        };
+        
         // Success
         progressFill.style.width = '100%';
         progressText.textContent = 'Complete!';
@@ -275,12 +294,17 @@ function clearError() {
 
 // Reset
 function reset() {
+    if (conversionResult) {
+        URL.revokeObjectURL(conversionResult.download_url);
+    }
     selectedFile = null;
     conversionResult = null;
     fileInput.value = '';
     outputFormat.value = '';
     qualityRange.value = '85';
     qualityValue.textContent = '85';
+    speedSelect.value = 'balanced';
+    speedGroup.classList.add('hidden');
     resizeWidth.value = '';
     resizeHeight.value = '';
     
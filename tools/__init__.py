@@ -0,0 +1 @@
+"""Development tools (local CloudConvert stand-in, harnesses)."""
@@ -0,0 +1,173 @@
+"""
+Output format benchmark.
+Converts a fixed corpus of images to JPEG, WebP and AVIF (at each AVIF
+speed preset) through the app's converter, and reports output size and
+encode latency per variant, with sizes relative to JPEG.
+
+Runs against whichever CloudConvert API the app is configured for. The
+local stand-in returns the input unchanged, so real numbers need a real
+API key; the stand-in is still useful to check the harness itself.
+
+Usage:
+    python -m tools.benchmark_formats --corpus bench_images --report formats.json
+    python -m tools.benchmark_formats --corpus bench_images --quality 75 --repeat 3
+"""
+
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+from fastapi import HTTPException
+from app.config import settings
+from app.utils.validators import validate_file_format
+from app.services.converter import cloudconvert_service, ConversionError
+
+
+def find_corpus(corpus_dir: Path) -> List[Path]:
+    """Supported images in the corpus, in a stable order."""
+    images = []
+    for path in sorted(corpus_dir.rglob('*')):
+        if not path.is_file():
+            continue
+        try:
+            validate_file_format(path.name)
+        except HTTPException:
+            continue
+        images.append(path)
+    return images
+
+
+def corpus_digest(images: List[Path]) -> str:
+    """Hash of the corpus contents, so reports from different corpora are not compared."""
+    digest = hashlib.sha256()
+    for path in images:
+        digest.update(path.name.encode())
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()[:16]
+
+
+def variants(presets: List[str]) -> List[Tuple[str, str, Optional[str]]]:
+    """(label, output format, speed preset) for every variant to measure."""
+    result = [("jpeg", "jpeg", None), ("webp", "webp", None)]
+    result += [(f"avif-{preset}", "avif", preset) for preset in presets]
+    return result
+
+
+async def measure(
+    image: Path,
+    output_format: str,
+    speed: Optional[str],
+    quality: Optional[int],
+    work_dir: Path
+) -> Dict[str, Any]:
+    """Convert one image once and return its size and latency."""
+    output_path = work_dir / f"{image.stem}.{output_format}"
+    started = time.perf_counter()
+    await cloudconvert_service.convert_image(
+        image,
+        output_format,
+        output_path,
+        quality=quality,
+        speed=speed
+    )
+    latency = time.perf_counter() - started
+    size = output_path.stat().st_size
+    output_path.unlink()
+    return {"size": size, "latency": latency}
+
+
+async def run(args: argparse.Namespace, images: List[Path]) -> Dict[str, Any]:
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for image in images:
+            input_size = image.stat().st_size
+            for label, output_format, speed in variants(args.presets):
+                for _ in range(args.repeat):
+                    try:
+                        sample = await measure(image, output_format, speed, args.quality, Path(work_dir))
+                    except ConversionError as e:
+                        print(f"  {image.name} -> {label}: {e}")
+                        continue
+                    sample["image"] = image.name
+                    sample["input_size"] = input_size
+                    results.setdefault(label, []).append(sample)
+                    print(f"  {image.name} -> {label}: {sample['size']} bytes "
+                          f"in {sample['latency'] * 1000:.0f} ms")
+    return results
+
+
+def summarise(results: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Per-variant totals and medians, with sizes relative to JPEG."""
+    summary = {}
+    for label, samples in results.items():
+        # One size per image (repeats only vary latency)
+        sizes = {s["image"]: s["size"] for s in samples}
+        latencies = [s["latency"] * 1000 for s in samples]
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        summary[label] = {
+            "images": len(sizes),
+            "total_bytes": sum(sizes.values()),
+            "median_latency_ms": round(statistics.median(latencies), 1),
+            "p95_latency_ms": round(p95, 1)
+        }
+
+    baseline = summary.get("jpeg", {}).get("total_bytes")
+    for entry in summary.values():
+        entry["size_vs_jpeg"] = round(entry["total_bytes"] / baseline, 3) if baseline else None
+    return summary
+
+
+def print_table(summary: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{'variant':<16}{'images':>8}{'total KB':>12}{'vs JPEG':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, entry in summary.items():
+        ratio = f"{entry['size_vs_jpeg']:.3f}" if entry["size_vs_jpeg"] is not None else "-"
+        print(f"{label:<16}{entry['images']:>8}{entry['total_bytes'] / 1024:>12.1f}"
+              f"{ratio:>10}{entry['median_latency_ms']:>10.0f}{entry['p95_latency_ms']:>10.0f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare JPEG, WebP and AVIF output size and latency")
+    parser.add_argument("--corpus", type=Path, required=True, help="Directory of source images")
+    parser.add_argument("--quality", type=int, help="Quality for every format (default: per-format defaults)")
+    parser.add_argument("--presets", nargs="+", default=list(settings.avif_speed_presets),
+                        choices=list(settings.avif_speed_presets), help="AVIF speed presets to measure")
+    parser.add_argument("--repeat", type=int, default=1, help="Conversions per image and variant")
+    parser.add_argument("--label", default="", help="Label stored in the report")
+    parser.add_argument("--report", type=Path, default=Path("format_benchmark.json"))
+    args = parser.parse_args(argv)
+
+    images = find_corpus(args.corpus)
+    if not images:
+        print(f"No supported images found in {args.corpus}")
+        return 2
+
+    digest = corpus_digest(images)
+    print(f"Benchmarking {len(images)} images (corpus {digest}) against {settings.cloudconvert_api_url}")
+    results = asyncio.run(run(args, images))
+    summary = summarise(results)
+    print_table(summary)
+
+    report = {
+        "label": args.label,
+        "created_at": datetime.now().isoformat(),
+        "api_url": settings.cloudconvert_api_url,
+        "corpus": {"path": str(args.corpus), "images": len(images), "digest": digest},
+        "quality": args.quality,
+        "repeat": args.repeat,
+        "summary": summary,
+        "samples": results
+    }
+    args.report.write_text(json.dumps(report, indent=2))
+    print(f"\nReport written to {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+Local stand-in for the CloudConvert API.
+Implements just enough of the v2 jobs API for the converter to run against
+it without network access or credits. "Converted" files are the uploaded
+bytes, returned unchanged.
+
+Uploads starting with FAKE-FAIL end in a job error, and uploads starting
+with FAKE-HANG never finish, so failure and timeout paths can be exercised.
+Standalone upload tasks (POST /v2/import/upload) can be used as the input
+of a job's convert task. FAKE_CC_API_LATENCY adds a delay to every API call.
+Each API key is its own account: jobs are only visible to the key that
+created it, every job costs a credit (402 once they run out), and keys in
+FAKE_CC_RATE_LIMITED_KEYS always get a 429.
+
+Run it with:
+    python -m tools.fake_cloudconvert --port 8001
+
+Then point the app at it:
+    CLOUDCONVERT_API_URL=http://127.0.0.1:8001/v2
+    CLOUDCONVERT_API_KEY=fake
+"""
+
+import os
+import time
+import json
+import hmac
+import uuid
+import asyncio
+import hashlib
+import argparse
+import random
+from typing import Dict, Any, Optional
+import httpx
+from fastapi import FastAPI, Request, UploadFile, File, HTTPException
+from fastapi.responses import Response
+
+
+class FakeCloudConvert:
+    """In-memory CloudConvert job store with configurable behaviour."""
+
+    def __init__(self):
+        self.base_url = os.getenv("FAKE_CC_BASE_URL", "http://127.0.0.1:8001")
+        # Seconds a job spends "processing" after upload
+        self.processing_delay = float(os.getenv("FAKE_CC_DELAY", "0.5"))
+        # Fraction of jobs that end in an error
+        self.failure_rate = float(os.getenv("FAKE_CC_FAILURE_RATE", "0"))
+        # Webhook sent for every job that does not set its own webhook_url
+        self.webhook_url = os.getenv("FAKE_CC_WEBHOOK_URL", "")
+        self.webhook_secret = os.getenv("FAKE_CC_WEBHOOK_SECRET", "")
+        # Seconds to keep finished jobs and their files (bounds memory in long runs)
+        self.retention = float(os.getenv("FAKE_CC_RETENTION", "600"))
+        # Starting credits of each account, and keys that are always rate limited
+        self.starting_credits = int(os.getenv("FAKE_CC_CREDITS", "1000000"))
+        self.rate_limited_keys = {
+            k.strip() for k in os.getenv("FAKE_CC_RATE_LIMITED_KEYS", "").split(",") if k.strip()
+        }
+        # Seconds added to every API call, like a round trip to the real API
+        self.api_latency = float(os.getenv("FAKE_CC_API_LATENCY", "0"))
+        self.credits: Dict[str, int] = {}
+        self.owner: Dict[str, str] = {}
+        # Standalone upload tasks: owner, uploaded file and the job using it
+        self.imports: Dict[str, Dict[str, Any]] = {}
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, bytes] = {}
+        self.webhook_url_by_job: Dict[str, str] = {}
+        self.created_at: Dict[str, float] = {}
+
+    def prune(self) -> None:
+        """Forget jobs older than the retention period."""
+        cutoff = time.monotonic() - self.retention
+        for job_id in [j for j, created in self.created_at.items() if created < cutoff]:
+            self.delete_job(job_id)
+
+    def account(self, request: Request) -> str:
+        """API key of a request, enforcing rate limits."""
+        key = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if not key:
+            raise HTTPException(status_code=401, detail="Unauthenticated")
+        if key in self.rate_limited_keys:
+            raise HTTPException(status_code=429, detail="Too many requests", headers={"Retry-After": "30"})
+        self.credits.setdefault(key, self.starting_credits)
+        return key
+
+    def owned_job(self, key: str, job_id: str) -> Dict[str, Any]:
+        job = self.jobs.get(job_id)
+        if job is None or self.owner.get(job_id) != key:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    def create_import_task(self, key: str) -> Dict[str, Any]:
+        """Create a standalone import/upload task."""
+        task_id = str(uuid.uuid4())
+        self.imports[task_id] = {"owner": key, "upload": None, "job_id": None}
+        return {
+            "id": task_id,
+            "operation": "import/upload",
+            "status": "waiting",
+            "result": {
+                "form": {
+                    "url": f"{self.base_url}/upload/task/{task_id}",
+                    "parameters": {"signature": task_id}
+                }
+            }
+        }
+
+    def create_job(self, key: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a job from a CloudConvert job request."""
+        self.prune()
+        if self.credits[key] <= 0:
+            raise HTTPException(status_code=402, detail="Credits exceeded")
+        job_id = str(uuid.uuid4())
+        tasks = []
+        external_input = None
+        names = set(request.get("tasks", {}))
+        for name, spec in request.get("tasks", {}).items():
+            source = spec.get("input")
+            if isinstance(source, str) and source not in names:
+                # Input is an existing standalone upload task
+                if self.imports.get(source, {}).get("owner") != key:
+                    raise HTTPException(status_code=422, detail=f"Unknown input task {source}")
+                external_input = source
+            task: Dict[str, Any] = {
+                "id": str(uuid.uuid4()),
+                "name": name,
+                "operation": spec["operation"],
+                "status": "waiting",
+                "result": None,
+                **{k: v for k, v in spec.items() if k != "operation"}
+            }
+            if spec["operation"] == "import/upload":
+                task["result"] = {
+                    "form": {
+                        "url": f"{self.base_url}/upload/{job_id}",
+                        "parameters": {"signature": job_id}
+                    }
+                }
+            tasks.append(task)
+
+        self.credits[key] -= 1
+        job = {"id": job_id, "status": "waiting", "tasks": tasks}
+        self.jobs[job_id] = job
+        self.owner[job_id] = key
+        self.created_at[job_id] = time.monotonic()
+        webhook_url = request.get("webhook_url") or self.webhook_url
+        if webhook_url:
+            self.webhook_url_by_job[job_id] = webhook_url
+
+        if external_input is not None:
+            imported = self.imports[external_input]
+            imported["job_id"] = job_id
+            if imported["upload"] is not None:
+                asyncio.create_task(self.process(job_id, *imported["upload"]))
+        return job
+
+    def receive_import(self, task_id: str, filename: str, content: bytes) -> None:
+        """Store a file uploaded to a standalone task, starting its job if any."""
+        imported = self.imports[task_id]
+        imported["upload"] = (filename, content)
+        if imported["job_id"] in self.jobs:
+            asyncio.create_task(self.process(imported["job_id"], filename, content))
+
+    async def process(self, job_id: str, filename: str, content: bytes) -> None:
+        """Finish (or fail) a job after the configured delay."""
+        job = self.jobs[job_id]
+        job["status"] = "processing"
+        await asyncio.sleep(self.processing_delay)
+
+        if job_id not in self.jobs:
+            # Deleted while processing
+            return
+
+        if content.startswith(b"FAKE-HANG"):
+            # Stay in "processing" forever
+            return
+
+        if content.startswith(b"FAKE-FAIL") or random.random() < self.failure_rate:
+            job["status"] = "error"
+            job["message"] = "Simulated conversion failure"
+            await self.send_webhook(job_id, "job.failed")
+            return
+
+        output_format = "bin"
+        for task in job["tasks"]:
+            if task["operation"] == "convert":
+                output_format = task.get("output_format", output_format)
+        output_name = f"{os.path.splitext(filename)[0]}.{output_format}"
+        self.files[job_id] = content
+
+        for task in job["tasks"]:
+            task["status"] = "finished"
+            if task["operation"] == "export/url":
+                task["result"] = {
+                    "files": [{
+                        "filename": output_name,
+                        "url": f"{self.base_url}/files/{job_id}/{output_name}"
+                    }]
+                }
+        job["status"] = "finished"
+        await self.send_webhook(job_id, "job.finished")
+
+    async def send_webhook(self, job_id: str, event: str) -> None:
+        """Send a signed webhook notification, if one is configured."""
+        url = self.webhook_url_by_job.get(job_id)
+        if not url:
+            return
+
+        body = json.dumps({"event": event, "job": self.jobs[job_id]}).encode()
+        signature = hmac.new(
+            self.webhook_secret.encode(), body, hashlib.sha256
+        ).hexdigest()
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                await client.post(
+                    url,
+                    content=body,
+                    headers={
+                        "Content-Type": "application/json",
+                        "CloudConvert-Signature": signature
+                    }
+                )
+        except httpx.HTTPError as e:
+            print(f"Webhook delivery failed for job {job_id}: {e}")
+
+    def delete_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Delete a job and its output."""
+        self.files.pop(job_id, None)
+        self.webhook_url_by_job.pop(job_id, None)
+        self.created_at.pop(job_id, None)
+        self.owner.pop(job_id, None)
+        return self.jobs.pop(job_id, None)
+
+
+fake = FakeCloudConvert()
+app = FastAPI(title="Fake CloudConvert")
+
+
+@app.get("/v2/users/me")
+async def get_user(request: Request):
+    key = fake.account(request)
+    return {"data": {"id": key[-4:], "credits": fake.credits[key]}}
+
+
+@app.post("/v2/import/upload", status_code=201)
+async def create_import_task(request: Request):
+    key = fake.account(request)
+    await asyncio.sleep(fake.api_latency)
+    return {"data": fake.create_import_task(key)}
+
+
+@app.post("/v2/jobs", status_code=201)
+async def create_job(request: Request):
+    key = fake.account(request)
+    await asyncio.sleep(fake.api_latency)
+    return {"data": fake.create_job(key, await request.json())}
+
+
+@app.get("/v2/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    await asyncio.sleep(fake.api_latency)
+    return {"data": fake.owned_job(fake.account(request), job_id)}
+
+
+@app.delete("/v2/jobs/{job_id}", status_code=204)
+async def delete_job(job_id: str, request: Request):
+    fake.owned_job(fake.account(request), job_id)
+    fake.delete_job(job_id)
+    return Response(status_code=204)
+
+
+@app.post("/upload/{job_id}", status_code=201)
+async def upload(job_id: str, file: UploadFile = File(...)):
+    if job_id not in fake.jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    content = await file.read()
+    asyncio.create_task(fake.process(job_id, file.filename or "upload", content))
+    return Response(status_code=201)
+
+
+@app.post("/upload/task/{task_id}", status_code=201)
+async def upload_to_task(task_id: str, file: UploadFile = File(...)):
+    if task_id not in fake.imports:
+        raise HTTPException(status_code=404, detail="Task not found")
+    fake.receive_import(task_id, file.filename or "upload", await file.read())
+    return Response(status_code=201)
+
+
+@app.get("/files/{job_id}/{filename}")
+async def download(job_id: str, filename: str):
+    content = fake.files.get(job_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return Response(content=content, media_type="application/octet-stream")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local CloudConvert stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    fake.base_url = os.getenv("FAKE_CC_BASE_URL", f"http://{args.host}:{args.port}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,356 @@
+"""
+Soak test and resource-leak harness.
+Runs the app against the local CloudConvert stand-in for a long period with
+a mix of good, failing, timing-out and client-aborted conversions, samples
+the app's resource use over time, and fails if any of it keeps growing.
+
+Sampled metrics (Linux /proc is needed for RSS and open FDs):
+- rss_mb: resident memory of the app process
+- open_fds: open file descriptors of the app process
+- temp_files / temp_mb: number and size of files in the app's temp dir
+  (the app runs with MEMORY_TIER_MB=0 so every temp file lands there)
+- loop_lag_ms: round-trip time of GET /ping, which includes event-loop lag
+- loop_lag_p99_ms: the app's own p99 event-loop lag (from /api/loop)
+
+Usage:
+    python -m tools.soak --duration 3600 --concurrency 8 --report soak.json
+    python -m tools.soak --compare old.json new.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import statistics
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+import httpx
+
+# Growth between the first and last post-warm-up bucket that counts as a leak
+LEAK_THRESHOLDS = {
+    "rss_mb": 20.0,
+    "open_fds": 10,
+    "temp_files": 10,
+    "temp_mb": 5.0,
+    "loop_lag_ms": 50.0,
+    "loop_lag_p99_ms": 50.0
+}
+
+# Request mix: kind -> relative weight
+DEFAULT_MIX = {
+    "good": 6,
+    "failing": 1,
+    "timeout": 1,
+    "aborted": 1,
+    "invalid": 1
+}
+
+PNG_1X1 = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de"
+    "0000000c4944415478da63f8ffff3f0005fe02fe0def46b80000000049454e44ae426082"
+)
+
+
+def read_proc_metrics(pid: int) -> Dict[str, Optional[float]]:
+    """RSS and open file descriptors of a process (Linux only)."""
+    rss_mb = None
+    open_fds = None
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss_mb = int(line.split()[1]) / 1024
+                    break
+        open_fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        pass
+    return {"rss_mb": rss_mb, "open_fds": open_fds}
+
+
+def read_dir_metrics(directory: Path) -> Dict[str, float]:
+    """Number and total size of files in a directory."""
+    count = 0
+    size = 0
+    for path in directory.glob('*'):
+        try:
+            if path.is_file():
+                count += 1
+                size += path.stat().st_size
+        except FileNotFoundError:
+            continue
+    return {"temp_files": count, "temp_mb": size / (1024 * 1024)}
+
+
+def analyse(samples: List[Dict[str, Any]], warmup_fraction: float, buckets: int = 5) -> Dict[str, Any]:
+    """
+    Look for sustained growth in each metric.
+
+    Samples after the warm-up are split into buckets; a metric is flagged
+    as leaking if the bucket medians never decrease and the last is higher
+    than the first by more than the metric's threshold.
+    """
+    start = int(len(samples) * warmup_fraction)
+    steady = samples[start:]
+    trends = {}
+    for metric, threshold in LEAK_THRESHOLDS.items():
+        values = [(s["t"], s[metric]) for s in steady if s.get(metric) is not None]
+        if len(values) < buckets * 2:
+            trends[metric] = {"status": "insufficient data"}
+            continue
+
+        size = len(values) // buckets
+        medians = [
+            statistics.median(v for _, v in values[i * size:(i + 1) * size])
+            for i in range(buckets)
+        ]
+        growth = medians[-1] - medians[0]
+        monotonic = all(b >= a for a, b in zip(medians, medians[1:]))
+
+        # Least-squares slope, reported per hour for comparison between runs
+        times = [t for t, _ in values]
+        mean_t = statistics.fmean(times)
+        mean_v = statistics.fmean(v for _, v in values)
+        denominator = sum((t - mean_t) ** 2 for t in times) or 1.0
+        slope = sum((t - mean_t) * (v - mean_v) for t, v in values) / denominator
+
+        trends[metric] = {
+            "status": "leak" if monotonic and growth > threshold else "ok",
+            "bucket_medians": [round(m, 2) for m in medians],
+            "growth": round(growth, 2),
+            "threshold": threshold,
+            "slope_per_hour": round(slope * 3600, 2)
+        }
+    return trends
+
+
+class SoakRun:
+    """Starts the app and fake upstream, drives load and samples metrics."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.app_url = f"http://127.0.0.1:{args.app_port}"
+        self.work_dir = Path(tempfile.mkdtemp(prefix="soak-"))
+        self.temp_dir = self.work_dir / "temp"
+        self.processes: List[subprocess.Popen] = []
+        self.samples: List[Dict[str, Any]] = []
+        self.outcomes: Dict[str, Dict[str, int]] = {kind: {} for kind in DEFAULT_MIX}
+        self.loop_stats: Optional[Dict[str, Any]] = None
+        self.started = 0.0
+
+    def start_servers(self) -> subprocess.Popen:
+        fake_env = {
+            **os.environ,
+            "FAKE_CC_DELAY": str(self.args.upstream_delay),
+            "FAKE_CC_RETENTION": "120"
+        }
+        output = None if self.args.verbose else subprocess.DEVNULL
+        self.processes.append(subprocess.Popen(
+            [sys.executable, "-m", "tools.fake_cloudconvert", "--port", str(self.args.fake_port)],
+            env=fake_env,
+            stdout=output,
+            stderr=output
+        ))
+
+        app_env = {
+            **os.environ,
+            "CLOUDCONVERT_API_KEY": "soak",
+            "CLOUDCONVERT_API_URL": f"http://127.0.0.1:{self.args.fake_port}/v2",
+            "CLOUDCONVERT_JOB_TIMEOUT": str(self.args.job_timeout),
+            "TEMP_DIR": str(self.temp_dir),
+            # Keep temp files on disk, where the leak metrics can see them
+            "MEMORY_TIER_MB": "0",
+            "DATA_DIR": str(self.work_dir / "data"),
+            "JOURNAL_PATH": str(self.work_dir / "data" / "jobs.db"),
+            "CLEANUP_INTERVAL_SECONDS": "30",
+            "CLEANUP_MAX_AGE_HOURS": str(60 / 3600),
+            "RESUME_JOBS_ON_STARTUP": "false"
+        }
+        app_process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--port", str(self.args.app_port), "--log-level", "warning"],
+            env=app_env,
+            stdout=output,
+            stderr=output
+        )
+        self.processes.append(app_process)
+        return app_process
+
+    def stop_servers(self) -> None:
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    async def wait_until_ready(self, client: httpx.AsyncClient) -> None:
+        for _ in range(100):
+            try:
+                if (await client.get(f"{self.app_url}/ping")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+        raise RuntimeError("App did not start")
+
+    def record(self, kind: str, outcome: str) -> None:
+        self.outcomes[kind][outcome] = self.outcomes[kind].get(outcome, 0) + 1
+
+    async def one_request(self, client: httpx.AsyncClient, kind: str) -> None:
+        # Random trailing bytes keep every upload unique (no journal reuse)
+        suffix = os.urandom(16)
+        filename = "image.png"
+        content = PNG_1X1 + suffix
+        timeout = self.args.job_timeout + 30
+        if kind == "failing":
+            content = b"FAKE-FAIL" + suffix
+        elif kind == "timeout":
+            content = b"FAKE-HANG" + suffix
+        elif kind == "aborted":
+            # Disconnect while the conversion is still running upstream
+            timeout = self.args.upstream_delay / 2
+        elif kind == "invalid":
+            filename = "document.pdf"
+
+        try:
+            response = await client.post(
+                f"{self.app_url}/api/convert",
+                files={"file": (filename, content, "application/octet-stream")},
+                data={"output_format": "webp"},
+                timeout=timeout
+            )
+            if kind == "good" and response.status_code == 200:
+                download = await client.get(self.app_url + response.json()["download_url"])
+                self.record(kind, f"download {download.status_code}")
+            else:
+                self.record(kind, str(response.status_code))
+        except httpx.TimeoutException:
+            self.record(kind, "client timeout")
+        except httpx.HTTPError as e:
+            self.record(kind, type(e).__name__)
+
+    async def drive_load(self, client: httpx.AsyncClient, deadline: float) -> None:
+        kinds = list(DEFAULT_MIX)
+        weights = [DEFAULT_MIX[k] for k in kinds]
+
+        async def worker():
+            while time.monotonic() < deadline:
+                await self.one_request(client, random.choices(kinds, weights)[0])
+
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+    async def sample(self, client: httpx.AsyncClient, pid: int, deadline: float) -> None:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                await client.get(f"{self.app_url}/ping", timeout=10)
+                lag_ms = (time.perf_counter() - started) * 1000
+            except httpx.HTTPError:
+                lag_ms = None
+            try:
+                loop = (await client.get(f"{self.app_url}/api/loop", timeout=10)).json()
+                self.loop_stats = loop
+                lag_p99_ms = loop["lag_ms"]["p99"]
+            except (httpx.HTTPError, ValueError, KeyError):
+                lag_p99_ms = None
+            self.samples.append({
+                "t": round(time.monotonic() - self.started, 1),
+                **read_proc_metrics(pid),
+                **read_dir_metrics(self.temp_dir),
+                "loop_lag_ms": lag_ms,
+                "loop_lag_p99_ms": lag_p99_ms
+            })
+            await asyncio.sleep(self.args.sample_interval)
+
+    async def run(self) -> Dict[str, Any]:
+        app_process = self.start_servers()
+        try:
+            limits = httpx.Limits(max_connections=self.args.concurrency + 2)
+            async with httpx.AsyncClient(limits=limits) as client:
+                await self.wait_until_ready(client)
+                self.started = time.monotonic()
+                deadline = self.started + self.args.duration
+                await asyncio.gather(
+                    self.drive_load(client, deadline),
+                    self.sample(client, app_process.pid, deadline)
+                )
+        finally:
+            self.stop_servers()
+
+        trends = analyse(self.samples, self.args.warmup)
+        return {
+            "created_at": datetime.now().isoformat(),
+            "label": self.args.label,
+            "duration_s": self.args.duration,
+            "concurrency": self.args.concurrency,
+            "outcomes": self.outcomes,
+            "trends": trends,
+            "leaks": [m for m, t in trends.items() if t.get("status") == "leak"],
+            # Final /api/loop snapshot: lag percentiles and recent stalls
+            "loop": self.loop_stats,
+            "samples": self.samples
+        }
+
+
+def compare(old_path: Path, new_path: Path) -> int:
+    """Print per-metric trend differences between two reports."""
+    old = json.loads(old_path.read_text())
+    new = json.loads(new_path.read_text())
+    print(f"{'metric':<14}{'old slope/h':>14}{'new slope/h':>14}{'old growth':>12}{'new growth':>12}  status")
+    for metric in LEAK_THRESHOLDS:
+        o = old["trends"].get(metric, {})
+        n = new["trends"].get(metric, {})
+        print(
+            f"{metric:<14}{o.get('slope_per_hour', '-'):>14}{n.get('slope_per_hour', '-'):>14}"
+            f"{o.get('growth', '-'):>12}{n.get('growth', '-'):>12}  {n.get('status', '-')}"
+        )
+    return 1 if new.get("leaks") else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Soak test the conversion service")
+    parser.add_argument("--duration", type=float, default=600, help="Seconds to run (default: 600)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8)")
+    parser.add_argument("--sample-interval", type=float, default=5, help="Seconds between samples")
+    parser.add_argument("--warmup", type=float, default=0.2, help="Fraction of samples ignored as warm-up")
+    parser.add_argument("--upstream-delay", type=float, default=0.5, help="Fake CloudConvert processing time")
+    parser.add_argument("--job-timeout", type=float, default=5, help="App's CloudConvert job timeout")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--fake-port", type=int, default=8101)
+    parser.add_argument("--label", default="", help="Label stored in the report (e.g. a version)")
+    parser.add_argument("--report", type=Path, default=Path("soak_report.json"))
+    parser.add_argument("--verbose", action="store_true", help="Show app and upstream output")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"),
+                        help="Compare two reports instead of running")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare)
+
+    report = asyncio.run(SoakRun(args).run())
+    args.report.write_text(json.dumps(report, indent=2))
+
+    print(f"Report written to {args.report}")
+    for metric, trend in report["trends"].items():
+        print(f"  {metric:<12} {trend.get('status')}  {trend.get('bucket_medians', '')}")
+    for kind, outcomes in report["outcomes"].items():
+        print(f"  {kind:<8} {outcomes}")
+
+    if report["leaks"]:
+        print(f"❌ Sustained growth in: {', '.join(report['leaks'])}")
+        return 1
+    print("✅ No sustained resource growth")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())